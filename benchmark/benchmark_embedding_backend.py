@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def _rss_mb():
+    """Current and peak resident memory of this process, in MB."""
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                key, value = line.split(":")
+                values[key] = int(value.split()[0]) / 1024
+    return values["VmRSS"], values["VmHWM"]
+
+
+def run_child(backend, quantization, threads, output):
+    """Loads one encoder in a fresh process, encodes the corpus and times single queries."""
+    start = time.perf_counter()
+    os.environ["EMBEDDING_ONNX_QUANTIZATION"] = quantization
+    os.environ["EMBEDDING_THREADS"] = str(threads)
+    from benchmark_hybrid_retrieval import load_golden_questions
+    from src.services.data_loader import load_faq_data
+    from src.services.rag_service import create_embedding_model
+
+    model = create_embedding_model(MODEL_NAME, backend)
+    load_s = time.perf_counter() - start
+
+    texts = [f"{record.question} {record.answer}" for record in load_faq_data()]
+    np.save(output, np.asarray(model.encode(texts, convert_to_numpy=True), dtype=np.float32))
+
+    questions = [item["question"] for item in load_golden_questions()]
+    for question in questions[:5]:
+        model.encode(question)
+    latencies = []
+    for _ in range(3):
+        for question in questions:
+            query_start = time.perf_counter()
+            model.encode(question)
+            latencies.append((time.perf_counter() - query_start) * 1000)
+
+    rss, peak = _rss_mb()
+    print(json.dumps({
+        "load_s": load_s,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "rss_mb": rss,
+        "peak_mb": peak,
+    }))
+
+
+def _cosine(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+
+def run_benchmark(quantization, threads, min_cosine):
+    configurations = {
+        "torch fp32": ("torch", ""),
+        "onnx fp32": ("onnx", ""),
+        f"onnx int8 ({quantization})": ("onnx", quantization),
+    }
+    print(f"=== Benchmark encodeur {MODEL_NAME} : PyTorch vs ONNX Runtime, threads={threads or 'défaut'} ===")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (backend, quant) in configurations.items():
+            output = os.path.join(tmp, f"{backend}-{quant or 'fp32'}.npy")
+            completed = subprocess.run(
+                [sys.executable, __file__, "--child", backend, "--quantization", quant,
+                 "--threads", str(threads), "--output", output],
+                capture_output=True, text=True, check=True,
+            )
+            results[name] = json.loads(completed.stdout.strip().splitlines()[-1])
+            results[name]["embeddings"] = np.load(output)
+
+    reference = results["torch fp32"]["embeddings"]
+    print(f"{'encodeur':<22} {'cos min':>8} {'cos moy':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'RSS (MB)':>9} {'pic (MB)':>9} {'chargement (s)':>15}")
+    parity_ok = True
+    for name, r in results.items():
+        cosines = _cosine(reference, r["embeddings"])
+        if name != "torch fp32":
+            parity_ok &= bool(cosines.min() > min_cosine)
+        print(f"{name:<22} {cosines.min():>8.4f} {cosines.mean():>8.4f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+              f"{r['rss_mb']:>9.0f} {r['peak_mb']:>9.0f} {r['load_s']:>15.1f}")
+
+    print(f"\nParité des embeddings (cosinus > {min_cosine}) : {'OK' if parity_ok else 'ÉCHEC'}")
+    return parity_ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare l'encodeur PyTorch et ONNX Runtime (fp32, int8) : parité, latence par requête et mémoire."
+    )
+    parser.add_argument("--quantization", default="avx2", help="Configuration int8 : avx2, avx512, avx512_vnni ou arm64.")
+    parser.add_argument("--threads", type=int, default=0, help="Threads intra-op ONNX Runtime (0 : défaut).")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args.child, args.quantization, args.threads, args.output)
+    else:
+        sys.exit(0 if run_benchmark(args.quantization, args.threads, args.min_cosine) else 1)
@@ -0,0 +1,117 @@
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from src.services import data_loader
+from src.services.faq_store import FAQStore
+
+COLUMNS = ("id", "question", "answer", "category", "keywords")
+
+
+def dataframe_path(path):
+    """The former loader: json.load into a DataFrame, then columns read back as lists."""
+    with open(path, "r", encoding="utf-8") as f:
+        faq_df = pd.DataFrame(json.load(f)["faq"])
+    return faq_df, [faq_df[column].tolist() for column in COLUMNS]
+
+
+def store_path(parser, streaming):
+    def load(path):
+        with _settings(parser, streaming):
+            data_loader.load_faq_data.cache_clear()
+            faq = data_loader.load_faq_data(path)
+        return faq, [faq.column(column) for column in COLUMNS]
+    return load
+
+
+class _settings:
+    def __init__(self, parser, streaming):
+        self.values = {"FAQ_JSON_PARSER": parser, "FAQ_STREAMING_MIN_MB": 1e-9 if streaming else 0}
+
+    def __enter__(self):
+        self.saved = {name: getattr(data_loader, name) for name in self.values}
+        for name, value in self.values.items():
+            setattr(data_loader, name, value)
+
+    def __exit__(self, *exc):
+        for name, value in self.saved.items():
+            setattr(data_loader, name, value)
+
+
+def available_loaders():
+    loaders = {"DataFrame (json + pandas)": dataframe_path, "FAQStore (json)": store_path("json", False)}
+    try:
+        import orjson  # noqa: F401
+        loaders["FAQStore (orjson)"] = store_path("orjson", False)
+    except ImportError:
+        print("orjson non installé : variante ignorée.")
+    try:
+        import ijson  # noqa: F401
+        loaders["FAQStore (streaming ijson)"] = store_path("json", True)
+    except ImportError:
+        print("ijson non installé : variante ignorée.")
+    return loaders
+
+
+def write_faq(size, source="data/faq-base.json"):
+    """Writes a FAQ file of `size` entries, repeating the real ones with unique ids."""
+    with open(source, "r", encoding="utf-8") as f:
+        base = json.load(f)["faq"]
+    entries = [{**base[i % len(base)], "id": f"{base[i % len(base)]['id']}-{i}"} for i in range(size)]
+    handle, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(handle, "w", encoding="utf-8") as f:
+        json.dump({"faq": entries}, f, ensure_ascii=False)
+    return path
+
+
+def measure(load, path, runs):
+    times = []
+    for _ in range(runs):
+        gc.collect()
+        start = time.perf_counter()
+        load(path)
+        times.append((time.perf_counter() - start) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    result = load(path)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return statistics.median(times), retained / 1024 / 1024, peak / 1024 / 1024
+
+
+def run_benchmark(sizes, runs):
+    loaders = available_loaders()
+    for size in sizes:
+        path = write_faq(size)
+        try:
+            print(f"\n=== Chargement de la FAQ : {size} entrées ({os.path.getsize(path) / 1024 / 1024:.1f} Mo), "
+                  f"médiane sur {runs} exécutions ===")
+            print(f"{'chargeur':<28} {'temps (ms)':>11} {'mémoire retenue (Mo)':>21} {'pic (Mo)':>9}")
+            for name, load in loaders.items():
+                median_ms, retained_mb, peak_mb = measure(load, path, runs)
+                print(f"{name:<28} {median_ms:>11.2f} {retained_mb:>21.2f} {peak_mb:>9.2f}")
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare le chargement de la FAQ en DataFrame et en FAQStore (temps et mémoire)."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[67, 100_000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    run_benchmark(args.sizes, args.runs)
@@ -0,0 +1,62 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.rag_service import RAGService
+
+
+def load_golden_questions(path="data/golden-set.json"):
+    """Golden set questions that reference a FAQ entry (off-topic questions are skipped)."""
+    with open(path, "r", encoding="utf-8") as f:
+        golden_set = json.load(f)["golden_set"]
+    return [item for item in golden_set if item.get("faq_id_reference")]
+
+
+def evaluate_mode(service, questions):
+    hits_at_1 = 0
+    hits_at_k = 0
+    latencies = []
+    for item in questions:
+        start = time.perf_counter()
+        _, sources, _ = service._find_context(item["question"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits_at_1 += int(sources[:1] == [item["faq_id_reference"]])
+        hits_at_k += int(item["faq_id_reference"] in sources)
+    return {
+        "recall@1": hits_at_1 / len(questions),
+        "recall@k": hits_at_k / len(questions),
+        "p50_ms": np.percentile(latencies, 50),
+        "p99_ms": np.percentile(latencies, 99),
+    }
+
+
+def run_benchmark(top_k):
+    questions = load_golden_questions()
+    print(f"=== Benchmark dense vs hybride (BM25 + RRF) : {len(questions)} questions du golden set, k={top_k} ===")
+
+    results = {}
+    for mode in ("dense", "hybrid"):
+        service = RAGService(top_k=top_k, retrieval_mode=mode, answer_cache_size=0)
+        service._find_context("warm-up")
+        results[mode] = evaluate_mode(service, questions)
+
+    print(f"{'mode':<8} {'recall@1':>10} {'recall@k':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<8} {r['recall@1']:>10.3f} {r['recall@k']:>10.3f} {r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f}")
+
+    gain = results["hybrid"]["recall@1"] - results["dense"]["recall@1"]
+    cost = results["hybrid"]["p50_ms"] - results["dense"]["p50_ms"]
+    print(f"\nGain recall@1 : {gain:+.3f} — surcoût médian par requête : {cost:+.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare la recherche dense et hybride sur le golden set.")
+    parser.add_argument("-k", type=int, default=6)
+    args = parser.parse_args()
+    run_benchmark(args.k)
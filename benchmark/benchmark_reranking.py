@@ -0,0 +1,70 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_hybrid_retrieval import load_golden_questions
+from src.services.rag_service import RAGService
+
+
+def evaluate(service, questions, end_to_end):
+    hits_at_1 = 0
+    hits_at_k = 0
+    prompt_tokens = []
+    latencies = []
+    for item in questions:
+        start = time.perf_counter()
+        context, sources, _ = service._find_context(item["question"])
+        if end_to_end:
+            service.answer_question(item["question"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        prompt_tokens.append(service._token_counter.count(context))
+        hits_at_1 += int(sources[:1] == [item["faq_id_reference"]])
+        hits_at_k += int(item["faq_id_reference"] in sources)
+    return {
+        "recall@1": hits_at_1 / len(questions),
+        "recall@k": hits_at_k / len(questions),
+        "tokens": np.mean(prompt_tokens),
+        "p50_ms": np.percentile(latencies, 50),
+        "p99_ms": np.percentile(latencies, 99),
+    }
+
+
+def run_benchmark(reranker_model, top_k, end_to_end):
+    questions = load_golden_questions()
+    scope = "bout en bout (LLM inclus)" if end_to_end else "recherche seule"
+    print(f"=== Benchmark re-ranking cross-encoder : {len(questions)} questions du golden set, latence {scope} ===")
+
+    configurations = {
+        f"bi-encodeur (k={top_k})": dict(top_k=top_k),
+        f"re-ranking ({reranker_model})": dict(top_k=top_k, reranker_model=reranker_model),
+    }
+    results = {}
+    for name, params in configurations.items():
+        service = RAGService(answer_cache_size=0, query_embedding_cache_mb=0, **params)
+        service._find_context("warm-up")
+        results[name] = evaluate(service, questions, end_to_end)
+
+    width = max(len(name) for name in results)
+    print(f"{'configuration':<{width}} {'recall@1':>10} {'recall@k':>10} {'tokens':>8} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for name, r in results.items():
+        print(f"{name:<{width}} {r['recall@1']:>10.3f} {r['recall@k']:>10.3f} {r['tokens']:>8.0f} "
+              f"{r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f}")
+
+    base, reranked = results.values()
+    print(f"\nGain recall@1 : {reranked['recall@1'] - base['recall@1']:+.3f} — "
+          f"contexte : {reranked['tokens'] - base['tokens']:+.0f} tokens — "
+          f"surcoût médian : {reranked['p50_ms'] - base['p50_ms']:+.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare la recherche avec et sans re-ranking cross-encoder sur le golden set.")
+    parser.add_argument("--model", default="cross-encoder/mmarco-mMiniLMv2-L12-H384-v1", help="Modèle cross-encoder.")
+    parser.add_argument("-k", type=int, default=6, help="top_k de la recherche sans re-ranking.")
+    parser.add_argument("--end-to-end", action="store_true", help="Inclut l'appel au LLM dans la latence mesurée.")
+    args = parser.parse_args()
+    run_benchmark(args.model, args.k, args.end_to_end)
@@ -0,0 +1,70 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay out of the startup path: they are loaded with the RAG service.
+HEAVY_MODULES = ("torch", "transformers", "sentence_transformers", "huggingface_hub", "pandas")
+
+DEFAULT_BUDGET_MS = 800
+
+
+def parse_importtime(stderr):
+    """Returns {module: cumulative_us} for the top-level imports listed by `-X importtime`."""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumul, name = line[len("import time:"):].split("|")
+        if cumul.strip().isdigit():
+            cumulative[name.strip()] = int(cumul)
+    return cumulative
+
+
+def measure(module):
+    """Imports `module` in a fresh interpreter: wall time (ms), importtime profile and heavy modules loaded."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print((time.perf_counter() - start) * 1000)\n"
+        f"print('heavy:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    wall_ms, heavy = completed.stdout.strip().splitlines()[-2:]
+    return float(wall_ms), parse_importtime(completed.stderr), [m for m in heavy[len("heavy:"):].split(",") if m]
+
+
+def run_benchmark(modules, runs, budget_ms, top):
+    print(f"=== Temps de démarrage (import) : médiane sur {runs} exécutions, budget {budget_ms} ms ===")
+    within_budget = True
+    for module in modules:
+        results = [measure(module) for _ in range(runs)]
+        median_ms = statistics.median(wall for wall, _, _ in results)
+        _, profile, heavy = results[-1]
+        ok = median_ms <= budget_ms and not heavy
+        within_budget &= ok
+        print(f"\n{module} : {median_ms:.0f} ms — {'OK' if ok else 'HORS BUDGET'}")
+        print(f"  modules lourds importés : {', '.join(heavy) if heavy else 'aucun'}")
+        print(f"  imports les plus coûteux (cumulé) :")
+        top_level = {name: us for name, us in profile.items() if "." not in name}
+        for name, us in sorted(top_level.items(), key=lambda item: -item[1])[:top]:
+            print(f"    {name:<30} {us / 1000:>8.1f} ms")
+    return within_budget
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mesure le temps d'import de l'API (python -X importtime) et le compare au budget."
+    )
+    parser.add_argument("modules", nargs="*", default=["src.main", "src.serve"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+    sys.exit(0 if run_benchmark(args.modules, args.runs, args.budget_ms, args.top) else 1)
@@ -0,0 +1,105 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.vector_index import create_index, load_index
+
+
+def make_corpus(size, dim, n_clusters=200, seed=0):
+    """Synthetic clustered corpus, closer to sentence embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim))
+    vectors = centers[rng.integers(0, n_clusters, size=size)] + 0.6 * rng.normal(size=(size, dim))
+    return vectors.astype(np.float32)
+
+
+def make_queries(corpus, n_queries, seed=1):
+    rng = np.random.default_rng(seed)
+    picked = corpus[rng.choice(len(corpus), size=n_queries, replace=False)]
+    return (picked + 0.3 * rng.normal(size=picked.shape)).astype(np.float32)
+
+
+def benchmark_index(backend, corpus, queries, k, exact_indices=None, from_disk=False, **params):
+    """`from_disk` saves the index and searches the reloaded, memory-mapped copy."""
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        index = create_index(backend, **params).build(corpus)
+        if from_disk:
+            index.save(directory)
+            index = load_index(directory)
+        build_seconds = time.perf_counter() - start
+        return _measure(index, backend, params, from_disk, build_seconds, queries, k, exact_indices)
+
+
+def _measure(index, backend, params, from_disk, build_seconds, queries, k, exact_indices):
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        _, indices = index.search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(indices[0])
+    found = np.array(found)
+
+    recall = 1.0
+    if exact_indices is not None:
+        recall = np.mean([len(set(f) & set(e)) / k for f, e in zip(found, exact_indices)])
+
+    return {
+        "backend": backend,
+        "params": {**params, "mmap": True} if from_disk else params,
+        "memory_mb": index.nbytes / 1e6 if index.nbytes is not None else float("nan"),
+        "build_s": build_seconds,
+        "recall": recall,
+        "p50_ms": np.percentile(latencies, 50),
+        "p99_ms": np.percentile(latencies, 99),
+        "indices": found,
+    }
+
+
+def run_benchmark(size, dim, n_queries, k):
+    print(f"=== Benchmark des index vectoriels : {size} vecteurs, dimension {dim}, {n_queries} requêtes, k={k} ===")
+    print("Mémoire : données résidentes de l'index (les vecteurs float32 mappés depuis le disque, mmap=True, n'y sont pas comptés).")
+    corpus = make_corpus(size, dim)
+    queries = make_queries(corpus, n_queries)
+
+    reference = benchmark_index("brute_force", corpus, queries, k)
+    results = [reference]
+    results.append(benchmark_index("brute_force", corpus, queries, k, reference["indices"], quantization="int8"))
+    results.append(
+        benchmark_index("brute_force", corpus, queries, k, reference["indices"], from_disk=True, quantization="int8")
+    )
+    for nprobe in (4, 16):
+        results.append(benchmark_index("ivf", corpus, queries, k, reference["indices"], nprobe=nprobe))
+    try:
+        for ef_search in (32, 128):
+            results.append(benchmark_index("hnsw", corpus, queries, k, reference["indices"], ef_search=ef_search))
+    except RuntimeError as e:
+        print(f"HNSW ignoré : {e}")
+
+    print(
+        f"{'backend':<12} {'paramètres':<30} {'mémoire (Mo)':>12} {'build (s)':>10} "
+        f"{'recall@k':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}"
+    )
+    for r in results:
+        params = ", ".join(f"{key}={value}" for key, value in r["params"].items())
+        print(
+            f"{r['backend']:<12} {params:<30} {r['memory_mb']:>12.1f} {r['build_s']:>10.2f} {r['recall']:>10.3f} "
+            f"{r['p50_ms']:>10.3f} {r['p99_ms']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare recall@k et latence des index vectoriels.")
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=6)
+    args = parser.parse_args()
+    run_benchmark(args.size, args.dim, args.queries, args.k)
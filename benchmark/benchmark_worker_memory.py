@@ -0,0 +1,112 @@
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LAUNCHERS = {
+    "uvicorn": lambda workers, port: [
+        sys.executable, "-m", "uvicorn", "src.main:app", "--workers", str(workers), "--port", str(port),
+    ],
+    "preload": lambda workers, port: [
+        sys.executable, "-m", "src.serve", "--workers", str(workers), "--port", str(port),
+    ],
+}
+
+
+def child_pids(pid):
+    """Worker pids (uvicorn adds a multiprocessing helper process, skipped as it loads nothing)."""
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        children = [int(p) for p in f.read().split()]
+    workers = []
+    for child in children:
+        with open(f"/proc/{child}/cmdline", "rb") as f:
+            if b"resource_tracker" not in f.read():
+                workers.append(child)
+    return workers
+
+
+def memory_mb(pid):
+    """Rss / Pss / shared pages of a process, in MB (/proc/<pid>/smaps_rollup)."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Shared_Clean:", "Shared_Dirty:"):
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return values["Rss"], values["Pss"], values["Shared_Clean"] + values["Shared_Dirty"]
+
+
+def wait_ready(process, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def measure(launcher, workers, port, requests, timeout):
+    process = subprocess.Popen(
+        LAUNCHERS[launcher](workers, port), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_ready(process, port, timeout):
+            raise RuntimeError(f"Le serveur '{launcher}' n'a pas démarré en {timeout}s.")
+        # Every worker must have served requests: the lazily loaded objects are then in memory.
+        for i in range(requests):
+            try:
+                httpx.post(
+                    f"http://127.0.0.1:{port}/api/v1/answer",
+                    json={"question": f"Comment déclarer un changement de situation ? ({i})"},
+                    timeout=30,
+                )
+            except httpx.HTTPError:
+                pass
+        return [memory_mb(pid) for pid in child_pids(process.pid)]
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            # Graceful shutdown waits for in-flight LLM calls; the measurements are already taken.
+            for pid in child_pids(process.pid):
+                os.kill(pid, signal.SIGKILL)
+            process.kill()
+            process.wait()
+
+
+def run_benchmark(workers, port, requests, timeout):
+    print(f"=== Mémoire par worker : {workers} workers, {requests} requêtes de préchauffage ===")
+    print(f"{'lanceur':<10} {'RSS moy. (MB)':>14} {'PSS total (MB)':>15} {'partagé moy. (MB)':>18}")
+    totals = {}
+    for launcher in LAUNCHERS:
+        rows = measure(launcher, workers, port, requests, timeout)
+        rss = sum(r[0] for r in rows) / len(rows)
+        pss = sum(r[1] for r in rows)
+        shared = sum(r[2] for r in rows) / len(rows)
+        totals[launcher] = pss
+        print(f"{launcher:<10} {rss:>14.1f} {pss:>15.1f} {shared:>18.1f}")
+
+    print(f"\nMémoire totale (PSS) économisée avec le préchargement : "
+          f"{totals['uvicorn'] - totals['preload']:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare la mémoire des workers entre `uvicorn --workers` et le lanceur avec préchargement."
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=300, help="Délai maximal de démarrage, en secondes.")
+    args = parser.parse_args()
+    run_benchmark(args.workers, args.port, args.requests, args.timeout)
@@ -0,0 +1,154 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# FAQ knowledge base file.
+FAQ_DATA_PATH = os.getenv("FAQ_DATA_PATH", "data/faq-base.json")
+
+# FAQ file parsing: FAQ_JSON_PARSER "auto" uses orjson when installed ("json" forces the
+# standard library). Files of FAQ_STREAMING_MIN_MB or more are parsed entry by entry
+# with ijson when installed (0 disables streaming).
+FAQ_JSON_PARSER = os.getenv("FAQ_JSON_PARSER", "auto")
+FAQ_STREAMING_MIN_MB = float(os.getenv("FAQ_STREAMING_MIN_MB", "64"))
+
+# Interval in seconds between two checks of the FAQ file modification time.
+# When it changes, the knowledge base is reloaded without restart. 0 disables the watcher.
+FAQ_RELOAD_INTERVAL_SECONDS = float(os.getenv("FAQ_RELOAD_INTERVAL_SECONDS", "0"))
+
+# Token expected in the X-Admin-Token header of the admin endpoints. Empty value disables them (404).
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Directory of the persistent FAQ embedding cache (memory-mapped .npy + manifest).
+# Empty value disables the cache and re-encodes the corpus at every startup.
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "")
+
+# Embedding encoder: "torch" (sentence-transformers PyTorch model) or "onnx" (exported once
+# to EMBEDDING_ONNX_DIR and run on ONNX Runtime, requires sentence-transformers[onnx]).
+# EMBEDDING_ONNX_QUANTIZATION applies int8 dynamic quantization ("avx2", "avx512",
+# "avx512_vnni" or "arm64"; empty keeps fp32). EMBEDDING_THREADS sets the ONNX Runtime
+# intra-op threads (0: default).
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_QUANTIZATION = os.getenv("EMBEDDING_ONNX_QUANTIZATION", "")
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "models/onnx")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+
+# Threads running query embedding and retrieval outside of the event loop.
+EMBED_EXECUTOR_WORKERS = int(os.getenv("EMBED_EXECUTOR_WORKERS", "4"))
+
+# Maximum number of concurrent LLM calls per worker.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+# Remote LLM transport: per-attempt timeout and overall deadline (seconds), retries with
+# jittered exponential backoff on timeouts, network errors and 429/5xx, circuit breaker
+# opened after LLM_BREAKER_FAILURE_THRESHOLD consecutive failures for LLM_BREAKER_RESET_SECONDS,
+# and keep-alive pool of the shared HTTP clients.
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "45"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY_SECONDS = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "0.5"))
+LLM_RETRY_MAX_DELAY_SECONDS = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "8"))
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100"))
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20"))
+LLM_POOL_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY_SECONDS", "30"))
+
+# Single-flight coalescing: concurrent identical questions (same normalized text, category
+# and retrieved entries) share one in-flight LLM call.
+REQUEST_COALESCING = os.getenv("REQUEST_COALESCING", "true").lower() == "true"
+
+# Generation backend: "remote" (Hugging Face Inference API) or "local" (in-process CPU model,
+# LOCAL_LLM_QUANTIZATION="int8" for dynamic int8 quantization, "" for float32). Local requests
+# wait in a queue of at most LOCAL_LLM_QUEUE_SIZE and are decoded together, continuously
+# batched, up to LOCAL_LLM_MAX_BATCH_SIZE at a time; LOCAL_LLM_THREADS=0 keeps the torch default.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "remote")
+LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "Qwen/Qwen2.5-0.5B-Instruct")
+LOCAL_LLM_QUANTIZATION = os.getenv("LOCAL_LLM_QUANTIZATION", "int8")
+LOCAL_LLM_QUEUE_SIZE = int(os.getenv("LOCAL_LLM_QUEUE_SIZE", "64"))
+LOCAL_LLM_MAX_BATCH_SIZE = int(os.getenv("LOCAL_LLM_MAX_BATCH_SIZE", "8"))
+LOCAL_LLM_THREADS = int(os.getenv("LOCAL_LLM_THREADS", "0"))
+
+# Answer cache: exact match on the normalized question, then near-duplicate lookup
+# on the question embedding. A size of 0 disables the cache.
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+
+# Query embedding cache: LRU keyed by the normalized question, capped at
+# QUERY_EMBEDDING_CACHE_MAX_MB of embeddings (0 disables it). With a Redis URL the
+# embeddings are also shared between workers, expiring after the TTL.
+QUERY_EMBEDDING_CACHE_MAX_MB = float(os.getenv("QUERY_EMBEDDING_CACHE_MAX_MB", "16"))
+QUERY_EMBEDDING_CACHE_REDIS_URL = os.getenv("QUERY_EMBEDDING_CACHE_REDIS_URL", "")
+QUERY_EMBEDDING_CACHE_REDIS_TTL_SECONDS = float(os.getenv("QUERY_EMBEDDING_CACHE_REDIS_TTL_SECONDS", "86400"))
+
+# Batch answer endpoint: maximum questions per request and concurrent LLM calls per batch.
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "100"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+# Micro-batching of concurrent query embeddings: collection window in milliseconds
+# (0 disables batching) and maximum number of queries encoded together.
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "0"))
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+
+# Vector index used for retrieval: "brute_force" (exact), "ivf" (NumPy inverted file)
+# or "hnsw" (requires hnswlib). When VECTOR_INDEX_DIR is set, the index is saved there
+# and reloaded at startup as long as the corpus and the index settings below are unchanged.
+# VECTOR_INDEX_QUANTIZATION=int8 stores the brute force matrix as int8 and rescores
+# the best k * VECTOR_INDEX_RESCORE_FACTOR candidates in float32. It only saves memory
+# when the float32 vectors are memory-mapped (VECTOR_INDEX_DIR and EMBEDDING_CACHE_DIR
+# set), and searches about 2x slower than float32.
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "brute_force")
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "")
+VECTOR_INDEX_PARAMS = {
+    "brute_force": {
+        "quantization": os.getenv("VECTOR_INDEX_QUANTIZATION") or None,
+        "rescore_factor": int(os.getenv("VECTOR_INDEX_RESCORE_FACTOR", "4")),
+    },
+    "ivf": {"nprobe": int(os.getenv("IVF_NPROBE", "8"))},
+    "hnsw": {"m": int(os.getenv("HNSW_M", "16")), "ef_search": int(os.getenv("HNSW_EF_SEARCH", "64"))},
+}
+
+# Retrieval mode: "dense" (embeddings only) or "hybrid" (embeddings + BM25 over question,
+# answer and keywords, fused by reciprocal rank fusion over HYBRID_CANDIDATES per ranking).
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Cross-encoder re-ranking (empty RERANKER_MODEL disables it): the RERANK_CANDIDATES best
+# retrieved entries are rescored together and only the RERANK_TOP_K best reach the prompt.
+# Re-ranking is skipped when its estimated duration exceeds RERANK_BUDGET_MS (0: no limit).
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "3"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+
+# Category routing: "off", "explicit" (the search is restricted to the rows of the
+# category named by the request, in the shared vector index) or "auto" (also predicts
+# the category with a nearest-centroid classifier, applied only when it beats the
+# runner-up by CATEGORY_CLASSIFIER_MIN_MARGIN).
+CATEGORY_ROUTING = os.getenv("CATEGORY_ROUTING", "explicit")
+CATEGORY_CLASSIFIER_MIN_MARGIN = float(os.getenv("CATEGORY_CLASSIFIER_MIN_MARGIN", "0.05"))
+
+# Prompt context budget. CONTEXT_TOKENIZER is the Hugging Face tokenizer used to count
+# tokens (e.g. the LLM id); empty uses a ~4 characters per token approximation.
+# CONTEXT_MIN_RELATIVE_SCORE drops entries scoring below that fraction of the best one
+# (0 keeps them all), CONTEXT_DEDUP_THRESHOLD skips near-duplicate answers.
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "")
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1024"))
+CONTEXT_MAX_ANSWER_TOKENS = int(os.getenv("CONTEXT_MAX_ANSWER_TOKENS", "256"))
+CONTEXT_MIN_RELATIVE_SCORE = float(os.getenv("CONTEXT_MIN_RELATIVE_SCORE", "0"))
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.8"))
+
+# Confidence-gated fast paths (0 disables them): at or above DIRECT_ANSWER_THRESHOLD the
+# stored FAQ answer is returned without calling the LLM, below REFUSAL_THRESHOLD the
+# standard refusal is returned. DIRECT_ANSWER_TEMPLATE wraps the stored answer ("{answer}").
+DIRECT_ANSWER_THRESHOLD = float(os.getenv("DIRECT_ANSWER_THRESHOLD", "0"))
+REFUSAL_THRESHOLD = float(os.getenv("REFUSAL_THRESHOLD", "0"))
+DIRECT_ANSWER_TEMPLATE = os.getenv("DIRECT_ANSWER_TEMPLATE", "Bonjour, {answer}")
+
+# Startup warm-up: builds the RAG service (FAQ, embedding model and index loaded in
+# parallel) and runs one retrieval in the background; /ready answers 503 until it is done
+# and the answer routes answer 503 while the service is being built (when disabled the
+# service is built on the first request and /ready is always 200).
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
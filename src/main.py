@@ -1,16 +1,30 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from src.config.logging_config import setup_logging
 from src.api.middleware.logging_middleware import LoggingMiddleware
 from src.routes import metrics, api_router
 from datetime import datetime
 from src.services.data_loader import load_faq_data
+from src.config.settings import WARMUP_ON_STARTUP
 
 setup_logging()
 
+@asynccontextmanager
+async def lifespan(app):
+    # Runs in the background so /health answers while the models load; /ready tells when it is done.
+    warm_up_task = asyncio.create_task(asyncio.to_thread(api_router.warm_up)) if WARMUP_ON_STARTUP else None
+    yield
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+
 app = FastAPI(
     title="FAQ IA API",
     description="API de réponse automatique aux questions FAQ",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(LoggingMiddleware)
@@ -18,8 +32,7 @@ app.add_middleware(LoggingMiddleware)
 @app.get("/health", summary="Check API Health")
 def health_route():
     """Provides a detailed health check for the API."""
-    faq_df = load_faq_data()
-    faq_count = len(faq_df) if not faq_df.empty else 0
+    faq_count = len(load_faq_data())
     return {
         "status": "ok",
         "timestamp": datetime.now().isoformat(),
@@ -27,5 +40,13 @@ def health_route():
         "faq_count": faq_count
     }
 
+@app.get("/ready", summary="Check API Readiness")
+def ready_route():
+    """Returns 200 once the startup warm-up is done, 503 before (or if it failed)."""
+    readiness = api_router.get_readiness()
+    if not WARMUP_ON_STARTUP:
+        readiness["ready"] = True
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
 app.include_router(api_router.router, prefix="/api/v1")
 app.include_router(metrics.router)
\ No newline at end of file
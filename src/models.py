@@ -1,9 +1,12 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
+from src.config.settings import BATCH_MAX_QUESTIONS
+
 class QuestionRequest(BaseModel):
     """Request model for asking a question."""
     question: str = Field(..., example="Comment obtenir un acte de naissance ?")
+    category: Optional[str] = Field(None, example="etat_civil", description="Restricts retrieval to one FAQ category.")
 
 class AnswerResponse(BaseModel):
     """Response model for an answer."""
@@ -11,6 +14,34 @@ class AnswerResponse(BaseModel):
     confidence: float
     sources: List[str] = []
     latency_ms: float
+    cached: bool = False
+    path: str = "llm"
+
+class BatchQuestionRequest(BaseModel):
+    """Request model for answering several questions at once."""
+    questions: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=BATCH_MAX_QUESTIONS,
+        example=["Comment obtenir un acte de naissance ?", "Quels sont les horaires de la déchetterie ?"],
+    )
+    category: Optional[str] = Field(None, description="Restricts retrieval to one FAQ category for every question.")
+
+class BatchAnswerItem(BaseModel):
+    """Answer to one question of a batch, or the error that prevented it."""
+    question: str
+    answer: Optional[str] = None
+    confidence: Optional[float] = None
+    sources: List[str] = []
+    latency_ms: Optional[float] = None
+    cached: bool = False
+    path: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchAnswerResponse(BaseModel):
+    """Response model for a batch of answers, in the order of the questions."""
+    results: List[BatchAnswerItem]
+    latency_ms: float
 
 class FAQ(BaseModel):
     """Model for a single FAQ item."""
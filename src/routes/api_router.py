@@ -1,60 +1,205 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+import hmac
+import json
+import logging
+import threading
+import time
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from typing import List, Optional
 
-from src.models import QuestionRequest, AnswerResponse, FAQ
-from src.services.rag_service import RAGService
-from src.services.data_loader import load_faq_data
+from src.models import QuestionRequest, AnswerResponse, BatchQuestionRequest, BatchAnswerResponse, FAQ
+from src.services.errors import GenerationOverloaded
+from src.services.data_loader import get_faq_catalog, load_faq_data
+from src.config.settings import ADMIN_TOKEN
+
+logger = logging.getLogger("faq_api")
 
 router = APIRouter()
 
 _rag_service_instance = None
+_rag_service_lock = threading.Lock()
+_readiness = {"ready": False, "error": None, "timings_ms": {}}
 
-def get_rag_service():
+def _create_rag_service(**options):
+    # Called with _rag_service_lock held.
     global _rag_service_instance
     if _rag_service_instance is None:
-        _rag_service_instance = RAGService()
+        from src.services.rag_service import RAGService
+        _rag_service_instance = RAGService(**options)
     return _rag_service_instance
 
+def build_rag_service(**options):
+    """
+    Builds the shared RAG service (waiting for it if another thread is building it).
+    The ML stack (torch, sentence-transformers, huggingface_hub) is only imported here,
+    so the app and its lightweight endpoints start without it. A process that forks
+    workers afterwards passes `background_threads=False`: each worker starts them with
+    `after_fork()`.
+    """
+    with _rag_service_lock:
+        return _create_rag_service(**options)
+
+def get_rag_service():
+    """
+    Dependency of the answer routes: the shared RAG service, built on first use if no
+    warm-up is running (or after a failed one). While another thread is building it,
+    answers 503 at once rather than holding a threadpool thread for the whole load.
+    """
+    if _rag_service_instance is not None:
+        return _rag_service_instance
+    if not _rag_service_lock.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503, detail="The service is starting, retry shortly.", headers={"Retry-After": "5"}
+        )
+    try:
+        rag_service = _create_rag_service()
+    finally:
+        _rag_service_lock.release()
+    # Built here after a failed (or disabled) warm-up: the service is ready now.
+    _readiness.update(ready=True, error=None)
+    return rag_service
+
+def warm_up():
+    """
+    Builds the RAG service, then runs one retrieval so the first request does not pay
+    for lazy initialisation. Called at startup; `get_readiness` reports the outcome.
+    """
+    start_time = time.perf_counter()
+    try:
+        rag_service = build_rag_service()
+        timings = dict(getattr(rag_service, "startup_timings", {}))
+        query_start = time.perf_counter()
+        rag_service._find_context("warm-up")
+        timings["warm_up_query"] = (time.perf_counter() - query_start) * 1000
+    except Exception as e:
+        logger.error(f"Startup warm-up failed: {e}", exc_info=True)
+        _readiness["error"] = str(e)
+        return
+    timings["total"] = (time.perf_counter() - start_time) * 1000
+    _readiness.update(ready=True, error=None, timings_ms=timings)
+    logger.info("Startup warm-up done: " + ", ".join(f"{phase} {ms:.0f}ms" for phase, ms in timings.items()))
+
+def get_readiness():
+    return dict(_readiness)
+
 def get_faq_df():
     return load_faq_data()
 
+def get_catalog(faq = Depends(get_faq_df)):
+    return get_faq_catalog(faq)
+
+def check_category(category, rag_service):
+    if category is not None and category not in rag_service.categories:
+        raise HTTPException(status_code=400, detail=f"Unknown category '{category}'.")
+
+def verify_admin_token(x_admin_token: Optional[str] = Header(default=None)):
+    # Without a configured token the admin endpoints do not exist.
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
 
 
 @router.post("/answer", response_model=AnswerResponse, summary="Get an answer using the recommended RAG strategy")
 async def get_answer(
     request: QuestionRequest,
-    rag_service: RAGService = Depends(get_rag_service)
+    rag_service = Depends(get_rag_service)
 ):
     """
     Receives a question and returns an answer generated by the RAG strategy.
     """
+    check_category(request.category, rag_service)
     try:
-        result = rag_service.answer_question(request.question)
+        result = await rag_service.answer_question_async(request.question, category=request.category)
         return AnswerResponse(**result)
+    except GenerationOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/answer/batch", response_model=BatchAnswerResponse, summary="Answer a batch of questions")
+async def get_batch_answers(
+    request: BatchQuestionRequest,
+    rag_service = Depends(get_rag_service)
+):
+    """
+    Answers several questions in one call. Results are returned in the order of the
+    questions, with a per-item error instead of failing the whole batch.
+    """
+    check_category(request.category, rag_service)
+    start_time = time.perf_counter()
+    try:
+        results = await rag_service.answer_batch_async(request.questions, category=request.category)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return BatchAnswerResponse(results=results, latency_ms=(time.perf_counter() - start_time) * 1000)
+
+@router.post("/answer/stream", summary="Stream an answer as Server-Sent Events")
+async def stream_answer(
+    request: QuestionRequest,
+    rag_service = Depends(get_rag_service)
+):
+    """
+    Sends the sources and confidence right after retrieval, then the LLM tokens
+    as they are generated, using Server-Sent Events.
+    """
+    check_category(request.category, rag_service)
+
+    async def event_stream():
+        async for event, data in rag_service.stream_answer(request.question, category=request.category):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/faq", response_model=List[FAQ], summary="List all FAQs")
-async def list_faqs(faq_df = Depends(get_faq_df)):
+async def list_faqs(
+    catalog = Depends(get_catalog),
+    if_none_match: Optional[str] = Header(default=None),
+):
     """
     Returns a list of all FAQ items from the knowledge base.
+    The body is pre-serialized and carries an ETag: clients sending it back in
+    If-None-Match get a 304 Not Modified. Tags are compared weakly (RFC 9110), so
+    the weak `W/` form that proxies compressing the body send back matches too.
     """
-    if faq_df.empty:
-        return []
-    faqs = [FAQ(**record) for record in faq_df.to_dict(orient='records')]
-    return faqs
+    headers = {"ETag": catalog.etag}
+    if if_none_match and (if_none_match.strip() == "*" or catalog.etag in [
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    ]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=catalog.list_body, media_type="application/json", headers=headers)
 
 @router.get("/faq/{faq_id}", response_model=FAQ, summary="Get a specific FAQ by ID")
-async def get_faq_by_id(faq_id: str, faq_df = Depends(get_faq_df)):
+async def get_faq_by_id(faq_id: str, catalog = Depends(get_catalog)):
     """
     Returns a single FAQ item by its unique ID.
     """
-    if faq_df.empty:
+    if catalog.is_empty:
         raise HTTPException(status_code=404, detail="FAQ data not available.")
         
-    faq_item = faq_df[faq_df['id'] == faq_id]
+    faq_item = catalog.by_id.get(faq_id)
     
-    if faq_item.empty:
+    if faq_item is None:
         raise HTTPException(status_code=404, detail=f"FAQ with id '{faq_id}' not found.")
         
-    return FAQ(**faq_item.to_dict(orient='records')[0])
+    return faq_item
+
+
+@router.post("/admin/reload", summary="Reload the FAQ knowledge base", dependencies=[Depends(verify_admin_token)])
+async def reload_faq(rag_service = Depends(get_rag_service)):
+    """
+    Reloads the FAQ file without restarting: only new or modified entries are
+    re-embedded and the new index is swapped in atomically. Only the worker process
+    that receives the request reloads; with several workers, use the file watcher
+    (FAQ_RELOAD_INTERVAL_SECONDS) or call it once per worker.
+    """
+    try:
+        return await run_in_threadpool(rag_service.reload)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Response
-from prometheus_client import Counter, Histogram, generate_latest
+from prometheus_client import Counter, Gauge, Histogram, generate_latest
 
 router = APIRouter()
 
 REQUEST_COUNT = Counter(
     'faq_requests_total',
     'Total number of requests',
-    ['endpoint', 'status']
+    ['endpoint', 'status', 'path']
 )
 
 RESPONSE_TIME = Histogram(
@@ -15,12 +15,123 @@ RESPONSE_TIME = Histogram(
     ['strategy']
 )
 
+TIME_TO_FIRST_TOKEN = Histogram(
+    'faq_time_to_first_token_seconds',
+    'Time between the request and the first streamed LLM token',
+    ['strategy']
+)
+
 CONFIDENCE_SCORE = Histogram(
     'faq_confidence_score',
     'Distribution of confidence scores',
     buckets=[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
 )
 
+PROMPT_TOKENS = Histogram(
+    'faq_prompt_tokens',
+    'Number of tokens in the prompt sent to the LLM',
+    buckets=[64, 128, 256, 512, 768, 1024, 1536, 2048, 3072, 4096]
+)
+
+GENERATED_TOKENS = Counter(
+    'faq_local_generated_tokens_total',
+    'Tokens generated by the local LLM backend'
+)
+
+GENERATION_THROUGHPUT = Gauge(
+    'faq_local_generation_tokens_per_second',
+    'Local LLM decoding throughput over the last decoding step'
+)
+
+GENERATION_QUEUE_DEPTH = Gauge(
+    'faq_local_generation_queue_depth',
+    'Requests waiting to join the local LLM decoding batch'
+)
+
+GENERATION_BATCH_OCCUPANCY = Histogram(
+    'faq_local_generation_batch_occupancy',
+    'Share of the local LLM decoding batch slots in use at each decoding step',
+    buckets=[0.125, 0.25, 0.375, 0.5, 0.625, 0.75, 0.875, 1.0]
+)
+
+LLM_RETRIES = Counter(
+    'faq_llm_retries_total',
+    'LLM calls retried after a transient error',
+    ['reason']
+)
+
+LLM_CIRCUIT_STATE = Gauge(
+    'faq_llm_circuit_state',
+    'LLM circuit breaker state (0 closed, 1 half-open, 2 open)'
+)
+
+LLM_CIRCUIT_REJECTIONS = Counter(
+    'faq_llm_circuit_rejections_total',
+    'LLM calls rejected because the circuit breaker was open'
+)
+
+EMBED_BATCH_SIZE = Histogram(
+    'faq_embed_batch_size',
+    'Number of queries encoded per micro-batch',
+    buckets=[1, 2, 4, 8, 16, 32, 64]
+)
+
+EMBED_QUEUE_WAIT = Histogram(
+    'faq_embed_queue_wait_seconds',
+    'Time a query waited in the micro-batcher before being encoded',
+    buckets=[0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1]
+)
+
+ANSWER_CACHE_HITS = Counter(
+    'faq_answer_cache_hits_total',
+    'Answers served from the answer cache',
+    ['tier']
+)
+
+ANSWER_CACHE_MISSES = Counter(
+    'faq_answer_cache_misses_total',
+    'Answer cache lookups that required a LLM call'
+)
+
+QUERY_EMBEDDING_CACHE_HITS = Counter(
+    'faq_query_embedding_cache_hits_total',
+    'Query embeddings served from the query embedding cache',
+    ['tier']
+)
+
+QUERY_EMBEDDING_CACHE_MISSES = Counter(
+    'faq_query_embedding_cache_misses_total',
+    'Query embedding cache lookups that required an encoder forward pass'
+)
+
+QUERY_EMBEDDING_CACHE_HIT_RATIO = Gauge(
+    'faq_query_embedding_cache_hit_ratio',
+    'Share of query embedding lookups served from the cache since startup'
+)
+
+QUERY_EMBEDDING_CACHE_BYTES = Gauge(
+    'faq_query_embedding_cache_bytes',
+    'Embedding data held in the local query embedding cache'
+)
+
+RERANK_TOTAL = Counter(
+    'faq_rerank_total',
+    'Retrievals by re-ranking outcome (reranked, skipped over the latency budget, error)',
+    ['outcome']
+)
+
+RERANK_LATENCY = Histogram(
+    'faq_rerank_latency_seconds',
+    'Duration of the cross-encoder re-ranking forward pass',
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.15, 0.25, 0.5, 1.0]
+)
+
+CATEGORY_ROUTING_TOTAL = Counter(
+    'faq_category_routing_total',
+    'Retrievals by origin of the category filter',
+    ['source']
+)
+
 @router.get("/metrics")
 async def get_metrics():
     """Endpoint for Prometheus."""
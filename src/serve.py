@@ -0,0 +1,121 @@
+"""
+Multi-worker launcher with preloading.
+
+`uvicorn --workers N` spawns fresh interpreters, so every worker loads its own
+embedding model, FAQ embeddings and index. Here the master process builds the
+RAG service once, then forks the workers: they share those pages copy-on-write
+and all accept connections on the same listening socket.
+
+    python -m src.serve --workers 4 --port 8000
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+
+import uvicorn
+
+from src.main import app
+from src.routes.api_router import build_rag_service
+
+logger = logging.getLogger("faq_api")
+
+
+def _bind(host, port):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock, args, rag_service):
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if args.threads:
+        import torch
+
+        torch.set_num_threads(args.threads)
+    if rag_service is not None:
+        rag_service.after_fork()
+    server = uvicorn.Server(uvicorn.Config(app, log_level=args.log_level))
+    server.run(sockets=[sock])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lance l'API avec plusieurs workers partageant les modèles préchargés.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=0, help="Threads torch par worker (0 : valeur par défaut).")
+    parser.add_argument("--no-preload", action="store_true", help="Chaque worker charge ses propres modèles.")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    rag_service = None
+    if not args.no_preload:
+        import torch
+
+        logger.info("Preloading the RAG service in the master process...")
+        # The master starts no thread before forking (they could hold a lock the workers
+        # inherit). That includes torch's intra-op pool: it computes on one thread here and
+        # each worker sizes its own pool.
+        args.threads = args.threads or torch.get_num_threads()
+        torch.set_num_threads(1)
+        rag_service = build_rag_service(background_threads=False)
+        # Moves the preloaded objects out of the GC generations, so collections in the
+        # workers do not write to (and un-share) their pages.
+        gc.collect()
+        gc.freeze()
+
+    sock = _bind(args.host, args.port)
+    workers = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                _run_worker(sock, args, rag_service)
+            except BaseException:
+                logger.exception(f"Worker {os.getpid()} failed.")
+                status = 1
+            finally:
+                os._exit(status)
+        workers.append(pid)
+    logger.info(f"Started {len(workers)} workers (pids {workers}) on {args.host}:{args.port}.")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    remaining, failed = set(workers), False
+    while remaining:
+        pid, status = os.wait()
+        if pid not in remaining:
+            continue
+        remaining.discard(pid)
+        exit_code = os.waitstatus_to_exitcode(status)
+        if exit_code != 0 and not stopping:
+            failed = True
+            logger.error(
+                f"Worker {pid} exited with status {exit_code}, {len(remaining)} of {len(workers)} workers left."
+            )
+    sock.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .text_utils import normalize_question
+from src.routes.metrics import ANSWER_CACHE_HITS, ANSWER_CACHE_MISSES
+
+
+class AnswerCache:
+    """
+    Two-tier LRU/TTL cache of generated answers.
+    Tier one is an exact match on the normalized question, tier two a near-duplicate
+    lookup on the question embedding (cosine similarity above `similarity_threshold`).
+    Entries are partitioned by `scope` (the category filter), so an answer retrieved
+    within one category is never served for another.
+    The cache is bound to a FAQ fingerprint and emptied whenever the FAQ data changes.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, similarity_threshold=0.95):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _to_vector(q_emb):
+        vector = np.atleast_2d(np.asarray(q_emb, dtype=np.float32))[0]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def bind(self, fingerprint):
+        """Binds the cache to a FAQ fingerprint, clearing it if the FAQ data changed."""
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._entries.clear()
+                self._fingerprint = fingerprint
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict_expired(self, now):
+        expired = [key for key, (_, _, expires_at) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, question, q_emb=None, scope=None):
+        """Returns the cached answer dict for `question`, or None."""
+        if self.max_entries <= 0:
+            return None
+
+        key = (scope, normalize_question(question))
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                ANSWER_CACHE_HITS.labels(tier="exact").inc()
+                return self._entries[key][0]
+
+            keys = [k for k in self._entries if k[0] == scope] if q_emb is not None else []
+            if keys:
+                vector = self._to_vector(q_emb)
+                matrix = np.stack([self._entries[k][1] for k in keys])
+                scores = matrix @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    self._entries.move_to_end(keys[best])
+                    ANSWER_CACHE_HITS.labels(tier="semantic").inc()
+                    return self._entries[keys[best]][0]
+
+        ANSWER_CACHE_MISSES.inc()
+        return None
+
+    def put(self, question, q_emb, result, scope=None, fingerprint=None):
+        """
+        Stores an answer dict, evicting the least recently used entry when full.
+        `fingerprint` is the FAQ fingerprint the answer was built from: the answer is
+        dropped if the cache has been bound to another one since (the FAQ was reloaded
+        while it was being generated).
+        """
+        if self.max_entries <= 0:
+            return
+
+        key = (scope, normalize_question(question))
+        with self._lock:
+            if fingerprint is not None and fingerprint != self._fingerprint:
+                return
+            self._entries[key] = (result, self._to_vector(q_emb), time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
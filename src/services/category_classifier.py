@@ -0,0 +1,52 @@
+import numpy as np
+import torch
+
+
+def _as_unit_rows(vectors):
+    if isinstance(vectors, torch.Tensor):
+        vectors = vectors.detach().cpu().numpy()
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class CategoryClassifier:
+    """
+    Nearest-centroid query classifier over the FAQ embeddings.
+    Each category is represented by the mean of its (unit) entry embeddings, so a
+    prediction reuses the query embedding and costs one small matrix product.
+    A category is only predicted when its centroid beats the runner-up by `min_margin`.
+    """
+
+    def __init__(self, min_margin=0.05):
+        self.min_margin = min_margin
+        self.labels = []
+        self._centroids = None
+
+    def fit(self, embeddings, categories):
+        """Computes one centroid per non-empty category."""
+        vectors = _as_unit_rows(embeddings)
+        categories = np.asarray(categories, dtype=object)
+        self.labels = sorted({c for c in categories if c})
+        if self.labels:
+            self._centroids = _as_unit_rows(
+                np.stack([vectors[categories == label].mean(axis=0) for label in self.labels])
+            )
+        return self
+
+    def predict(self, q_embs):
+        """Returns the predicted category of each query, or None when it is ambiguous."""
+        queries = _as_unit_rows(q_embs)
+        if len(self.labels) == 0:
+            return [None] * len(queries)
+        if len(self.labels) == 1:
+            return [self.labels[0]] * len(queries)
+
+        scores = queries @ self._centroids.T
+        top_two = np.argsort(-scores, axis=1)[:, :2]
+        predictions = []
+        for row, (best, second) in zip(scores, top_two):
+            confident = row[best] - row[second] >= self.min_margin
+            predictions.append(self.labels[best] if confident else None)
+        return predictions
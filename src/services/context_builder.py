@@ -0,0 +1,126 @@
+import logging
+from functools import lru_cache
+
+from .text_utils import normalize_question
+
+logger = logging.getLogger("faq_api")
+
+
+class ApproximateTokenCounter:
+    """Tokenizer-free estimate (about 4 characters per token for French text)."""
+
+    chars_per_token = 4
+
+    def count(self, text):
+        return -(-len(text) // self.chars_per_token)
+
+    def truncate(self, text, max_tokens):
+        max_chars = max_tokens * self.chars_per_token
+        if len(text) <= max_chars:
+            return text
+        cut = text[:max_chars]
+        if " " in cut:
+            cut = cut[:cut.rindex(" ")]
+        return cut.rstrip(" ,;:") + "…"
+
+
+class TokenizerTokenCounter:
+    """Exact counts with a Hugging Face tokenizer."""
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+
+    def count(self, text):
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def truncate(self, text, max_tokens):
+        token_ids = self.tokenizer.encode(text, add_special_tokens=False)
+        if len(token_ids) <= max_tokens:
+            return text
+        return self.tokenizer.decode(token_ids[:max_tokens]).rstrip(" ,;:") + "…"
+
+
+@lru_cache(maxsize=4)
+def get_token_counter(tokenizer_name=""):
+    """
+    Returns the token counter of `tokenizer_name` (a Hugging Face model id), or the
+    approximate counter when no name is given or the tokenizer cannot be loaded.
+    """
+    if not tokenizer_name:
+        return ApproximateTokenCounter()
+    try:
+        from transformers import AutoTokenizer
+
+        return TokenizerTokenCounter(AutoTokenizer.from_pretrained(tokenizer_name))
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer '{tokenizer_name}', token counts are approximate: {e}")
+        return ApproximateTokenCounter()
+
+
+def _word_set(text):
+    return set(normalize_question(text).split())
+
+
+class ContextBuilder:
+    """
+    Assembles the FAQ context of the prompt from ranked entries, within `max_tokens`:
+    entries scoring below `min_relative_score` times the best score are dropped,
+    answers overlapping an already selected one (word Jaccard >= `dedup_threshold`)
+    are skipped and answers longer than `max_answer_tokens` are truncated.
+    The best entry is always kept.
+    """
+
+    separator = "\n\n"
+
+    def __init__(self, token_counter, max_tokens=1024, max_answer_tokens=256,
+                 min_relative_score=0.0, dedup_threshold=0.8):
+        self.token_counter = token_counter
+        self.max_tokens = max_tokens
+        self.max_answer_tokens = max_answer_tokens
+        self.min_relative_score = min_relative_score
+        self.dedup_threshold = dedup_threshold
+
+    @staticmethod
+    def format_chunk(question, answer, category, keywords):
+        return f"- Catégorie: {category}\n  Mots-clés: {keywords}\n  Q: {question}\n  R: {answer}"
+
+    def _is_duplicate(self, words, selected_words):
+        for other in selected_words:
+            union = len(words | other)
+            if union and len(words & other) / union >= self.dedup_threshold:
+                return True
+        return False
+
+    def build(self, entries):
+        """
+        `entries` are (score, source, question, answer, category, keywords) tuples, best first.
+        Returns (context, sources) for the selected entries.
+        """
+        if not entries:
+            return "", []
+
+        best_score = entries[0][0]
+        separator_tokens = self.token_counter.count(self.separator)
+        chunks, sources, selected_words = [], [], []
+        used_tokens = 0
+        for score, source, question, answer, category, keywords in entries:
+            if chunks and self.min_relative_score and best_score > 0 and score < best_score * self.min_relative_score:
+                continue
+
+            words = _word_set(answer)
+            if chunks and self.dedup_threshold and self._is_duplicate(words, selected_words):
+                continue
+
+            if self.max_answer_tokens:
+                answer = self.token_counter.truncate(answer, self.max_answer_tokens)
+            chunk = self.format_chunk(question, answer, category, keywords)
+            chunk_tokens = self.token_counter.count(chunk) + (separator_tokens if chunks else 0)
+            if chunks and self.max_tokens and used_tokens + chunk_tokens > self.max_tokens:
+                continue
+
+            chunks.append(chunk)
+            sources.append(source)
+            selected_words.append(words)
+            used_tokens += chunk_tokens
+
+        return self.separator.join(chunks), sources
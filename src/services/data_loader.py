@@ -1,23 +1,116 @@
+import hashlib
 import json
-import pandas as pd
-from functools import lru_cache
+import logging
+import os
 
-@lru_cache(maxsize=None)
-def load_faq_data(path="data/faq-base.json"):
+from .faq_store import FAQStore
+from src.config.settings import FAQ_DATA_PATH, FAQ_JSON_PARSER, FAQ_STREAMING_MIN_MB
+from src.models import FAQ
+
+logger = logging.getLogger("faq_api")
+
+
+def _json_loads():
+    """`orjson.loads` when FAQ_JSON_PARSER allows it and orjson is installed, else `json.loads`."""
+    if FAQ_JSON_PARSER in ("auto", "orjson"):
+        try:
+            import orjson
+            return orjson.loads
+        except ImportError:
+            if FAQ_JSON_PARSER == "orjson":
+                logger.warning("FAQ_JSON_PARSER=orjson but orjson is not installed, using json.")
+    return json.loads
+
+
+def _iter_entries_streaming(path):
+    """Yields the FAQ entries one by one (ijson), without holding the whole document in memory."""
+    import ijson
+
+    with open(path, "rb") as f:
+        yield from ijson.items(f, "faq.item", use_float=True)
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _read_faq_data(path):
     """
-    Loads the FAQ data from the specified JSON file into a pandas DataFrame.
-    Uses caching to avoid reloading the file on subsequent calls.
+    Reads the FAQ JSON file into an immutable FAQStore (an empty one if the file is
+    missing or invalid). Files of FAQ_STREAMING_MIN_MB or more are parsed
+    incrementally when ijson is installed.
     """
     try:
+        if FAQ_STREAMING_MIN_MB and _file_size(path) >= FAQ_STREAMING_MIN_MB * 1024 * 1024:
+            try:
+                return FAQStore.from_dicts(_iter_entries_streaming(path))
+            except ImportError:
+                logger.warning("ijson is not installed, parsing the whole FAQ file at once.")
         with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        faq_df = pd.DataFrame(data["faq"])
-        if 'id' not in faq_df.columns:
-            raise ValueError("The FAQ data must contain an 'id' column.")
-        return faq_df
+            data = _json_loads()(f.read())
+        return FAQStore.from_dicts(data["faq"])
     except FileNotFoundError:
-        return pd.DataFrame()
-    except (json.JSONDecodeError, ValueError) as e:
-        # Log the error for debugging purposes if needed
-        # print(f"Error loading FAQ data: {e}")
-        return pd.DataFrame()
+        return FAQStore()
+    except (ValueError, KeyError, TypeError) as e:
+        # json.JSONDecodeError and orjson.JSONDecodeError are ValueErrors
+        logger.error(f"Invalid FAQ data in '{path}': {e}")
+        return FAQStore()
+
+
+_faq_cache = {}
+
+def load_faq_data(path=FAQ_DATA_PATH, reload=False):
+    """
+    Returns the FAQStore of the FAQ file `path`, read once and then served from cache.
+    With `reload=True` the file is read again and replaces the cached store only if it
+    holds entries; otherwise ValueError is raised and the previous store stays cached.
+    """
+    if not reload:
+        faq = _faq_cache.get(path)
+        if faq is None:
+            faq = _faq_cache.setdefault(path, _read_faq_data(path))
+        return faq
+
+    faq = _read_faq_data(path)
+    if faq.empty:
+        raise ValueError("FAQ data is empty or could not be loaded.")
+    _faq_cache[path] = faq
+    return faq
+
+load_faq_data.cache_clear = _faq_cache.clear
+
+
+class FAQCatalog:
+    """
+    Read-only view of the FAQ served by the API: an id -> FAQ index for O(1) lookups
+    and the pre-serialized JSON body of the full list with its ETag.
+    """
+
+    def __init__(self, faq):
+        faqs = [FAQ(**record.to_dict()) for record in faq]
+        self.is_empty = faq.empty
+        self.by_id = {faq.id: faq for faq in faqs}
+        self.list_body = json.dumps(
+            [faq.model_dump() for faq in faqs],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        self.etag = f'"{hashlib.sha256(self.list_body).hexdigest()[:32]}"'
+
+
+_catalog_cache = (None, None)
+
+def get_faq_catalog(faq):
+    """
+    Returns the FAQCatalog of the FAQStore `faq`, rebuilt only when the store changes
+    (i.e. when `load_faq_data` is reloaded).
+    """
+    global _catalog_cache
+    cached_faq, catalog = _catalog_cache
+    if cached_faq is not faq:
+        catalog = FAQCatalog(faq)
+        _catalog_cache = (faq, catalog)
+    return catalog
@@ -0,0 +1,94 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+from src.routes.metrics import EMBED_BATCH_SIZE, EMBED_QUEUE_WAIT
+
+logger = logging.getLogger("faq_api")
+
+
+class QueryEmbeddingBatcher:
+    """
+    Collects concurrent query embedding requests for up to `window_ms` milliseconds
+    (or `max_batch_size` queries), encodes them with a single `encode_fn(list_of_texts)`
+    call and hands each row back to its waiting caller.
+    """
+
+    def __init__(self, encode_fn, max_batch_size=32, window_ms=2.0):
+        self._encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        """Queues a query and returns a Future resolved with its embedding."""
+        future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def embed(self, text):
+        """Blocking helper: waits for the embedding of `text`."""
+        return self.submit(text).result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None, True
+
+        batch = [first]
+        deadline = time.perf_counter() + self.window_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    @staticmethod
+    def _resolve(future, result=None, exception=None):
+        # A future resolved elsewhere must not stop the batcher thread.
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            # Callers that gave up (e.g. a cancelled request) are dropped; the others
+            # can no longer be cancelled once their query is being encoded.
+            batch = [item for item in batch or () if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            now = time.perf_counter()
+            for _, _, enqueued_at in batch:
+                EMBED_QUEUE_WAIT.observe(now - enqueued_at)
+            EMBED_BATCH_SIZE.observe(len(batch))
+
+            try:
+                embeddings = self._encode_fn([text for text, _, _ in batch])
+            except Exception as e:
+                logger.error(f"Batched query encoding failed: {e}", exc_info=True)
+                for _, future, _ in batch:
+                    self._resolve(future, exception=e)
+                continue
+
+            for i, (_, future, _) in enumerate(batch):
+                self._resolve(future, embeddings[i])
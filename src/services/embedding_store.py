@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import os
+import re
+
+import numpy as np
+
+from .file_utils import atomic_write, remove_quietly, unique_tag
+
+logger = logging.getLogger("faq_api")
+
+
+def content_hash(text):
+    """Returns a stable SHA-256 hash of a corpus entry."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Persistent embedding cache for the FAQ corpus.
+    Vectors are stored in a memory-mapped .npy file next to a JSON manifest holding
+    the model name, the content hash of each row and the name of the vectors file,
+    so only new or modified entries need to be encoded again.
+    """
+
+    def __init__(self, cache_dir, model_name):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self._slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.manifest_path = os.path.join(cache_dir, f"{self._slug}.manifest.json")
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def load(self):
+        """
+        Loads the cached hashes and vectors (memory-mapped, copy-on-write).
+        Returns (hashes, vectors) or (None, None) when the cache is missing or inconsistent.
+        """
+        manifest = self._read_manifest()
+        if manifest is None or "vectors" not in manifest:
+            return None, None
+        try:
+            vectors = np.load(os.path.join(self.cache_dir, manifest["vectors"]), mmap_mode="c")
+        except (ValueError, OSError):
+            return None, None
+
+        hashes = manifest.get("hashes", [])
+        if (
+            manifest.get("model") != self.model_name
+            or vectors.ndim != 2
+            or len(hashes) != vectors.shape[0]
+            or manifest.get("dim") != vectors.shape[1]
+        ):
+            logger.warning(f"Ignoring inconsistent embedding cache at '{self.manifest_path}'.")
+            return None, None
+        return hashes, vectors
+
+    def save(self, hashes, vectors):
+        """
+        Writes the vectors to a new file, then replaces the manifest that points to it,
+        so readers see either the previous cache or the new one, never a mix.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        previous = self._read_manifest() or {}
+
+        vectors_file = f"{self._slug}.{unique_tag()}.npy"
+        with atomic_write(os.path.join(self.cache_dir, vectors_file)) as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+        with atomic_write(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "model": self.model_name,
+                    "dim": int(vectors.shape[1]),
+                    "hashes": list(hashes),
+                    "vectors": vectors_file,
+                },
+                f,
+            )
+        if previous.get("vectors") not in (None, vectors_file):
+            remove_quietly(os.path.join(self.cache_dir, previous["vectors"]))
+
+    def get_or_encode(self, corpus, encode_fn):
+        """
+        Returns the embeddings of `corpus` as a float32 matrix.
+        Entries whose hash is already in the cache are reused, the others are encoded
+        with `encode_fn(list_of_texts)` and the cache is rewritten.
+        """
+        hashes = [content_hash(text) for text in corpus]
+        cached_hashes, cached_vectors = self.load()
+
+        if cached_hashes == hashes:
+            logger.info(f"Loaded {len(hashes)} FAQ embeddings from cache '{self.manifest_path}'.")
+            return cached_vectors
+
+        cached_rows = {h: i for i, h in enumerate(cached_hashes or [])}
+        missing = [i for i, h in enumerate(hashes) if h not in cached_rows]
+
+        new_vectors = None
+        if missing:
+            new_vectors = np.asarray(encode_fn([corpus[i] for i in missing]), dtype=np.float32)
+
+        dim = new_vectors.shape[1] if new_vectors is not None else cached_vectors.shape[1]
+        vectors = np.empty((len(corpus), dim), dtype=np.float32)
+        for i, h in enumerate(hashes):
+            if h in cached_rows:
+                vectors[i] = cached_vectors[cached_rows[h]]
+        if missing:
+            vectors[missing] = new_vectors
+
+        logger.info(
+            f"Encoded {len(missing)} of {len(corpus)} FAQ entries, "
+            f"reused {len(corpus) - len(missing)} from cache."
+        )
+        self.save(hashes, vectors)
+        # Serve the memory-mapped copy; if another process replaced the cache meanwhile,
+        # the vectors computed here are still the right ones.
+        saved_hashes, saved_vectors = self.load()
+        return saved_vectors if saved_hashes == hashes else vectors
@@ -0,0 +1,2 @@
+class GenerationOverloaded(RuntimeError):
+    """Raised when a generation backend cannot accept more requests."""
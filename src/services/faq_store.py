@@ -0,0 +1,103 @@
+from typing import NamedTuple
+
+RECORD_FIELDS = ("id", "question", "answer", "category", "keywords")
+_FIELD_SET = frozenset(RECORD_FIELDS)
+
+
+class FAQRecord(NamedTuple):
+    """
+    One FAQ entry (an immutable tuple, cheap to build and to keep for large FAQs).
+    Fields not used by the service (theme, tags...) are kept in `extra`.
+    """
+    id: str
+    question: str = ""
+    answer: str = ""
+    category: str = ""
+    keywords: tuple = ()
+    extra: tuple = ()  # (key, value) pairs
+
+    @classmethod
+    def from_dict(cls, entry):
+        if "id" not in entry:
+            raise ValueError("Every FAQ entry must have an 'id'.")
+        keywords = entry.get("keywords")
+        if keywords is None:
+            keywords = ()
+        elif isinstance(keywords, (list, tuple)):
+            keywords = tuple(keywords)
+        else:
+            keywords = (keywords,)
+        extra = () if entry.keys() <= _FIELD_SET else tuple(
+            (k, v) for k, v in entry.items() if k not in _FIELD_SET
+        )
+        return cls(
+            entry["id"],
+            entry.get("question") or "",
+            entry.get("answer") or "",
+            entry.get("category") or "",
+            keywords,
+            extra,
+        )
+
+    def to_dict(self):
+        entry = {
+            "id": self.id,
+            "question": self.question,
+            "answer": self.answer,
+            "category": self.category,
+            "keywords": list(self.keywords),
+        }
+        entry.update(self.extra)
+        return entry
+
+
+class FAQStore:
+    """
+    Immutable, ordered collection of FAQ records with an id index. Columns are read
+    with `column(name)`; a pandas DataFrame is only built (once) when analysis code
+    calls `to_dataframe()`.
+    """
+
+    __slots__ = ("records", "by_id", "_dataframe")
+
+    def __init__(self, records=()):
+        self.records = tuple(records)
+        self.by_id = {record.id: record for record in self.records}
+        self._dataframe = None
+
+    @classmethod
+    def from_dicts(cls, entries):
+        """Builds the store from FAQ entries (dicts); raises ValueError if one has no id."""
+        return cls(FAQRecord.from_dict(entry) for entry in entries)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, position):
+        return self.records[position]
+
+    @property
+    def empty(self):
+        return not self.records
+
+    def get(self, faq_id):
+        return self.by_id.get(faq_id)
+
+    def column(self, name):
+        """Values of one record field, in order ("id", "question", "answer", "category", "keywords")."""
+        if name not in _FIELD_SET:
+            raise KeyError(f"Unknown FAQ column '{name}'.")
+        return [getattr(record, name) for record in self.records]
+
+    def to_dicts(self):
+        return [record.to_dict() for record in self.records]
+
+    def to_dataframe(self):
+        if self._dataframe is None:
+            import pandas as pd
+
+            self._dataframe = pd.DataFrame(self.to_dicts())
+        return self._dataframe
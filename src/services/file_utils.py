@@ -0,0 +1,39 @@
+import os
+import threading
+import uuid
+from contextlib import contextmanager, suppress
+
+
+def unique_tag():
+    """Short random tag for file names that must not collide between writers."""
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    Yields a temporary path to write instead of `path`; on success it is renamed over
+    `path`, so readers never see a partial file. On error the temporary file is removed.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def atomic_write(path, mode="wb", **open_kwargs):
+    """Like `atomic_path`, with the temporary file opened (`open(..., mode, **open_kwargs)`)."""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode, **open_kwargs) as f:
+            yield f
+
+
+def remove_quietly(path):
+    """Deletes `path` if possible (it may be gone already, or still open on some platforms)."""
+    with suppress(OSError):
+        os.remove(path)
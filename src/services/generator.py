@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+
+
+class Generator(ABC):
+    """Chat completion backend. `params` are the GENERATION_PARAMS (max_tokens, temperature, top_p)."""
+
+    @abstractmethod
+    def generate(self, messages, **params):
+        """Returns the generated answer text."""
+
+    @abstractmethod
+    async def agenerate(self, messages, **params):
+        """Async variant of `generate`."""
+
+    @abstractmethod
+    def astream(self, messages, **params):
+        """Async iterator over the generated text chunks."""
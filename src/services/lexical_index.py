@@ -0,0 +1,113 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from .text_utils import strip_accents
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+
+FRENCH_STOPWORDS = frozenset("""
+a ai au aux avec ce ces cet cette c d dans de des du elle en est et etre eux il ils
+j je l la le les leur leurs lui m ma mais me mes moi mon n ne nos notre nous on ou
+par pas pour qu que quel quelle quels quelles qui quoi s sa sans se ses son sont sur
+t ta te tes toi ton tu un une vos votre vous y comment faire faut peut puis dois doit
+""".split())
+
+
+def _stem(token):
+    """Very light French stemming: drops the plural 's' of longer words (dechets -> dechet)."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us")):
+        return token[:-1]
+    return token
+
+
+def tokenize_fr(text):
+    """
+    French-aware tokenization for BM25: lowercase, no accents, elisions split
+    (l'acte -> acte), stopwords removed, light plural stemming.
+    Compound tokens such as 'service-public.fr' are kept whole and also split into parts.
+    """
+    text = strip_accents(str(text).lower()).replace("’", "'")
+    tokens = []
+    for match in _TOKEN_RE.findall(text.replace("'", " ")):
+        parts = re.split(r"[.\-]", match)
+        if len(parts) > 1:
+            tokens.append(match)
+        for part in parts:
+            if part and part not in FRENCH_STOPWORDS:
+                tokens.append(_stem(part))
+    return tokens
+
+
+class BM25Index:
+    """In-process Okapi BM25 inverted index."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+
+    def __len__(self):
+        return self.size
+
+    def build(self, documents):
+        """Indexes a list of texts (one per FAQ entry)."""
+        tokenized = [tokenize_fr(doc) for doc in documents]
+        self.size = len(tokenized)
+        doc_lengths = np.array([len(tokens) for tokens in tokenized], dtype=np.float32)
+        avg_length = doc_lengths.mean() if self.size else 0.0
+
+        postings = defaultdict(list)
+        for doc_id, tokens in enumerate(tokenized):
+            for term, tf in Counter(tokens).items():
+                postings[term].append((doc_id, tf))
+
+        # Precompute the BM25 weight of each (term, document) pair.
+        norm = self.k1 * (1 - self.b + self.b * doc_lengths / max(avg_length, 1e-9))
+        self._postings = {}
+        for term, entries in postings.items():
+            doc_ids = np.array([doc_id for doc_id, _ in entries], dtype=np.int64)
+            tfs = np.array([tf for _, tf in entries], dtype=np.float32)
+            idf = math.log(1 + (self.size - len(entries) + 0.5) / (len(entries) + 0.5))
+            weights = idf * tfs * (self.k1 + 1) / (tfs + norm[doc_ids])
+            self._postings[term] = (doc_ids, weights.astype(np.float32))
+        return self
+
+    def scores(self, query):
+        """BM25 score of every document for `query`."""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in tokenize_fr(query):
+            if term in self._postings:
+                doc_ids, weights = self._postings[term]
+                scores[doc_ids] += weights
+        return scores
+
+    def search(self, query, k, positions=None):
+        """
+        Returns (scores, indices) of the `k` best documents with a non-zero score,
+        optionally restricted to the documents at `positions`.
+        """
+        scores = self.scores(query)
+        if positions is None:
+            positions = np.arange(self.size)
+        else:
+            scores = scores[positions]
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return np.array([], dtype=np.float32), np.array([], dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return scores[top], positions[top]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuses several rankings (lists of document indices, best first) with
+    reciprocal rank fusion. Returns the fused list of indices, best first.
+    """
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[int(doc_id)] += 1.0 / (k + rank + 1)
+    return sorted(fused, key=lambda doc_id: -fused[doc_id])
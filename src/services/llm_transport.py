@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from src.config.settings import (
+    LLM_BREAKER_FAILURE_THRESHOLD,
+    LLM_BREAKER_RESET_SECONDS,
+    LLM_DEADLINE_SECONDS,
+    LLM_MAX_RETRIES,
+    LLM_POOL_KEEPALIVE_EXPIRY_SECONDS,
+    LLM_POOL_MAX_CONNECTIONS,
+    LLM_POOL_MAX_KEEPALIVE,
+    LLM_RETRY_BASE_DELAY_SECONDS,
+    LLM_RETRY_MAX_DELAY_SECONDS,
+)
+from src.routes.metrics import LLM_CIRCUIT_REJECTIONS, LLM_CIRCUIT_STATE, LLM_RETRIES
+
+logger = logging.getLogger("faq_api")
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LLMUnavailable(RuntimeError):
+    """The LLM provider cannot be used right now (circuit open, or transient errors until the deadline)."""
+
+
+_http_pool_lock = threading.Lock()
+_http_pool_configured = False
+
+
+def _close_async_client(client):
+    """Closes an unused AsyncClient from sync code, even on a thread running an event loop."""
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(asyncio.run, client.aclose()).result()
+
+
+def configure_http_pool():
+    """
+    Gives the shared Hugging Face HTTP clients a tuned keep-alive connection pool.
+    Runs once per process, before the first Hub request: replacing the client factory
+    closes the library's shared client, which would break a request in flight. The
+    clients keep the event hooks (headers, error handling), redirects and timeout of
+    the library's default clients; LLM calls set their own timeout (InferenceClient
+    `timeout`).
+    """
+    global _http_pool_configured
+    with _http_pool_lock:
+        if _http_pool_configured:
+            return
+        _http_pool_configured = True
+
+        from huggingface_hub import get_async_session, get_session, set_async_client_factory, set_client_factory
+
+        limits = httpx.Limits(
+            max_connections=LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_POOL_KEEPALIVE_EXPIRY_SECONDS,
+        )
+        default = get_session()
+        default_async = get_async_session()  # a new client on every call: only read, then closed
+        _close_async_client(default_async)
+        set_client_factory(lambda: httpx.Client(
+            limits=limits,
+            event_hooks=default.event_hooks,
+            follow_redirects=default.follow_redirects,
+            timeout=default.timeout,
+        ))
+        set_async_client_factory(lambda: httpx.AsyncClient(
+            limits=limits,
+            event_hooks=default_async.event_hooks,
+            follow_redirects=default_async.follow_redirects,
+            timeout=default_async.timeout,
+        ))
+
+
+def retry_reason(error):
+    """Returns a short label if `error` is transient and worth retrying, else None."""
+    if isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    if isinstance(error, (httpx.NetworkError, httpx.RemoteProtocolError)):
+        return "network"
+    response = getattr(error, "response", None)
+    status_code = getattr(response, "status_code", None)
+    if status_code in RETRYABLE_STATUS_CODES:
+        return str(status_code)
+    return None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. After `failure_threshold` transient failures in
+    a row the circuit opens and calls are rejected for `reset_seconds`; then one trial
+    call is let through (half-open), which closes the circuit again if it succeeds.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        LLM_CIRCUIT_STATE.set(self.CLOSED)
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                LLM_CIRCUIT_STATE.set(self.HALF_OPEN)
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+            LLM_CIRCUIT_STATE.set(self.CLOSED)
+
+    def release_trial(self):
+        """Gives the half-open trial back when it ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    logger.warning(f"LLM circuit breaker opened after {self._failures} consecutive failures.")
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+                LLM_CIRCUIT_STATE.set(self.OPEN)
+
+
+class ResilientTransport:
+    """
+    Runs LLM calls under a deadline, with retries and jittered exponential backoff on
+    transient errors (timeouts, network errors, 429/5xx), behind a circuit breaker.
+    Raises `LLMUnavailable` when the circuit is open or the transient errors persist;
+    any other error is raised as is.
+    """
+
+    def __init__(self, max_retries=LLM_MAX_RETRIES, base_delay=LLM_RETRY_BASE_DELAY_SECONDS,
+                 max_delay=LLM_RETRY_MAX_DELAY_SECONDS, deadline_seconds=LLM_DEADLINE_SECONDS, breaker=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline_seconds = deadline_seconds
+        self.breaker = breaker or CircuitBreaker(LLM_BREAKER_FAILURE_THRESHOLD, LLM_BREAKER_RESET_SECONDS)
+
+    def _backoff(self, attempt, error):
+        """Full jitter, or the server's Retry-After when it sends one."""
+        retry_after = getattr(getattr(error, "response", None), "headers", {}).get("retry-after")
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _check_circuit(self):
+        if not self.breaker.allow():
+            LLM_CIRCUIT_REJECTIONS.inc()
+            raise LLMUnavailable("LLM circuit breaker is open.")
+
+    def _on_error(self, error, attempt, deadline):
+        """Records the failure and returns the delay before the next attempt, or raises."""
+        reason = retry_reason(error)
+        if reason is None:
+            # The provider answered (e.g. 400): it is reachable, only this call is wrong.
+            self.breaker.record_success()
+            raise error
+        self.breaker.record_failure()
+        delay = self._backoff(attempt, error)
+        if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+            raise LLMUnavailable(f"LLM call failed after {attempt + 1} attempt(s): {error}") from error
+        LLM_RETRIES.labels(reason=reason).inc()
+        logger.warning(f"LLM call failed ({reason}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s.")
+        return delay
+
+    def call(self, fn):
+        deadline = time.monotonic() + self.deadline_seconds
+        for attempt in range(self.max_retries + 1):
+            self._check_circuit()
+            try:
+                result = fn()
+            except Exception as e:
+                time.sleep(self._on_error(e, attempt, deadline))
+                continue
+            except BaseException:
+                self.breaker.release_trial()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def acall(self, coro_fn):
+        deadline = time.monotonic() + self.deadline_seconds
+        for attempt in range(self.max_retries + 1):
+            self._check_circuit()
+            try:
+                result = await asyncio.wait_for(coro_fn(), timeout=max(deadline - time.monotonic(), 0.001))
+            except Exception as e:
+                await asyncio.sleep(self._on_error(e, attempt, deadline))
+                continue
+            except BaseException:
+                # Cancelled (client disconnect, caller timeout): no verdict on the provider.
+                self.breaker.release_trial()
+                raise
+            self.breaker.record_success()
+            return result
@@ -0,0 +1,335 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import torch
+import torch.nn.functional as F
+
+from .errors import GenerationOverloaded
+from .generator import Generator
+from src.config.settings import (
+    LOCAL_LLM_MAX_BATCH_SIZE,
+    LOCAL_LLM_MODEL,
+    LOCAL_LLM_QUANTIZATION,
+    LOCAL_LLM_QUEUE_SIZE,
+    LOCAL_LLM_THREADS,
+)
+from src.routes.metrics import (
+    GENERATED_TOKENS,
+    GENERATION_BATCH_OCCUPANCY,
+    GENERATION_QUEUE_DEPTH,
+    GENERATION_THROUGHPUT,
+)
+
+logger = logging.getLogger("faq_api")
+
+
+@dataclass
+class _GenerationJob:
+    messages: list
+    max_tokens: int
+    temperature: float
+    top_p: float
+    on_text: object = None
+    future: Future = field(default_factory=Future)
+    cancelled: bool = False
+
+    def cancel(self):
+        """The consumer is gone: dropped if still queued, removed from the batch at the next step otherwise."""
+        self.cancelled = True
+        self.future.cancel()
+
+
+@dataclass
+class _Sequence:
+    job: _GenerationJob
+    token_ids: list = field(default_factory=list)
+    emitted: int = 0
+    done: bool = False
+
+
+def _sample(logits, temperature, top_p):
+    """Greedy when temperature <= 0, otherwise temperature + nucleus sampling."""
+    if temperature <= 0:
+        return int(torch.argmax(logits))
+    probs = torch.softmax(logits.float() / temperature, dim=-1)
+    if top_p < 1.0:
+        sorted_probs, sorted_ids = torch.sort(probs, descending=True)
+        outside = torch.cumsum(sorted_probs, dim=-1) - sorted_probs > top_p
+        sorted_probs[outside] = 0.0
+        probs = torch.zeros_like(probs).scatter(-1, sorted_ids, sorted_probs)
+    return int(torch.multinomial(probs / probs.sum(), 1))
+
+
+def _cache_layers(cache):
+    return [(layer.keys, layer.values) for layer in cache.layers]
+
+
+class GenerationScheduler:
+    """
+    Continuous batching for a causal LM. Concurrent requests share one decoding batch:
+    at every step each active sequence advances by one token in a single forward pass,
+    finished sequences leave the batch and queued ones are admitted (prefilled, then
+    merged into the left-padded KV cache) without waiting for the others to finish.
+    """
+
+    def __init__(self, model, tokenizer, max_batch_size=8, max_queue_size=64):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+
+        eos = getattr(getattr(model, "generation_config", None), "eos_token_id", None)
+        if eos is None:
+            eos = tokenizer.eos_token_id
+        self._eos_ids = set(eos if isinstance(eos, (list, tuple)) else [eos]) - {None}
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._active = []
+        self._layers = None  # per layer (keys, values), shape (batch, heads, length, head_dim)
+        self._mask = None  # (batch, length), 0 on the left padding
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="local-llm", daemon=True)
+        self._thread.start()
+
+    def submit(self, job):
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise GenerationOverloaded("Local generation queue is full.")
+        GENERATION_QUEUE_DEPTH.set(self._queue.qsize())
+        return job.future
+
+    def close(self):
+        """Stops the scheduler once the sequences already admitted are finished."""
+        self._queue.put(None)
+
+    def _run(self):
+        while not (self._closed and not self._active):
+            if not self._active:
+                self._admit(self._queue.get())
+            while not self._closed and len(self._active) < self.max_batch_size:
+                try:
+                    self._admit(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            GENERATION_QUEUE_DEPTH.set(self._queue.qsize())
+            self._retire()  # frees the slots of cancelled sequences before decoding
+            if self._active:
+                self._step()
+
+    @torch.inference_mode()
+    def _admit(self, job):
+        if job is None:
+            self._closed = True
+            return
+        if job.cancelled or not job.future.set_running_or_notify_cancel():
+            return
+        try:
+            input_ids = self.tokenizer.apply_chat_template(
+                job.messages, add_generation_prompt=True, return_tensors="pt", return_dict=True
+            )["input_ids"]
+            output = self.model(input_ids=input_ids, use_cache=True)
+            token = _sample(output.logits[0, -1], job.temperature, job.top_p)
+        except Exception as e:
+            job.future.set_exception(e)
+            return
+
+        self._merge(_cache_layers(output.past_key_values), torch.ones_like(input_ids))
+        sequence = _Sequence(job)
+        self._active.append(sequence)
+        self._append(sequence, token)
+        self._retire()
+
+    def _merge(self, layers, mask):
+        """Adds prefilled sequences to the batch, left-padding whichever cache is shorter."""
+        if self._layers is None:
+            self._layers, self._mask = layers, mask
+            return
+        length = max(self._mask.shape[1], mask.shape[1])
+
+        def pad(tensor, dim_from_end):
+            missing = length - tensor.shape[-dim_from_end]
+            if missing == 0:
+                return tensor
+            return F.pad(tensor, (0, 0) * (dim_from_end - 1) + (missing, 0))
+
+        self._layers = [
+            (torch.cat([pad(k, 2), pad(new_k, 2)]), torch.cat([pad(v, 2), pad(new_v, 2)]))
+            for (k, v), (new_k, new_v) in zip(self._layers, layers)
+        ]
+        self._mask = torch.cat([pad(self._mask, 1), pad(mask, 1)])
+
+    @torch.inference_mode()
+    def _step(self):
+        from transformers import DynamicCache
+
+        start = time.perf_counter()
+        batch_size = len(self._active)
+        GENERATION_BATCH_OCCUPANCY.observe(batch_size / self.max_batch_size)
+        try:
+            input_ids = torch.tensor([[sequence.token_ids[-1]] for sequence in self._active])
+            self._mask = torch.cat([self._mask, torch.ones((batch_size, 1), dtype=self._mask.dtype)], dim=1)
+            output = self.model(
+                input_ids=input_ids,
+                attention_mask=self._mask,
+                position_ids=self._mask.sum(dim=1, keepdim=True) - 1,
+                past_key_values=DynamicCache(ddp_cache_data=self._layers),
+                use_cache=True,
+            )
+            self._layers = _cache_layers(output.past_key_values)
+            for row, sequence in enumerate(self._active):
+                job = sequence.job
+                self._append(sequence, _sample(output.logits[row, -1], job.temperature, job.top_p))
+        except Exception as e:
+            logger.error(f"Local generation step failed: {e}", exc_info=True)
+            for sequence in self._active:
+                sequence.job.future.set_exception(e)
+            self._active, self._layers, self._mask = [], None, None
+            return
+
+        GENERATION_THROUGHPUT.set(batch_size / (time.perf_counter() - start))
+        self._retire()
+
+    def _append(self, sequence, token):
+        GENERATED_TOKENS.inc()
+        if token in self._eos_ids:
+            sequence.done = True
+            return
+        sequence.token_ids.append(token)
+        if len(sequence.token_ids) >= sequence.job.max_tokens:
+            sequence.done = True
+        if sequence.job.on_text is not None:
+            text = self.tokenizer.decode(sequence.token_ids, skip_special_tokens=True)
+            # Hold back incomplete multi-byte characters until the next token completes them.
+            if len(text) > sequence.emitted and not text.endswith("�"):
+                sequence.job.on_text(text[sequence.emitted:])
+                sequence.emitted = len(text)
+
+    def _retire(self):
+        """
+        Resolves finished sequences and removes their rows (and unused padding) from the
+        batch, along with the sequences whose consumer cancelled them.
+        """
+        keep = [row for row, sequence in enumerate(self._active) if not (sequence.done or sequence.job.cancelled)]
+        if len(keep) == len(self._active):
+            return
+        for sequence in self._active:
+            if sequence.job.cancelled:
+                sequence.job.future.set_exception(CancelledError())
+            elif sequence.done:
+                sequence.job.future.set_result(self.tokenizer.decode(sequence.token_ids, skip_special_tokens=True))
+        self._active = [self._active[row] for row in keep]
+        if not keep:
+            self._layers, self._mask = None, None
+            return
+
+        rows = torch.tensor(keep)
+        mask = self._mask[rows]
+        start = int(mask.any(dim=0).nonzero()[0])
+        self._mask = mask[:, start:]
+        self._layers = [(k[rows, :, start:], v[rows, :, start:]) for k, v in self._layers]
+
+
+class LocalGenerator(Generator):
+    """
+    In-process chat generation with a small instruct model on CPU (transformers).
+    The model is loaded once; requests wait in a bounded queue (`GenerationOverloaded`
+    is raised when it is full) and are decoded by a `GenerationScheduler`, whose thread
+    starts with the first request (or in `after_fork`), so a process that preloads the
+    model and forks workers has no generation thread at fork time.
+    `quantization="int8"` applies PyTorch dynamic quantization to the linear layers.
+    """
+
+    def __init__(self, model_id=LOCAL_LLM_MODEL, quantization=LOCAL_LLM_QUANTIZATION,
+                 max_queue_size=LOCAL_LLM_QUEUE_SIZE, max_batch_size=LOCAL_LLM_MAX_BATCH_SIZE,
+                 num_threads=LOCAL_LLM_THREADS):
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        self.model_id = model_id
+        self.num_threads = num_threads
+
+        logger.info(f"Loading local LLM '{model_id}'...")
+        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
+        model = AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.float32)
+        model.eval()
+        if quantization == "int8":
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        elif quantization:
+            raise ValueError(f"Unknown local LLM quantization '{quantization}'. Expected 'int8' or ''.")
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_queue_size = max_queue_size
+        self._scheduler = None
+        self._scheduler_lock = threading.Lock()
+
+    def _start_scheduler(self):
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        self._scheduler = GenerationScheduler(
+            self.model, self.tokenizer, max_batch_size=self.max_batch_size, max_queue_size=self.max_queue_size
+        )
+
+    def after_fork(self):
+        """The scheduler thread does not survive `os.fork`: starts a new one, the model stays shared."""
+        self._start_scheduler()
+
+    def _get_scheduler(self):
+        if self._scheduler is None:
+            with self._scheduler_lock:
+                if self._scheduler is None:
+                    self._start_scheduler()
+        return self._scheduler
+
+    def _submit_job(self, messages, max_tokens=512, temperature=0.3, top_p=0.9, on_text=None):
+        job = _GenerationJob(messages, max_tokens, temperature, top_p, on_text)
+        self._get_scheduler().submit(job)
+        return job
+
+    def submit(self, messages, max_tokens=512, temperature=0.3, top_p=0.9, on_text=None):
+        """Queues a generation and returns a Future of the generated text."""
+        return self._submit_job(messages, max_tokens, temperature, top_p, on_text).future
+
+    def close(self):
+        if self._scheduler is not None:
+            self._scheduler.close()
+
+    def generate(self, messages, **params):
+        return self.submit(messages, **params).result()
+
+    async def agenerate(self, messages, **params):
+        job = self._submit_job(messages, **params)
+        try:
+            return await asyncio.wrap_future(job.future)
+        except asyncio.CancelledError:
+            job.cancel()
+            raise
+
+    async def astream(self, messages, **params):
+        loop = asyncio.get_running_loop()
+        texts = asyncio.Queue()
+        job = self._submit_job(
+            messages, on_text=lambda text: loop.call_soon_threadsafe(texts.put_nowait, text), **params
+        )
+        job.future.add_done_callback(lambda _: loop.call_soon_threadsafe(texts.put_nowait, None))
+        try:
+            while True:
+                text = await texts.get()
+                if text is None:
+                    break
+                yield text
+        finally:
+            # The client disconnected or the consumer closed the stream early.
+            if not job.future.done():
+                job.cancel()
+        job.future.result()
+
+
+@lru_cache(maxsize=1)
+def get_local_generator():
+    """The local model is loaded once per worker process."""
+    return LocalGenerator()
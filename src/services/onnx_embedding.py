@@ -0,0 +1,49 @@
+import logging
+import os
+
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+logger = logging.getLogger("faq_api")
+
+QUANTIZATION_CONFIGS = ("arm64", "avx2", "avx512", "avx512_vnni")
+
+
+def onnx_file_name(quantization=""):
+    """File of the exported model inside the export directory."""
+    return f"onnx/model_qint8_{quantization}.onnx" if quantization else "onnx/model.onnx"
+
+
+def _model_kwargs(num_threads):
+    import onnxruntime
+
+    session_options = onnxruntime.SessionOptions()
+    if num_threads:
+        session_options.intra_op_num_threads = num_threads
+        session_options.inter_op_num_threads = 1
+    return {"provider": "CPUExecutionProvider", "session_options": session_options}
+
+
+def load_onnx_embedding_model(model_name, quantization="", num_threads=0, export_dir="models/onnx"):
+    """
+    Returns `model_name` as a SentenceTransformer running on ONNX Runtime (CPU).
+    The model is exported to ONNX once into `export_dir` and, with `quantization`
+    (an int8 dynamic quantization config: "avx2", "avx512", "avx512_vnni" or "arm64"),
+    quantized there too; later starts load the exported file directly.
+    `num_threads` sets the intra-op threads of the session (0: ONNX Runtime default).
+    """
+    if quantization and quantization not in QUANTIZATION_CONFIGS:
+        raise ValueError(f"Unknown ONNX quantization '{quantization}'. Expected one of {QUANTIZATION_CONFIGS} or ''.")
+
+    local_dir = os.path.join(export_dir, model_name.replace("/", "__"))
+    file_name = onnx_file_name(quantization)
+    if not os.path.exists(os.path.join(local_dir, file_name)):
+        logger.info(f"Exporting embedding model '{model_name}' to ONNX in '{local_dir}'...")
+        model = SentenceTransformer(model_name, backend="onnx", model_kwargs=_model_kwargs(num_threads))
+        model.save_pretrained(local_dir)
+        if quantization:
+            export_dynamic_quantized_onnx_model(model, quantization, local_dir)
+
+    logger.info(f"Loading ONNX embedding model '{local_dir}/{file_name}'...")
+    return SentenceTransformer(
+        local_dir, backend="onnx", model_kwargs={**_model_kwargs(num_threads), "file_name": file_name}
+    )
@@ -0,0 +1,183 @@
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .text_utils import normalize_question
+from src.routes.metrics import (
+    QUERY_EMBEDDING_CACHE_BYTES,
+    QUERY_EMBEDDING_CACHE_HIT_RATIO,
+    QUERY_EMBEDDING_CACHE_HITS,
+    QUERY_EMBEDDING_CACHE_MISSES,
+)
+
+logger = logging.getLogger("faq_api")
+
+
+def _dumps(embedding):
+    buffer = io.BytesIO()
+    np.save(buffer, embedding, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _loads(data):
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+
+class RedisEmbeddingBackend:
+    """
+    Shared tier of the query embedding cache, so that every worker (and every
+    replica) reuses the encodings of the others. Keys are namespaced by embedding
+    model. Redis errors are logged and treated as misses: the cache then only
+    works locally, requests never fail because of it.
+    """
+
+    def __init__(self, url, namespace, ttl_seconds=86400):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05)
+        self._prefix = f"faq:qemb:{namespace}:"
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, key):
+        return self._prefix + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        try:
+            values = self._client.mget([self._key(k) for k in keys])
+        except Exception as e:
+            logger.warning(f"Shared query embedding cache unavailable: {e}")
+            return [None] * len(keys)
+        return [_loads(v) if v is not None else None for v in values]
+
+    def set_many(self, items):
+        try:
+            pipeline = self._client.pipeline(transaction=False)
+            for key, embedding in items:
+                pipeline.set(self._key(key), _dumps(embedding), ex=int(self.ttl_seconds) or None)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Shared query embedding cache unavailable: {e}")
+
+
+class QueryEmbeddingCache:
+    """
+    LRU cache of query embeddings keyed by the normalized question (case, accents,
+    punctuation and whitespace are ignored), bounded by `max_bytes` of embedding data.
+    With a shared `backend`, local misses are looked up there and new embeddings are
+    written to it. `max_bytes=0` disables the cache.
+    """
+
+    def __init__(self, max_bytes, backend=None):
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._lookups = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    @property
+    def hit_ratio(self):
+        return self._hits / self._lookups if self._lookups else 0.0
+
+    def _record(self, hits, lookups):
+        with self._lock:
+            self._hits += hits
+            self._lookups += lookups
+            QUERY_EMBEDDING_CACHE_HIT_RATIO.set(self.hit_ratio)
+        if lookups > hits:
+            QUERY_EMBEDDING_CACHE_MISSES.inc(lookups - hits)
+
+    def _store_local(self, key, embedding):
+        size = embedding.nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = embedding
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+            QUERY_EMBEDDING_CACHE_BYTES.set(self._bytes)
+
+    def get_many(self, texts, shared=True):
+        """Returns the cached embedding (or None) of each text. `shared=False` skips the backend."""
+        if self.max_bytes <= 0:
+            return [None] * len(texts)
+
+        keys = [normalize_question(text) for text in texts]
+        found = [None] * len(keys)
+        with self._lock:
+            for i, key in enumerate(keys):
+                embedding = self._entries.get(key)
+                if embedding is not None:
+                    self._entries.move_to_end(key)
+                    found[i] = embedding
+        local_hits = sum(e is not None for e in found)
+        if local_hits:
+            QUERY_EMBEDDING_CACHE_HITS.labels(tier="local").inc(local_hits)
+
+        missing = [i for i, e in enumerate(found) if e is None]
+        shared_hits = 0
+        if shared and self.backend is not None and missing:
+            for i, embedding in zip(missing, self.backend.get_many([keys[i] for i in missing])):
+                if embedding is not None:
+                    found[i] = embedding
+                    self._store_local(keys[i], embedding)
+                    shared_hits += 1
+            if shared_hits:
+                QUERY_EMBEDDING_CACHE_HITS.labels(tier="shared").inc(shared_hits)
+
+        self._record(local_hits + shared_hits, len(keys))
+        return found
+
+    def get(self, text, shared=True):
+        return self.get_many([text], shared=shared)[0]
+
+    def put_many(self, texts, embeddings):
+        if self.max_bytes <= 0:
+            return
+        items = []
+        for text, embedding in zip(texts, embeddings):
+            key = normalize_question(text)
+            embedding = np.asarray(embedding, dtype=np.float32)
+            self._store_local(key, embedding)
+            items.append((key, embedding))
+        if self.backend is not None and items:
+            self.backend.set_many(items)
+
+    def put(self, text, embedding):
+        self.put_many([text], [embedding])
+
+    def get_or_encode(self, texts, encode_fn):
+        """
+        Returns the embeddings of `texts`, calling `encode_fn(list_of_texts)` once for
+        the ones not in the cache (each distinct normalized question is encoded once).
+        """
+        found = self.get_many(texts)
+        missing = {}
+        for i, embedding in enumerate(found):
+            if embedding is None:
+                missing.setdefault(normalize_question(texts[i]), []).append(i)
+        if missing:
+            to_encode = [texts[rows[0]] for rows in missing.values()]
+            encoded = np.asarray(encode_fn(to_encode), dtype=np.float32)
+            self.put_many(to_encode, encoded)
+            for rows, embedding in zip(missing.values(), encoded):
+                for i in rows:
+                    found[i] = embedding
+        return found
@@ -1,19 +1,106 @@
+import asyncio
 import os
+import threading
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from functools import lru_cache
-import pandas as pd
+from typing import NamedTuple
+import numpy as np
+import torch
 from dotenv import load_dotenv
-from huggingface_hub import InferenceClient
-from sentence_transformers import SentenceTransformer, util
+from huggingface_hub import AsyncInferenceClient, InferenceClient
+from sentence_transformers import SentenceTransformer
 import logging
 
 from .data_loader import load_faq_data
-from src.routes.metrics import REQUEST_COUNT, RESPONSE_TIME, CONFIDENCE_SCORE
+from .answer_cache import AnswerCache
+from .category_classifier import CategoryClassifier
+from .context_builder import ContextBuilder, get_token_counter
+from .embedding_batcher import QueryEmbeddingBatcher
+from .embedding_store import EmbeddingStore, content_hash
+from .errors import GenerationOverloaded
+from .faq_store import FAQStore
+from .generator import Generator
+from .lexical_index import BM25Index, reciprocal_rank_fusion
+from .query_embedding_cache import QueryEmbeddingCache, RedisEmbeddingBackend
+from .reranker import create_reranker
+from .single_flight import SingleFlight
+from .text_utils import normalize_question
+from .llm_transport import LLMUnavailable, ResilientTransport, configure_http_pool
+from .vector_index import create_index, load_index
+from src.config.settings import (
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    ANSWER_CACHE_TTL_SECONDS,
+    BATCH_MAX_CONCURRENCY,
+    CATEGORY_CLASSIFIER_MIN_MARGIN,
+    CATEGORY_ROUTING,
+    CONTEXT_DEDUP_THRESHOLD,
+    CONTEXT_MAX_ANSWER_TOKENS,
+    CONTEXT_MAX_TOKENS,
+    CONTEXT_MIN_RELATIVE_SCORE,
+    CONTEXT_TOKENIZER,
+    DIRECT_ANSWER_TEMPLATE,
+    DIRECT_ANSWER_THRESHOLD,
+    EMBED_BATCH_MAX_SIZE,
+    EMBED_BATCH_WINDOW_MS,
+    EMBEDDING_BACKEND,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_ONNX_DIR,
+    EMBEDDING_ONNX_QUANTIZATION,
+    EMBEDDING_THREADS,
+    EMBED_EXECUTOR_WORKERS,
+    FAQ_DATA_PATH,
+    FAQ_RELOAD_INTERVAL_SECONDS,
+    HYBRID_CANDIDATES,
+    LLM_BACKEND,
+    REFUSAL_THRESHOLD,
+    REQUEST_COALESCING,
+    RERANK_BUDGET_MS,
+    RERANK_CANDIDATES,
+    RERANK_TOP_K,
+    RERANKER_MODEL,
+    RETRIEVAL_MODE,
+    RRF_K,
+    LLM_MAX_CONCURRENCY,
+    LLM_TIMEOUT_SECONDS,
+    QUERY_EMBEDDING_CACHE_MAX_MB,
+    QUERY_EMBEDDING_CACHE_REDIS_TTL_SECONDS,
+    QUERY_EMBEDDING_CACHE_REDIS_URL,
+    VECTOR_INDEX_BACKEND,
+    VECTOR_INDEX_DIR,
+    VECTOR_INDEX_PARAMS,
+)
+from src.routes.metrics import (
+    CATEGORY_ROUTING_TOTAL,
+    CONFIDENCE_SCORE,
+    PROMPT_TOKENS,
+    REQUEST_COUNT,
+    RESPONSE_TIME,
+    TIME_TO_FIRST_TOKEN,
+)
 
 load_dotenv()
 
 MODEL_ID = "mistralai/Mistral-7B-Instruct-v0.2"
 
+REFUSAL_ANSWER = "Bonjour, je suis désolé mais je ne suis pas en mesure de répondre à cette question."
+
+BASE_SYSTEM_PROMPT = (
+    "Tu es un assistant municipal expert de la communauté de communes Val de Loire Numérique.\n"
+    "Ton but est de répondre en français EXCLUSIVEMENT aux questions sur les sujets de la FAQ fournie.\n"
+    "Règles OBLIGATOIRES :\n"
+    f"- Si tu n'as pas suffisamment d'informations pour répondre, utilise la phrase: '{REFUSAL_ANSWER}'\n"
+    "- Sinon, commence toujours par 'Bonjour'.\n"
+    "- Tu dois t'appuyer STRICTEMENT sur la FAQ fournie en contexte pour répondre. Ne mentionne JAMAIS la FAQ dans ta réponse."
+)
+
+NO_CONTEXT_ANSWER = "Je suis désolé, mais je n'ai pas trouvé d'informations pertinentes pour répondre à votre question."
+
+GENERATION_PARAMS = {"max_tokens": 512, "temperature": 0.3, "top_p": 0.9}
+
 logger = logging.getLogger("faq_api")
 
 @lru_cache(maxsize=1)
@@ -21,7 +108,121 @@ def get_llm_client():
     token = os.getenv("HF_TOKEN")
     if not token:
         raise RuntimeError("HF_TOKEN missing from .env")
-    return InferenceClient(token=token)
+    configure_http_pool()
+    return InferenceClient(token=token, timeout=LLM_TIMEOUT_SECONDS)
+
+@lru_cache(maxsize=1)
+def get_async_llm_client():
+    # huggingface_hub>=1.0 runs AsyncInferenceClient on httpx (no aiohttp), through the pool set up below.
+    token = os.getenv("HF_TOKEN")
+    if not token:
+        raise RuntimeError("HF_TOKEN missing from .env")
+    configure_http_pool()
+    return AsyncInferenceClient(token=token, timeout=LLM_TIMEOUT_SECONDS)
+
+@lru_cache(maxsize=1)
+def get_embed_executor():
+    """Bounded thread pool running the CPU-bound embedding and retrieval work off the event loop."""
+    return ThreadPoolExecutor(max_workers=EMBED_EXECUTOR_WORKERS, thread_name_prefix="embed")
+
+class RemoteGenerator(Generator):
+    """
+    Hugging Face Inference API backend. Calls go through a `ResilientTransport`
+    (deadline, retries, circuit breaker), which raises `LLMUnavailable` when the
+    provider cannot be used.
+    """
+
+    def __init__(self, model_id=MODEL_ID, transport=None):
+        self.model_id = model_id
+        self.transport = transport or ResilientTransport()
+
+    def generate(self, messages, **params):
+        completion = self.transport.call(
+            lambda: get_llm_client().chat.completions.create(model=self.model_id, messages=messages, **params)
+        )
+        return completion.choices[0].message.content
+
+    async def agenerate(self, messages, **params):
+        completion = await self.transport.acall(
+            lambda: get_async_llm_client().chat.completions.create(model=self.model_id, messages=messages, **params)
+        )
+        return completion.choices[0].message.content
+
+    async def astream(self, messages, **params):
+        # Retries only cover opening the stream: once tokens are sent they cannot be replayed.
+        stream = await self.transport.acall(
+            lambda: get_async_llm_client().chat.completions.create(
+                model=self.model_id, messages=messages, stream=True, **params
+            )
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                yield text
+
+def create_generator(backend, model_id=MODEL_ID):
+    """Returns the generation backend: "remote" (HF Inference API) or "local" (in-process model)."""
+    if backend == "remote":
+        return RemoteGenerator(model_id)
+    if backend == "local":
+        from .local_generator import get_local_generator
+        return get_local_generator()
+    raise ValueError(f"Unknown LLM backend '{backend}'. Expected 'remote' or 'local'.")
+
+def create_embedding_model(model_name, backend="torch"):
+    """Returns the query/corpus encoder: "torch" (PyTorch) or "onnx" (ONNX Runtime, optionally int8)."""
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "onnx":
+        from .onnx_embedding import load_onnx_embedding_model
+        return load_onnx_embedding_model(
+            model_name, EMBEDDING_ONNX_QUANTIZATION, EMBEDDING_THREADS, EMBEDDING_ONNX_DIR
+        )
+    raise ValueError(f"Unknown embedding backend '{backend}'. Expected 'torch' or 'onnx'.")
+
+def _to_numpy(embeddings):
+    if isinstance(embeddings, torch.Tensor):
+        embeddings = embeddings.detach().cpu().numpy()
+    return np.asarray(embeddings, dtype=np.float32)
+
+def _file_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    """Immutable view of the FAQ corpus, its embeddings and its vector index."""
+    faq: FAQStore
+    questions: list
+    answers: list
+    ids: list
+    categories: list
+    keywords: list
+    corpus: list
+    hashes: list
+    fingerprint: str
+    embeddings: np.ndarray
+    index: object
+    lexical_index: object = None
+    id_positions: dict = field(default_factory=dict)
+    # category -> sorted corpus positions of its entries, searched within `index`
+    category_rows: dict = field(default_factory=dict)
+    classifier: object = None
+
+class PreparedQuestion(NamedTuple):
+    """
+    Outcome of the retrieval step: a cached answer, or the retrieved (context, sources,
+    confidence), with the fingerprint of the snapshot it was retrieved from.
+    """
+    q_emb: object
+    category: object
+    cached: object
+    retrieval: object
+    fingerprint: object = None
 
 class RAGService:
     def __init__(
@@ -29,32 +230,170 @@ class RAGService:
         embed_model_name="sentence-transformers/all-MiniLM-L6-v2",
         top_k=6, # Aligned with benchmark
         model_id=MODEL_ID,
+        embedding_cache_dir=EMBEDDING_CACHE_DIR,
+        llm_max_concurrency=LLM_MAX_CONCURRENCY,
+        answer_cache_size=ANSWER_CACHE_MAX_ENTRIES,
+        embed_batch_window_ms=EMBED_BATCH_WINDOW_MS,
+        embed_batch_max_size=EMBED_BATCH_MAX_SIZE,
+        index_backend=VECTOR_INDEX_BACKEND,
+        index_dir=VECTOR_INDEX_DIR,
+        reload_interval_seconds=FAQ_RELOAD_INTERVAL_SECONDS,
+        retrieval_mode=RETRIEVAL_MODE,
+        direct_answer_threshold=DIRECT_ANSWER_THRESHOLD,
+        refusal_threshold=REFUSAL_THRESHOLD,
+        category_routing=CATEGORY_ROUTING,
+        context_max_tokens=CONTEXT_MAX_TOKENS,
+        llm_backend=LLM_BACKEND,
+        coalesce_requests=REQUEST_COALESCING,
+        query_embedding_cache_mb=QUERY_EMBEDDING_CACHE_MAX_MB,
+        query_embedding_cache_url=QUERY_EMBEDDING_CACHE_REDIS_URL,
+        reranker_model=RERANKER_MODEL,
+        embedding_backend=EMBEDDING_BACKEND,
+        background_threads=True,
     ):
-        self.faq_df = load_faq_data()
-        if self.faq_df.empty:
-            raise ValueError("FAQ data is empty or could not be loaded.")
-            
         self.embed_model_name = embed_model_name
+        # Identifies the encoder in persistent caches: ONNX/int8 embeddings differ slightly from PyTorch ones.
+        self.embedding_key = embed_model_name
+        if embedding_backend != "torch":
+            self.embedding_key = f"{embed_model_name}@{embedding_backend}{EMBEDDING_ONNX_QUANTIZATION and '-' + EMBEDDING_ONNX_QUANTIZATION}"
         self.top_k = top_k
         self.model_id = model_id
+        self.embedding_cache_dir = embedding_cache_dir
+        self.llm_max_concurrency = llm_max_concurrency
+        self.index_backend = index_backend
+        self.index_dir = index_dir
+        if retrieval_mode not in ("dense", "hybrid"):
+            raise ValueError(f"Unknown retrieval mode '{retrieval_mode}'. Expected 'dense' or 'hybrid'.")
+        self.retrieval_mode = retrieval_mode
+        if category_routing not in ("off", "explicit", "auto"):
+            raise ValueError(f"Unknown category routing '{category_routing}'. Expected 'off', 'explicit' or 'auto'.")
+        self.category_routing = category_routing
+        self.direct_answer_threshold = direct_answer_threshold
+        self.refusal_threshold = refusal_threshold
+        self._llm_semaphore = asyncio.Semaphore(llm_max_concurrency)
+        self._in_flight = SingleFlight() if coalesce_requests else None
+        self._token_counter = get_token_counter(CONTEXT_TOKENIZER)
+        self._context_builder = ContextBuilder(
+            self._token_counter,
+            max_tokens=context_max_tokens,
+            max_answer_tokens=CONTEXT_MAX_ANSWER_TOKENS,
+            min_relative_score=CONTEXT_MIN_RELATIVE_SCORE,
+            dedup_threshold=CONTEXT_DEDUP_THRESHOLD,
+        )
+
+        # Before the parallel loads below download from the Hub.
+        configure_http_pool()
+        # The FAQ, the models and the generator are independent: load them in parallel.
+        self.startup_timings = {}
+        with ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-init") as executor:
+            faq_future = executor.submit(self._timed, "faq", load_faq_data)
+            model_future = executor.submit(
+                self._timed, "embedding_model", create_embedding_model, self.embed_model_name, embedding_backend
+            )
+            generator_future = executor.submit(self._timed, "generator", create_generator, llm_backend, model_id)
+            reranker_future = executor.submit(
+                self._timed, "reranker", create_reranker, reranker_model, RERANK_TOP_K, RERANK_BUDGET_MS
+            )
+            faq = faq_future.result()
+            self._embed_model = model_future.result()
+            self._generator = generator_future.result()
+            self._reranker = reranker_future.result()
+        # With a re-ranker, more candidates are retrieved and it keeps the best RERANK_TOP_K.
+        self._n_candidates = max(top_k, RERANK_CANDIDATES) if self._reranker is not None else top_k
+        if faq.empty:
+            raise ValueError("FAQ data is empty or could not be loaded.")
+
+        self._reload_lock = threading.Lock()
+        self._snapshot = self._timed("index", self._build_snapshot, faq)
 
-        self._embed_model = SentenceTransformer(self.embed_model_name)
+        self._answer_cache = AnswerCache(
+            max_entries=answer_cache_size,
+            ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+            similarity_threshold=ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        )
+        self._answer_cache.bind(self.faq_fingerprint)
+        # Query embeddings only depend on the embedding model, so this cache survives reloads.
+        self._query_embedding_cache = QueryEmbeddingCache(
+            max_bytes=int(query_embedding_cache_mb * 1024 * 1024),
+            backend=RedisEmbeddingBackend(
+                query_embedding_cache_url, self.embedding_key, QUERY_EMBEDDING_CACHE_REDIS_TTL_SECONDS
+            ) if query_embedding_cache_url and query_embedding_cache_mb > 0 else None,
+        )
+
+        self.embed_batch_window_ms = embed_batch_window_ms
+        self.embed_batch_max_size = embed_batch_max_size
+        self.reload_interval_seconds = reload_interval_seconds
+        # A process that forks workers after building the service starts them in `after_fork` instead.
+        self._query_batcher, self._watcher = None, None
+        if background_threads:
+            self._start_background_threads()
+
+    def _timed(self, phase, fn, *args):
+        """Runs one startup phase and records its duration (ms) in `startup_timings`."""
+        start_time = time.perf_counter()
+        result = fn(*args)
+        self.startup_timings[phase] = (time.perf_counter() - start_time) * 1000
+        logger.info(f"Startup phase '{phase}' done in {self.startup_timings[phase]:.0f}ms.")
+        return result
+
+    def _start_background_threads(self):
+        self._query_batcher = None
+        if self.embed_batch_window_ms > 0:
+            self._query_batcher = QueryEmbeddingBatcher(
+                lambda texts: self._embed_model.encode(texts, convert_to_tensor=True),
+                max_batch_size=self.embed_batch_max_size,
+                window_ms=self.embed_batch_window_ms,
+            )
+
+        self._watcher = None
+        if self.reload_interval_seconds > 0:
+            self._watcher = threading.Thread(
+                target=self._watch_faq_file,
+                args=(self.reload_interval_seconds,),
+                name="faq-watcher",
+                daemon=True,
+            )
+            self._watcher.start()
 
-        self._faq_questions = self.faq_df["question"].fillna("").tolist()
-        self._faq_answers = self.faq_df["answer"].fillna("").tolist()
-        self._faq_ids = self.faq_df["id"].tolist()
-        self._faq_categories = self.faq_df.get("category", pd.Series([""] * len(self.faq_df))).fillna("").tolist()
-        self._faq_keywords = self.faq_df.get("keywords", pd.Series([[] for _ in range(len(self.faq_df))])).tolist()
+    def after_fork(self):
+        """
+        Starts the background threads in a worker forked from a process where the
+        service was preloaded (with `background_threads=False`): threads do not survive
+        `os.fork`, the loaded models, embeddings and indexes are shared copy-on-write.
+        """
+        self._start_background_threads()
+        if hasattr(self._generator, "after_fork"):
+            self._generator.after_fork()
 
+    # The attributes below always read the current snapshot, which `reload` swaps atomically.
+    faq = property(lambda self: self._snapshot.faq)
+    # pandas view of the FAQ for analysis code, built on first access
+    faq_df = property(lambda self: self._snapshot.faq.to_dataframe())
+    faq_fingerprint = property(lambda self: self._snapshot.fingerprint)
+    _faq_questions = property(lambda self: self._snapshot.questions)
+    _faq_answers = property(lambda self: self._snapshot.answers)
+    _faq_ids = property(lambda self: self._snapshot.ids)
+    _faq_categories = property(lambda self: self._snapshot.categories)
+    _faq_keywords = property(lambda self: self._snapshot.keywords)
+    _faq_corpus = property(lambda self: self._snapshot.corpus)
+    _faq_embeddings = property(lambda self: self._snapshot.embeddings)
+    _index = property(lambda self: self._snapshot.index)
+
+    @property
+    def categories(self):
+        """Categories that can be used as a retrieval filter."""
+        return sorted(self._snapshot.category_rows)
+
+    def _build_snapshot(self, faq, previous=None):
+        questions = faq.column("question")
+        answers = faq.column("answer")
+        ids = faq.column("id")
+        categories = faq.column("category")
+        keywords = [list(kws) for kws in faq.column("keywords")]
 
         # Create a combined corpus for embedding, similar to the benchmark runner
-        self._faq_corpus = []
-        for q, a, c, kws in zip(
-            self._faq_questions,
-            self._faq_answers,
-            self._faq_categories,
-            self._faq_keywords,
-        ):
+        corpus = []
+        for q, a, c, kws in zip(questions, answers, categories, keywords):
             if isinstance(kws, list):
                 kws_str = ", ".join(map(str, kws))
             else:
@@ -66,118 +405,614 @@ class RAGService:
                 f"Catégorie: {c}\n"
                 f"Mots-clés: {kws_str}"
             )
-            self._faq_corpus.append(corpus_text)
+            corpus.append(corpus_text)
+
+        hashes = [content_hash(text) for text in corpus]
+        fingerprint = content_hash("".join(hashes))
+        embeddings = self._encode_corpus(corpus, hashes, previous)
+
+        lexical_index = None
+        if self.retrieval_mode == "hybrid":
+            lexical_index = BM25Index().build([
+                f"{q} {q} {a} {' '.join(map(str, kws)) if isinstance(kws, list) else kws or ''}"
+                for q, a, kws in zip(questions, answers, keywords)
+            ])
+
+        category_rows, classifier = {}, None
+        if self.category_routing != "off":
+            category_rows = self._category_rows(categories)
+        if self.category_routing == "auto":
+            classifier = CategoryClassifier(CATEGORY_CLASSIFIER_MIN_MARGIN).fit(embeddings, categories)
 
-        self._faq_embeddings = self._embed_model.encode(
-            self._faq_corpus,
-            convert_to_tensor=True,
+        return KnowledgeSnapshot(
+            faq=faq,
+            questions=questions,
+            answers=answers,
+            ids=ids,
+            categories=categories,
+            keywords=keywords,
+            corpus=corpus,
+            hashes=hashes,
+            fingerprint=fingerprint,
+            embeddings=embeddings,
+            index=self._build_index(embeddings, fingerprint),
+            lexical_index=lexical_index,
+            id_positions={faq_id: i for i, faq_id in enumerate(ids)},
+            category_rows=category_rows,
+            classifier=classifier,
         )
 
-    def _find_context(self, user_question):
-        q_emb = self._embed_model.encode(user_question, convert_to_tensor=True)
-        cos_scores = util.cos_sim(q_emb, self._faq_embeddings)[0]
-        top_results = cos_scores.topk(k=min(self.top_k, len(self._faq_corpus)))
+    def _encode_corpus(self, corpus, hashes, previous=None):
+        """
+        Encodes the corpus. Entries already embedded in the previous snapshot (or in the
+        persistent embedding cache) are reused, only new or modified ones are encoded.
+        """
+        if self.embedding_cache_dir:
+            store = EmbeddingStore(self.embedding_cache_dir, self.embedding_key)
+            return store.get_or_encode(
+                corpus,
+                lambda texts: self._embed_model.encode(texts, convert_to_numpy=True),
+            )
+
+        if previous is None:
+            return _to_numpy(self._embed_model.encode(corpus, convert_to_tensor=True))
+
+        previous_rows = {h: i for i, h in enumerate(previous.hashes)}
+        missing = [i for i, h in enumerate(hashes) if h not in previous_rows]
+        embeddings = np.empty((len(corpus), previous.embeddings.shape[1]), dtype=np.float32)
+        for i, h in enumerate(hashes):
+            if h in previous_rows:
+                embeddings[i] = previous.embeddings[previous_rows[h]]
+        if missing:
+            embeddings[missing] = _to_numpy(
+                self._embed_model.encode([corpus[i] for i in missing], convert_to_tensor=True)
+            )
+        logger.info(f"Re-encoded {len(missing)} of {len(corpus)} FAQ entries.")
+        return embeddings
+
+    def _build_index(self, embeddings, fingerprint):
+        """Loads the saved vector index for this corpus, or builds (and saves) a new one."""
+        if self.embedding_key != self.embed_model_name:
+            fingerprint = content_hash(f"{self.embedding_key}:{fingerprint}")
+        params = VECTOR_INDEX_PARAMS.get(self.index_backend, {})
+        if self.index_dir:
+            index = load_index(self.index_dir, fingerprint=fingerprint, backend=self.index_backend, params=params)
+            if index is not None:
+                logger.info(f"Loaded '{index.backend}' vector index from '{self.index_dir}'.")
+                return index
+
+        index = create_index(self.index_backend, **params)
+        index.build(embeddings)
+        if self.index_dir:
+            index.save(self.index_dir, fingerprint=fingerprint)
+        return index
+
+    @staticmethod
+    def _category_rows(categories):
+        """
+        Corpus positions of each category. A category filter searches these rows of the
+        shared index, so it needs no copy of the embeddings and nothing to rebuild.
+        """
+        rows_by_category = defaultdict(list)
+        for i, category in enumerate(categories):
+            if category:
+                rows_by_category[category].append(i)
+        return {category: np.asarray(rows, dtype=np.int64) for category, rows in rows_by_category.items()}
+
+    def reload(self):
+        """
+        Reloads the FAQ file and atomically swaps in a new snapshot (corpus, embeddings
+        and index). Entries are diffed by id and content hash and only the changed ones
+        are re-embedded; in-flight requests keep using the snapshot they started with.
+        Returns a summary of the changes.
+        """
+        with self._reload_lock:
+            # The cached FAQ is only replaced once the new file has loaded.
+            faq = load_faq_data(reload=True)
+            if faq.empty:
+                raise ValueError("FAQ data is empty or could not be loaded.")
+
+            previous = self._snapshot
+            start_time = time.perf_counter()
+            snapshot = self._build_snapshot(faq, previous)
+
+            old_entries = dict(zip(previous.ids, previous.hashes))
+            new_entries = dict(zip(snapshot.ids, snapshot.hashes))
+            summary = {
+                "added": sorted(set(new_entries) - set(old_entries)),
+                "removed": sorted(set(old_entries) - set(new_entries)),
+                "updated": sorted(i for i in new_entries if i in old_entries and new_entries[i] != old_entries[i]),
+                "faq_count": len(snapshot.ids),
+                "fingerprint": snapshot.fingerprint,
+            }
+
+            self._snapshot = snapshot
+            self._answer_cache.bind(snapshot.fingerprint)
+            self._faq_mtime = _file_mtime(FAQ_DATA_PATH)
+
+            logger.info(
+                f"FAQ reloaded in {(time.perf_counter() - start_time) * 1000:.0f}ms: "
+                f"{len(summary['added'])} added, {len(summary['removed'])} removed, {len(summary['updated'])} updated."
+            )
+            return summary
+
+    def _watch_faq_file(self, interval_seconds):
+        """Polls the FAQ file modification time and reloads the knowledge base when it changes."""
+        self._faq_mtime = _file_mtime(FAQ_DATA_PATH)
+        while True:
+            time.sleep(interval_seconds)
+            mtime = _file_mtime(FAQ_DATA_PATH)
+            if mtime is None or mtime == self._faq_mtime:
+                continue
+            try:
+                self.reload()
+            except Exception as e:
+                self._faq_mtime = mtime
+                logger.error(f"Automatic FAQ reload failed: {e}", exc_info=True)
+
+    def _embed_query(self, user_question):
+        cached = self._query_embedding_cache.get(user_question)
+        if cached is not None:
+            return torch.from_numpy(cached)
+        if self._query_batcher is not None:
+            q_emb = self._query_batcher.embed(user_question)
+        else:
+            q_emb = self._embed_model.encode(user_question, convert_to_tensor=True)
+        self._query_embedding_cache.put(user_question, _to_numpy(q_emb))
+        return q_emb
+
+    async def _embed_query_async(self, user_question):
+        """
+        Awaits the micro-batched embedding without holding an executor thread.
+        Returns None when batching is disabled, or on a local cache miss with a shared
+        cache (its lookup is blocking I/O): `_prepare` then embeds in the executor.
+        """
+        if self._query_batcher is None:
+            return None
+        cached = self._query_embedding_cache.get(user_question, shared=False)
+        if cached is not None:
+            return torch.from_numpy(cached)
+        if self._query_embedding_cache.backend is not None:
+            return None
+        q_emb = await asyncio.wrap_future(self._query_batcher.submit(user_question))
+        self._query_embedding_cache.put(user_question, _to_numpy(q_emb))
+        return q_emb
+
+    def _find_context(self, user_question, q_emb=None, category=None, snapshot=None):
+        if q_emb is None:
+            q_emb = self._embed_query(user_question)
+        snapshot = snapshot or self._snapshot
+        scores, indices = self._rank(snapshot, [user_question], q_emb, [category])[0]
+        return self._build_context(scores, indices, snapshot)
 
-        context_chunks = []
-        sources = []
-        confidence_score = 0.0
+    def _route(self, snapshot, q_embs, categories):
+        """
+        Resolves the category filter of each question: the requested one, else the
+        classifier prediction in "auto" mode, else None (whole corpus).
+        """
+        if self.category_routing == "off":
+            return [None] * len(categories)
 
-        if top_results.values.numel() > 0:
-            confidence_score = top_results.values[0].item()
+        predicted = [None] * len(categories)
+        if snapshot.classifier is not None and any(c is None for c in categories):
+            predicted = snapshot.classifier.predict(q_embs)
+
+        routed = []
+        for category, prediction in zip(categories, predicted):
+            if category is not None:
+                if category not in snapshot.category_rows:
+                    raise ValueError(f"Unknown category '{category}'.")
+                source = "explicit"
+            else:
+                category = prediction
+                source = "classifier" if prediction is not None else "none"
+            CATEGORY_ROUTING_TOTAL.labels(source=source).inc()
+            routed.append(category)
+        return routed
+
+    def _rank(self, snapshot, questions, q_embs, categories=None):
+        """
+        Returns, for each question, the (scores, indices) of its `top_k` FAQ entries,
+        searched among the entries of its category (None: whole corpus). With a re-ranker,
+        the retrieved candidates are re-ordered by the cross-encoder first.
+        """
+        if categories is None or all(c is None for c in categories):
+            ranked = self._rank_in(snapshot, None, questions, q_embs)
+        else:
+            ranked = self._rank_by_category(snapshot, questions, q_embs, categories)
+        if self._reranker is not None:
+            ranked = self._reranker.rerank(
+                questions, lambda idx: f"{snapshot.questions[idx]} {snapshot.answers[idx]}", ranked
+            )
+        return ranked
 
-        for score, idx in zip(top_results.values, top_results.indices):
+    def _rank_by_category(self, snapshot, questions, q_embs, categories):
+        rows_by_category = defaultdict(list)
+        for row, category in enumerate(categories):
+            rows_by_category[category if category in snapshot.category_rows else None].append(row)
+
+        q_matrix = np.atleast_2d(_to_numpy(q_embs))
+        ranked = [None] * len(questions)
+        for category, rows in rows_by_category.items():
+            positions = snapshot.category_rows.get(category)
+            results = self._rank_in(snapshot, positions, [questions[r] for r in rows], q_matrix[rows])
+            for row, result in zip(rows, results):
+                ranked[row] = result
+        return ranked
+
+    def _rank_in(self, snapshot, positions, questions, q_embs):
+        """
+        Ranks the questions against the corpus entries at `positions` (None: the whole
+        corpus). Scores are dense cosine similarities. In hybrid mode the order comes
+        from the reciprocal rank fusion of the dense and BM25 rankings.
+        """
+        if self.retrieval_mode != "hybrid":
+            scores, indices = snapshot.index.search(q_embs, self._n_candidates, rows=positions)
+            return list(zip(scores, indices))
+
+        n_candidates = max(self._n_candidates, HYBRID_CANDIDATES)
+        _, dense_indices = snapshot.index.search(q_embs, n_candidates, rows=positions)
+        q_matrix = np.atleast_2d(_to_numpy(q_embs))
+        q_matrix = q_matrix / np.maximum(np.linalg.norm(q_matrix, axis=1, keepdims=True), 1e-12)
+
+        ranked = []
+        for i, question in enumerate(questions):
+            _, lexical_indices = snapshot.lexical_index.search(question, n_candidates, positions)
+            fused = np.array(
+                reciprocal_rank_fusion([dense_indices[i], lexical_indices], k=RRF_K)[:self._n_candidates],
+                dtype=np.int64,
+            )
+            vectors = np.asarray(snapshot.embeddings[fused], dtype=np.float32)
+            norms = np.maximum(np.linalg.norm(vectors, axis=1), 1e-12)
+            ranked.append(((vectors @ q_matrix[i]) / norms, fused))
+        return ranked
+
+    def _build_context(self, scores, indices, snapshot):
+        """Turns ranked corpus positions into the token-budgeted prompt context."""
+        confidence_score = float(scores[0]) if len(scores) > 0 else 0.0
+
+        entries = []
+        for score, idx in zip(scores, indices):
             idx = int(idx)
-            q = self._faq_questions[idx]
-            a = self._faq_answers[idx]
-            c = self._faq_categories[idx]
-            kws = self._faq_keywords[idx]
+            kws = snapshot.keywords[idx]
             if isinstance(kws, list):
                 kws_str = ", ".join(map(str, kws))
             else:
                 kws_str = str(kws) if kws is not None else ""
-            
-            context_chunks.append(
-                f"- Catégorie: {c}\n  Mots-clés: {kws_str}\n  Q: {q}\n  R: {a}"
-            )
-            sources.append(self._faq_ids[idx])
+            entries.append((
+                float(score),
+                snapshot.ids[idx],
+                snapshot.questions[idx],
+                snapshot.answers[idx],
+                snapshot.categories[idx],
+                kws_str,
+            ))
 
-        context = "\n\n".join(context_chunks)
+        context, sources = self._context_builder.build(entries)
         return context, sources, confidence_score
 
-    def answer_question(self, question):
+    def _prepare(self, question, q_emb=None, category=None):
+        """
+        Embeds the question once, resolves its category filter, then either finds
+        a cached answer or retrieves the context.
+        """
+        if q_emb is None:
+            q_emb = self._embed_query(question)
+        snapshot = self._snapshot
+        category = self._route(snapshot, q_emb, [category])[0]
+        cached = self._answer_cache.get(question, q_emb, scope=category)
+        if cached is not None:
+            return PreparedQuestion(q_emb, category, cached, None, snapshot.fingerprint)
+        retrieval = self._find_context(question, q_emb=q_emb, category=category, snapshot=snapshot)
+        return PreparedQuestion(q_emb, category, None, retrieval, snapshot.fingerprint)
+
+    def _prepare_batch(self, questions, category=None):
+        """
+        Batched `_prepare`: all questions are encoded in a single `encode` call and
+        scored with one matrix top-k per category.
+        """
+        q_embs = torch.from_numpy(np.stack(self._query_embedding_cache.get_or_encode(
+            questions, lambda texts: _to_numpy(self._embed_model.encode(texts, convert_to_tensor=True))
+        )))
+        snapshot = self._snapshot
+        categories = self._route(snapshot, q_embs, [category] * len(questions))
+        ranked = self._rank(snapshot, questions, q_embs, categories)
+
+        prepared = []
+        for i, question in enumerate(questions):
+            cached = self._answer_cache.get(question, q_embs[i], scope=categories[i])
+            if cached is not None:
+                prepared.append(PreparedQuestion(q_embs[i], categories[i], cached, None, snapshot.fingerprint))
+            else:
+                prepared.append(PreparedQuestion(
+                    q_embs[i], categories[i], None, self._build_context(*ranked[i], snapshot), snapshot.fingerprint
+                ))
+        return prepared
+
+    def _build_messages(self, question, context):
+        final_system_prompt = (
+            BASE_SYSTEM_PROMPT
+            + "\n\n--- CONTEXTE FAQ ---\n"
+            + context
+            + "\n--- FIN DU CONTEXTE ---"
+        )
+        PROMPT_TOKENS.observe(self._token_counter.count(final_system_prompt) + self._token_counter.count(question))
+        return [
+            {"role": "system", "content": final_system_prompt},
+            {"role": "user", "content": question},
+        ]
+
+    def _no_context_response(self, question, start_time):
+        logger.warning(f"No context found for question: '{question}'")
+        REQUEST_COUNT.labels(endpoint="/answer", status="no_context", path="no_context").inc()
+        duration = time.perf_counter() - start_time
+        RESPONSE_TIME.labels(strategy="default").observe(duration)
+        CONFIDENCE_SCORE.observe(0.0) # No confidence if no context
+        return {
+            "answer": NO_CONTEXT_ANSWER,
+            "confidence": 0.0,
+            "sources": [],
+            "latency_ms": duration * 1000,
+            "path": "no_context",
+        }
+
+    def _fast_path_response(self, question, answer_text, confidence, sources, start_time, path):
+        duration = time.perf_counter() - start_time
+        REQUEST_COUNT.labels(endpoint="/answer", status="success", path=path).inc()
+        RESPONSE_TIME.labels(strategy=path).observe(duration)
+        CONFIDENCE_SCORE.observe(confidence)
+        logger.info(f"Answer served by the '{path}' fast path in {duration * 1000:.0f}ms with confidence {confidence:.2f}.")
+        return {
+            "answer": answer_text,
+            "confidence": confidence,
+            "sources": sources,
+            "latency_ms": duration * 1000,
+            "path": path,
+        }
+
+    def _stored_answer(self, source):
+        """The FAQ answer of `source`, wrapped by DIRECT_ANSWER_TEMPLATE, or None if it is gone."""
+        snapshot = self._snapshot
+        position = snapshot.id_positions.get(source)
+        if position is None:
+            return None
+        answer_text = snapshot.answers[position]
+        if DIRECT_ANSWER_TEMPLATE:
+            answer_text = DIRECT_ANSWER_TEMPLATE.format(answer=answer_text)
+        return answer_text
+
+    def _degraded_response(self, question, prepared, start_time, error):
+        """FAQ-only answer (best matching entry) served when the LLM is unavailable."""
+        logger.warning(f"LLM unavailable, answering from the FAQ only: {error}")
+        _, sources, confidence = prepared.retrieval
+        answer_text = self._stored_answer(sources[0])
+        if answer_text is None:
+            return self._no_context_response(question, start_time)
+        return self._fast_path_response(question, answer_text, confidence, sources[:1], start_time, "degraded")
+
+    def _resolve_without_llm(self, question, prepared, start_time):
+        """
+        Returns the response when no LLM call is needed: cached answer, no context,
+        or a confidence-gated fast path (stored FAQ answer above `direct_answer_threshold`,
+        refusal below `refusal_threshold`). Returns None otherwise.
+        """
+        cached, retrieval = prepared.cached, prepared.retrieval
+        if cached is not None:
+            return self._cached_response(question, cached, start_time)
+
+        context, sources, confidence = retrieval
+        if not context:
+            return self._no_context_response(question, start_time)
+
+        if self.direct_answer_threshold and confidence >= self.direct_answer_threshold:
+            answer_text = self._stored_answer(sources[0])
+            if answer_text is not None:
+                return self._fast_path_response(question, answer_text, confidence, sources[:1], start_time, "direct")
+
+        if self.refusal_threshold and confidence < self.refusal_threshold:
+            return self._fast_path_response(question, REFUSAL_ANSWER, confidence, [], start_time, "refusal")
+
+        return None
+
+    def _success_response(self, question, answer_text, confidence, sources, start_time):
+        duration = time.perf_counter() - start_time
+        latency_ms = duration * 1000
+
+        REQUEST_COUNT.labels(endpoint="/answer", status="success", path="llm").inc()
+        RESPONSE_TIME.labels(strategy="default").observe(duration)
+        CONFIDENCE_SCORE.observe(confidence)
+
+        if confidence < 0.3:
+            logger.warning(f"Low confidence detected for question: '{question}'. Confidence: {confidence:.2f}")
+
+        logger.info(f"Answer generated in {latency_ms:.0f}ms with confidence {confidence:.2f}. Sources: {sources}")
+
+        return {
+            "answer": answer_text,
+            "confidence": confidence,
+            "sources": sources,
+            "latency_ms": latency_ms,
+            "path": "llm",
+        }
+
+    def _cache_answer(self, question, prepared, result):
+        """Caches a generated answer, unless the FAQ was reloaded since its context was retrieved."""
+        self._answer_cache.put(
+            question, prepared.q_emb, result, scope=prepared.category, fingerprint=prepared.fingerprint
+        )
+
+    def _cached_response(self, question, cached, start_time):
+        duration = time.perf_counter() - start_time
+        REQUEST_COUNT.labels(endpoint="/answer", status="success", path="cache").inc()
+        RESPONSE_TIME.labels(strategy="cache").observe(duration)
+        CONFIDENCE_SCORE.observe(cached["confidence"])
+        logger.info(f"Answer served from cache in {duration * 1000:.0f}ms for question: '{question}'")
+        return {**cached, "latency_ms": duration * 1000, "cached": True, "path": "cache"}
+
+    def _coalesced_response(self, question, shared_result, start_time):
+        duration = time.perf_counter() - start_time
+        REQUEST_COUNT.labels(endpoint="/answer", status="success", path="coalesced").inc()
+        RESPONSE_TIME.labels(strategy="coalesced").observe(duration)
+        CONFIDENCE_SCORE.observe(shared_result["confidence"])
+        logger.info(f"Answer shared with an identical in-flight question in {duration * 1000:.0f}ms: '{question}'")
+        return {**shared_result, "latency_ms": duration * 1000, "path": "coalesced"}
+
+    def _error(self, question, start_time, e):
+        duration = time.perf_counter() - start_time
+        REQUEST_COUNT.labels(endpoint="/answer", status="error", path="unknown").inc()
+        RESPONSE_TIME.labels(strategy="default").observe(duration)
+        logger.error(f"Error answering question '{question}': {e}", exc_info=True)
+
+    def answer_question(self, question, category=None):
         logger.info(f"Question received: '{question}'")
         start_time = time.perf_counter()
         
         try:
-            context, sources, confidence = self._find_context(question)
-            
-            if not context:
-                logger.warning(f"No context found for question: '{question}'")
-                REQUEST_COUNT.labels(endpoint="/answer", status="no_context").inc()
-                duration = time.perf_counter() - start_time
-                RESPONSE_TIME.labels(strategy="default").observe(duration)
-                CONFIDENCE_SCORE.observe(0.0) # No confidence if no context
-                return {
-                    "answer": "Je suis désolé, mais je n'ai pas trouvé d'informations pertinentes pour répondre à votre question.",
-                    "confidence": 0.0,
-                    "sources": [],
-                    "latency_ms": duration * 1000,
-                }
+            prepared = self._prepare(question, category=category)
+            resolved = self._resolve_without_llm(question, prepared, start_time)
+            if resolved is not None:
+                return resolved
 
-            client = get_llm_client()
-            
-            base_system_prompt = (
-                "Tu es un assistant municipal expert de la communauté de communes Val de Loire Numérique.\n"
-                "Ton but est de répondre en français EXCLUSIVEMENT aux questions sur les sujets de la FAQ fournie.\n"
-                "Règles OBLIGATOIRES :\n"
-                "- Si tu n'as pas suffisamment d'informations pour répondre, utilise la phrase: 'Bonjour, je suis désolé mais je ne suis pas en mesure de répondre à cette question.'\n"
-                "- Sinon, commence toujours par 'Bonjour'.\n"
-                "- Tu dois t'appuyer STRICTEMENT sur la FAQ fournie en contexte pour répondre. Ne mentionne JAMAIS la FAQ dans ta réponse."
-            )
+            context, sources, confidence = prepared.retrieval
+            try:
+                answer_text = self._generator.generate(self._build_messages(question, context), **GENERATION_PARAMS)
+            except LLMUnavailable as e:
+                return self._degraded_response(question, prepared, start_time, e)
 
-            final_system_prompt = (
-                base_system_prompt
-                + "\n\n--- CONTEXTE FAQ ---\n"
-                + context
-                + "\n--- FIN DU CONTEXTE ---"
-            )
-            
-            messages = [
-                {"role": "system", "content": final_system_prompt},
-                {"role": "user", "content": question},
-            ]
-
-            completion = client.chat.completions.create(
-                model=self.model_id,
-                messages=messages,
-                max_tokens=512,
-                temperature=0.3,
-                top_p=0.9,
+            result = self._success_response(question, answer_text, confidence, sources, start_time)
+            self._cache_answer(question, prepared, result)
+            return result
+        except Exception as e:
+            self._error(question, start_time, e)
+            raise
+
+    async def answer_question_async(self, question, category=None):
+        """
+        Async variant of `answer_question` that never blocks the event loop:
+        retrieval runs in the bounded embedding executor and the LLM call goes through
+        the async client, limited to `llm_max_concurrency` calls in flight.
+        """
+        logger.info(f"Question received: '{question}'")
+        start_time = time.perf_counter()
+
+        try:
+            q_emb = await self._embed_query_async(question)
+            loop = asyncio.get_running_loop()
+            prepared = await loop.run_in_executor(
+                get_embed_executor(), self._prepare, question, q_emb, category
             )
-            
-            answer_text = completion.choices[0].message.content
+            return await self._complete_async(question, prepared, start_time)
+        except Exception as e:
+            self._error(question, start_time, e)
+            raise
 
-            duration = time.perf_counter() - start_time
-            latency_ms = duration * 1000
+    async def _complete_async(self, question, prepared, start_time):
+        resolved = self._resolve_without_llm(question, prepared, start_time)
+        if resolved is not None:
+            return resolved
 
-            REQUEST_COUNT.labels(endpoint="/answer", status="success").inc()
-            RESPONSE_TIME.labels(strategy="default").observe(duration)
-            CONFIDENCE_SCORE.observe(confidence)
+        if self._in_flight is None:
+            return await self._generate_async(question, prepared, start_time)
 
-            if confidence < 0.3:
-                logger.warning(f"Low confidence detected for question: '{question}'. Confidence: {confidence:.2f}")
+        # Identical questions retrieving the same entries share one in-flight LLM call.
+        key = (prepared.category, normalize_question(question), tuple(prepared.retrieval[1]))
+        result, shared = await self._in_flight.run(
+            key, lambda: self._generate_async(question, prepared, start_time)
+        )
+        if shared:
+            return self._coalesced_response(question, result, start_time)
+        return result
+
+    async def _generate_async(self, question, prepared, start_time):
+        context, sources, confidence = prepared.retrieval
+        try:
+            async with self._llm_semaphore:
+                answer_text = await self._generator.agenerate(self._build_messages(question, context), **GENERATION_PARAMS)
+        except LLMUnavailable as e:
+            return self._degraded_response(question, prepared, start_time, e)
 
-            logger.info(f"Answer generated in {latency_ms:.0f}ms with confidence {confidence:.2f}. Sources: {sources}")
+        result = self._success_response(question, answer_text, confidence, sources, start_time)
+        self._cache_answer(question, prepared, result)
+        return result
 
-            return {
-                "answer": answer_text,
-                "confidence": confidence,
-                "sources": sources,
-                "latency_ms": latency_ms,
-            }
+    async def answer_batch_async(self, questions, max_concurrency=BATCH_MAX_CONCURRENCY, category=None):
+        """
+        Answers several questions with one batched retrieval pass, then dispatches
+        the LLM calls concurrently (at most `max_concurrency` at a time).
+        Results keep the input order; a failing item carries an "error" instead of
+        failing the whole batch.
+        """
+        logger.info(f"Batch of {len(questions)} questions received")
+        start_time = time.perf_counter()
+
+        loop = asyncio.get_running_loop()
+        prepared_items = await loop.run_in_executor(
+            get_embed_executor(), self._prepare_batch, questions, category
+        )
+
+        batch_semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def answer_one(question, prepared):
+            async with batch_semaphore:
+                try:
+                    result = await self._complete_async(question, prepared, start_time)
+                    return {"question": question, **result}
+                except Exception as e:
+                    self._error(question, start_time, e)
+                    return {"question": question, "error": str(e)}
+
+        return await asyncio.gather(
+            *(answer_one(question, prepared) for question, prepared in zip(questions, prepared_items))
+        )
+
+    async def stream_answer(self, question, category=None):
+        """
+        Streams the answer as (event, data) tuples: a "context" event with the sources
+        and confidence right after retrieval, one "token" event per generated chunk,
+        then a "done" event (or "error" if generation fails mid-stream).
+        """
+        logger.info(f"Streaming question received: '{question}'")
+        start_time = time.perf_counter()
+
+        try:
+            q_emb = await self._embed_query_async(question)
+            loop = asyncio.get_running_loop()
+            prepared = await loop.run_in_executor(
+                get_embed_executor(), self._prepare, question, q_emb, category
+            )
+            resolved = self._resolve_without_llm(question, prepared, start_time)
+            if resolved is not None:
+                yield "context", {"sources": resolved["sources"], "confidence": resolved["confidence"]}
+                yield "token", {"text": resolved["answer"]}
+                yield "done", {
+                    "latency_ms": resolved["latency_ms"],
+                    "cached": resolved.get("cached", False),
+                    "path": resolved["path"],
+                }
+                return
+
+            context, sources, confidence = prepared.retrieval
+            yield "context", {"sources": sources, "confidence": confidence}
+
+            answer_parts = []
+            try:
+                async with self._llm_semaphore:
+                    async for text in self._generator.astream(self._build_messages(question, context), **GENERATION_PARAMS):
+                        if not answer_parts:
+                            TIME_TO_FIRST_TOKEN.labels(strategy="default").observe(time.perf_counter() - start_time)
+                        answer_parts.append(text)
+                        yield "token", {"text": text}
+            except LLMUnavailable as e:
+                if answer_parts:
+                    raise
+                degraded = self._degraded_response(question, prepared, start_time, e)
+                yield "token", {"text": degraded["answer"]}
+                yield "done", {"latency_ms": degraded["latency_ms"], "cached": False, "path": degraded["path"]}
+                return
+
+            result = self._success_response(question, "".join(answer_parts), confidence, sources, start_time)
+            self._cache_answer(question, prepared, result)
+            yield "done", {"latency_ms": result["latency_ms"], "cached": False, "path": "llm"}
         except Exception as e:
-            duration = time.perf_counter() - start_time
-            REQUEST_COUNT.labels(endpoint="/answer", status="error").inc()
-            RESPONSE_TIME.labels(strategy="default").observe(duration)
-            logger.error(f"Error answering question '{question}': {e}", exc_info=True)
-            raise
+            self._error(question, start_time, e)
+            yield "error", {"detail": str(e)}
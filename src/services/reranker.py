@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from src.routes.metrics import RERANK_LATENCY, RERANK_TOTAL
+
+logger = logging.getLogger("faq_api")
+
+
+class CrossEncoderReranker:
+    """
+    Re-orders retrieved candidates with a cross-encoder, which reads the question and
+    each candidate together: all (question, candidate) pairs of a call are scored in a
+    single batched forward pass and the best `top_k` are kept.
+
+    The cost of a call is estimated from the running average latency per pair; when
+    the estimate exceeds `budget_ms` the candidates keep their retrieval order. The
+    estimate decays while re-ranking is skipped, so it is retried once load drops.
+    """
+
+    def __init__(self, model, top_k=3, budget_ms=150.0, smoothing=0.2, decay=0.9):
+        self.model = model
+        self.top_k = top_k
+        self.budget_ms = budget_ms
+        self.smoothing = smoothing
+        self.decay = decay
+        self._ms_per_pair = None
+        self._lock = threading.Lock()
+
+    def estimate_ms(self, n_pairs):
+        return 0.0 if self._ms_per_pair is None else self._ms_per_pair * n_pairs
+
+    def _within_budget(self, n_pairs):
+        if not self.budget_ms or self.estimate_ms(n_pairs) <= self.budget_ms:
+            return True
+        with self._lock:
+            self._ms_per_pair *= self.decay
+        return False
+
+    def _observe(self, elapsed_ms, n_pairs):
+        with self._lock:
+            per_pair = elapsed_ms / n_pairs
+            if self._ms_per_pair is None:
+                self._ms_per_pair = per_pair
+            else:
+                self._ms_per_pair += self.smoothing * (per_pair - self._ms_per_pair)
+
+    def rerank(self, questions, passages, ranked):
+        """
+        `ranked` holds, per question, the retrieval (scores, indices) of its candidates
+        and `passages(idx)` the text of corpus entry `idx`. Returns the best `top_k`
+        (scores, indices) per question; scores stay the retrieval ones, only the order
+        and the selection change.
+        """
+        pairs = [(question, passages(int(idx))) for question, (_, indices) in zip(questions, ranked) for idx in indices]
+        if not pairs or not self._within_budget(len(pairs)):
+            RERANK_TOTAL.labels(outcome="skipped").inc()
+            return [(scores[:self.top_k], indices[:self.top_k]) for scores, indices in ranked]
+
+        start_time = time.perf_counter()
+        try:
+            relevance = np.asarray(self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False))
+        except Exception as e:
+            logger.error(f"Re-ranking failed, keeping the retrieval order: {e}", exc_info=True)
+            RERANK_TOTAL.labels(outcome="error").inc()
+            return [(scores[:self.top_k], indices[:self.top_k]) for scores, indices in ranked]
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        self._observe(elapsed_ms, len(pairs))
+        RERANK_LATENCY.observe(elapsed_ms / 1000)
+        RERANK_TOTAL.labels(outcome="reranked").inc()
+
+        reranked, offset = [], 0
+        for scores, indices in ranked:
+            order = np.argsort(-relevance[offset:offset + len(indices)], kind="stable")[:self.top_k]
+            offset += len(indices)
+            reranked.append((np.asarray(scores)[order], np.asarray(indices)[order]))
+        return reranked
+
+
+def create_reranker(model_name, top_k=3, budget_ms=150.0):
+    """Loads the cross-encoder `model_name`; an empty name disables re-ranking (None)."""
+    if not model_name:
+        return None
+    from sentence_transformers import CrossEncoder
+
+    logger.info(f"Loading cross-encoder re-ranker '{model_name}'...")
+    return CrossEncoderReranker(CrossEncoder(model_name), top_k=top_k, budget_ms=budget_ms)
@@ -0,0 +1,26 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent async computations with the same key: the first caller runs
+    it, the callers arriving while it is in flight await the same result (or error).
+    The shared task is shielded, so a cancelled caller does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+
+    def __len__(self):
+        return len(self._in_flight)
+
+    async def run(self, key, coro_fn):
+        """Returns (result, shared): `shared` is True when another caller computed the result."""
+        task = self._in_flight.get(key)
+        if task is not None:
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(coro_fn())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task), False
@@ -0,0 +1,22 @@
+import re
+import string
+import unicodedata
+
+_PUNCTUATION_RE = re.compile(f"[{re.escape(string.punctuation)}’«»…]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def strip_accents(text):
+    """Removes diacritics: 'déchets' -> 'dechets'."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_question(text):
+    """
+    Normalizes a user question for cache keys: lowercase, no accents,
+    no punctuation and collapsed whitespace.
+    """
+    text = strip_accents(text.lower())
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
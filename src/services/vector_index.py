@@ -0,0 +1,437 @@
+import json
+import logging
+import math
+import mmap
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+import torch
+
+from .file_utils import atomic_path, atomic_write, remove_quietly, unique_tag
+
+logger = logging.getLogger("faq_api")
+
+INDEX_METADATA_FILE = "index.json"
+
+
+def _as_matrix(vectors):
+    if isinstance(vectors, torch.Tensor):
+        vectors = vectors.detach().cpu().numpy()
+    return np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _normalize_if_needed(matrix):
+    """Avoids a copy when the model already outputs unit vectors."""
+    if np.allclose(np.linalg.norm(matrix, axis=1), 1.0, atol=1e-4):
+        return matrix
+    return _normalize(matrix)
+
+
+def _is_memory_mapped(array):
+    """True when `array` is backed by a memory-mapped file, whose pages are read on demand."""
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def _row_mask(size, rows):
+    allowed = np.zeros(size, dtype=bool)
+    allowed[rows] = True
+    return allowed
+
+
+def _top_k(scores, k):
+    """Row-wise top-k of a (n_queries, n) score matrix, best first."""
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(candidate_scores, order, axis=1).astype(np.float32),
+        np.take_along_axis(candidates, order, axis=1).astype(np.int64),
+    )
+
+
+class VectorIndex(ABC):
+    """
+    Nearest-neighbour index over the FAQ corpus embeddings, scored by cosine similarity.
+    `search` takes one or several query vectors and returns (scores, indices) NumPy
+    arrays of shape (n_queries, k), best match first. With `rows` (corpus positions,
+    e.g. the entries of one category) only these rows are searched, in the same index.
+    """
+
+    backend = None
+    nbytes = None
+
+    def __len__(self):
+        return self.size
+
+    @abstractmethod
+    def build(self, embeddings):
+        raise NotImplementedError
+
+    @abstractmethod
+    def search(self, queries, k, rows=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def _save_data(self, directory, tag):
+        """Writes the data files, with `tag` in their names; returns {role: file name}."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _load_data(self, directory, params, files):
+        raise NotImplementedError
+
+    def params(self):
+        return {}
+
+    def save(self, directory, fingerprint=None):
+        """
+        Writes the index and its metadata (backend, parameters, corpus fingerprint).
+        Data files get names unique to this save and the metadata listing them is
+        replaced last, so readers see either the previous index or the new one.
+        """
+        os.makedirs(directory, exist_ok=True)
+        previous = _read_metadata(directory) or {}
+        files = self._save_data(directory, unique_tag())
+        metadata = {
+            "backend": self.backend,
+            "size": self.size,
+            "fingerprint": fingerprint,
+            "params": self.params(),
+            "files": files,
+        }
+        with atomic_write(os.path.join(directory, INDEX_METADATA_FILE), "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+        for name in set(previous.get("files", {}).values()) - set(files.values()):
+            remove_quietly(os.path.join(directory, name))
+
+
+class BruteForceIndex(VectorIndex):
+    """
+    Exact search over a contiguous matrix of L2-normalized float32 vectors, so that
+    scoring a query is a single dot product.
+    With quantization="int8", the matrix is scalar-quantized per dimension and the
+    best `k * rescore_factor` candidates are rescored in float32 from the original
+    vectors. These are referenced, not copied: the codes only save memory (4x against
+    float32) when the original vectors are memory-mapped, as for a saved index or
+    vectors from the embedding cache. Searches are slower than in float32, since
+    NumPy has no int8 matrix product.
+    """
+
+    backend = "brute_force"
+
+    def __init__(self, quantization=None, rescore_factor=4):
+        if quantization not in (None, "", "int8"):
+            raise ValueError(f"Unsupported quantization '{quantization}'. Expected None or 'int8'.")
+        self.quantization = quantization or None
+        self.rescore_factor = rescore_factor
+
+    def params(self):
+        return {"quantization": self.quantization, "rescore_factor": self.rescore_factor}
+
+    @property
+    def nbytes(self):
+        if self.quantization == "int8":
+            # The float32 vectors read for rescoring count unless they are memory-mapped.
+            rescore_bytes = 0 if _is_memory_mapped(self._raw) else self._raw.nbytes
+            return self._codes.nbytes + self._scale.nbytes + self._norms.nbytes + rescore_bytes
+        return self._vectors.nbytes
+
+    def build(self, embeddings):
+        matrix = _as_matrix(embeddings)
+        self.size = matrix.shape[0]
+        if self.quantization == "int8":
+            self._raw = matrix
+            self._norms = np.linalg.norm(matrix, axis=1).astype(np.float32)
+            self._quantize(matrix)
+        else:
+            self._vectors = np.ascontiguousarray(_normalize_if_needed(matrix))
+        return self
+
+    def _quantize(self, matrix, chunk_size=8192):
+        norms = np.where(self._norms == 0, 1.0, self._norms)[:, None]
+        max_abs = np.zeros(matrix.shape[1], dtype=np.float32)
+        for start in range(0, self.size, chunk_size):
+            chunk = matrix[start:start + chunk_size] / norms[start:start + chunk_size]
+            max_abs = np.maximum(max_abs, np.abs(chunk).max(axis=0))
+        self._scale = np.where(max_abs == 0, 1.0, max_abs / 127).astype(np.float32)
+
+        self._codes = np.empty(matrix.shape, dtype=np.int8)
+        for start in range(0, self.size, chunk_size):
+            chunk = matrix[start:start + chunk_size] / norms[start:start + chunk_size]
+            self._codes[start:start + chunk_size] = np.clip(np.rint(chunk / self._scale), -127, 127)
+
+    def search(self, queries, k, rows=None):
+        queries = _normalize(_as_matrix(queries))
+        k = min(k, self.size if rows is None else len(rows))
+        if self.quantization == "int8":
+            return self._search_int8(queries, k, rows)
+        scores = queries @ self._vectors.T
+        if rows is None:
+            return _top_k(scores, k)
+        scores, indices = _top_k(scores[:, rows], k)
+        return scores, rows[indices]
+
+    def _search_int8(self, queries, k, rows=None, chunk_size=16384):
+        allowed = None if rows is None else _row_mask(self.size, rows)
+        n_candidates = min(self.size if rows is None else len(rows), k * self.rescore_factor)
+        scaled_queries = (queries * self._scale).T
+        # Approximate scores chunk by chunk, keeping only the best candidates of each chunk.
+        chunk_scores, chunk_rows = [], []
+        for start in range(0, self.size, chunk_size):
+            approx = (self._codes[start:start + chunk_size].astype(np.float32) @ scaled_queries).T
+            if allowed is not None:
+                approx[:, ~allowed[start:start + chunk_size]] = -np.inf
+            scores, rows = _top_k(approx, min(n_candidates, approx.shape[1]))
+            chunk_scores.append(scores)
+            chunk_rows.append(rows + start)
+        _, best = _top_k(np.concatenate(chunk_scores, axis=1), n_candidates)
+        candidates = np.take_along_axis(np.concatenate(chunk_rows, axis=1), best, axis=1)
+
+        all_scores = np.empty((len(queries), k), dtype=np.float32)
+        all_indices = np.empty((len(queries), k), dtype=np.int64)
+        for i, query in enumerate(queries):
+            rows = np.sort(candidates[i])
+            exact = (self._raw[rows] @ query) / np.where(self._norms[rows] == 0, 1.0, self._norms[rows])
+            top = np.argsort(-exact)[:k]
+            all_scores[i] = exact[top]
+            all_indices[i] = rows[top]
+        return all_scores, all_indices
+
+    def _save_data(self, directory, tag):
+        files = {"embeddings": f"embeddings.{tag}.npy"}
+        with atomic_write(os.path.join(directory, files["embeddings"])) as f:
+            np.save(f, self._raw if self.quantization == "int8" else self._vectors)
+        if self.quantization == "int8":
+            files["int8"] = f"int8.{tag}.npz"
+            with atomic_write(os.path.join(directory, files["int8"])) as f:
+                np.savez(f, codes=self._codes, scale=self._scale, norms=self._norms)
+        return files
+
+    def _load_data(self, directory, params, files):
+        vectors = np.load(os.path.join(directory, files["embeddings"]), mmap_mode="r")
+        self.size = vectors.shape[0]
+        if self.quantization == "int8":
+            data = np.load(os.path.join(directory, files["int8"]))
+            self._raw = vectors
+            self._codes, self._scale, self._norms = data["codes"], data["scale"], data["norms"]
+        else:
+            self._vectors = vectors
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file index: vectors are clustered with spherical k-means and a query
+    only scores the vectors of its `nprobe` closest clusters (more if these hold
+    fewer than k vectors, so that every result is a real hit). Pure NumPy.
+    """
+
+    backend = "ivf"
+
+    def __init__(self, nlist=None, nprobe=8, n_iter=10, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.n_iter = n_iter
+        self.seed = seed
+
+    def params(self):
+        return {"nlist": self.nlist, "nprobe": self.nprobe}
+
+    @property
+    def nbytes(self):
+        return self._vectors.nbytes + self._centroids.nbytes + self._assignments.nbytes
+
+    def build(self, embeddings):
+        self._vectors = _normalize(_as_matrix(embeddings))
+        self.size = self._vectors.shape[0]
+        nlist = min(self.nlist or max(1, int(math.sqrt(self.size))), self.size)
+
+        rng = np.random.default_rng(self.seed)
+        centroids = self._vectors[rng.choice(self.size, size=nlist, replace=False)]
+        for _ in range(self.n_iter):
+            assignments = self._assign(centroids)
+            for c in range(nlist):
+                members = self._vectors[assignments == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        self._set_lists(centroids, self._assign(centroids))
+        self.nlist = nlist
+        return self
+
+    def _assign(self, centroids, chunk_size=8192):
+        assignments = np.empty(self.size, dtype=np.int64)
+        for start in range(0, self.size, chunk_size):
+            chunk = self._vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+
+    def _set_lists(self, centroids, assignments):
+        self._centroids = centroids
+        self._assignments = assignments
+        self._lists = [np.flatnonzero(assignments == c) for c in range(len(centroids))]
+        self._list_sizes = np.array([len(members) for members in self._lists], dtype=np.int64)
+
+    def search(self, queries, k, rows=None):
+        queries = _normalize(_as_matrix(queries))
+        allowed, list_sizes = None, self._list_sizes
+        if rows is not None:
+            allowed = _row_mask(self.size, rows)
+            list_sizes = np.bincount(self._assignments[rows], minlength=len(self._centroids))
+        k = min(k, self.size if rows is None else len(rows))
+        nprobe = min(self.nprobe, len(self._centroids))
+
+        all_scores = np.empty((len(queries), k), dtype=np.float32)
+        all_indices = np.empty((len(queries), k), dtype=np.int64)
+        centroid_scores = queries @ self._centroids.T
+        for i, query in enumerate(queries):
+            # The nprobe closest lists, and further ones while they hold fewer than k vectors.
+            order = np.argsort(-centroid_scores[i])
+            n_probes = max(nprobe, int(np.searchsorted(np.cumsum(list_sizes[order]), k)) + 1)
+            candidates = np.concatenate([self._lists[c] for c in order[:n_probes]])
+            if allowed is not None:
+                candidates = candidates[allowed[candidates]]
+            scores = self._vectors[candidates] @ query
+            top = np.argsort(-scores)[:k]
+            all_scores[i] = scores[top]
+            all_indices[i] = candidates[top]
+        return all_scores, all_indices
+
+    def _save_data(self, directory, tag):
+        files = {"ivf": f"ivf.{tag}.npz"}
+        with atomic_write(os.path.join(directory, files["ivf"])) as f:
+            np.savez(f, vectors=self._vectors, centroids=self._centroids, assignments=self._assignments)
+        return files
+
+    def _load_data(self, directory, params, files):
+        data = np.load(os.path.join(directory, files["ivf"]))
+        self._vectors = data["vectors"]
+        self.size = self._vectors.shape[0]
+        self.nlist = params.get("nlist")
+        self._set_lists(data["centroids"], data["assignments"])
+
+
+class HNSWIndex(VectorIndex):
+    """Hierarchical navigable small world graph, backed by the optional `hnswlib` package."""
+
+    backend = "hnsw"
+
+    def __init__(self, m=16, ef_construction=200, ef_search=64):
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+
+    def params(self):
+        return {"m": self.m, "ef_construction": self.ef_construction, "ef_search": self.ef_search, "dim": self._dim}
+
+    @staticmethod
+    def _hnswlib():
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise RuntimeError("The 'hnsw' vector index backend requires the hnswlib package.") from e
+        return hnswlib
+
+    def build(self, embeddings):
+        vectors = _as_matrix(embeddings)
+        self.size, self._dim = vectors.shape
+        self._index = self._hnswlib().Index(space="cosine", dim=self._dim)
+        self._index.init_index(max_elements=self.size, ef_construction=self.ef_construction, M=self.m)
+        self._index.add_items(vectors, np.arange(self.size))
+        self._index.set_ef(self.ef_search)
+        return self
+
+    def search(self, queries, k, rows=None):
+        k = min(k, self.size if rows is None else len(rows))
+        self._index.set_ef(max(self.ef_search, k))
+        if rows is None:
+            labels, distances = self._index.knn_query(_as_matrix(queries), k=k)
+        else:
+            # The graph walk skips the other rows when it collects results.
+            allowed = _row_mask(self.size, rows)
+            labels, distances = self._index.knn_query(
+                _as_matrix(queries), k=k, num_threads=1, filter=lambda label: bool(allowed[label])
+            )
+        return (1.0 - distances).astype(np.float32), labels.astype(np.int64)
+
+    def _save_data(self, directory, tag):
+        files = {"hnsw": f"hnsw.{tag}.bin"}
+        with atomic_path(os.path.join(directory, files["hnsw"])) as tmp_path:
+            self._index.save_index(tmp_path)
+        return files
+
+    def _load_data(self, directory, params, files):
+        self._dim = params["dim"]
+        self._index = self._hnswlib().Index(space="cosine", dim=self._dim)
+        self._index.load_index(os.path.join(directory, files["hnsw"]))
+        self.size = self._index.get_current_count()
+        self._index.set_ef(self.ef_search)
+
+
+INDEX_BACKENDS = {
+    BruteForceIndex.backend: BruteForceIndex,
+    IVFIndex.backend: IVFIndex,
+    HNSWIndex.backend: HNSWIndex,
+}
+
+
+def create_index(backend, **params):
+    """Instantiates an empty index for the given backend name."""
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(f"Unknown vector index backend '{backend}'. Expected one of {sorted(INDEX_BACKENDS)}.")
+    return INDEX_BACKENDS[backend](**params)
+
+
+def _read_metadata(directory):
+    try:
+        with open(os.path.join(directory, INDEX_METADATA_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def load_index(directory, fingerprint=None, backend=None, params=None):
+    """
+    Loads a saved index. Returns None if there is none, or if it was built for
+    another corpus (different fingerprint), with another `backend` or with other
+    values for the given `params`.
+    """
+    metadata = _read_metadata(directory)
+    if metadata is None or "files" not in metadata:
+        return None
+
+    if fingerprint is not None and metadata.get("fingerprint") != fingerprint:
+        logger.info(f"Saved vector index in '{directory}' is stale, it will be rebuilt.")
+        return None
+    saved_params = metadata.get("params", {})
+    if (backend is not None and metadata.get("backend") != backend) or any(
+        saved_params.get(key) != value for key, value in (params or {}).items()
+    ):
+        logger.info(f"Saved vector index in '{directory}' was built with other settings, it will be rebuilt.")
+        return None
+
+    params = saved_params
+    index_cls = INDEX_BACKENDS[metadata["backend"]]
+    constructor_params = {key: value for key, value in params.items() if key != "dim"}
+    index = index_cls(**constructor_params)
+    try:
+        index._load_data(directory, params, metadata["files"])
+    except (OSError, ValueError, KeyError) as e:
+        # e.g. files removed by a concurrent save after the metadata was read
+        logger.warning(f"Could not load the saved vector index in '{directory}', it will be rebuilt: {e}")
+        return None
+    return index
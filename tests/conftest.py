@@ -1,6 +1,5 @@
 import json
 import os
-import pandas as pd
 import pytest
 import torch
 from unittest.mock import MagicMock, patch, mock_open
@@ -10,13 +9,14 @@ from fastapi import HTTPException
 from src.main import app
 from src.services.rag_service import RAGService, get_llm_client
 from src.services.data_loader import load_faq_data
+from src.services.faq_store import FAQStore
 from sentence_transformers import SentenceTransformer, util
 
 @pytest.fixture(scope="function")
 def client():
     return TestClient(app)
 
-MOCK_FAQ_DATA_DF = pd.DataFrame([
+MOCK_FAQ_DATA_DF = FAQStore.from_dicts([
     {"id": "1", "question": "Q1", "answer": "A1", "category": "Cat1", "theme": "Theme1", "tags": ["tag1", "tag2"]},
     {"id": "2", "question": "Q2", "answer": "A2", "category": "Cat2", "theme": "Theme2", "tags": ["tag3"]},
 ])
@@ -66,15 +66,14 @@ def mock_load_faq_data_no_id():
 @pytest.fixture
 def mock_load_faq_data_rag():
     with patch("src.services.rag_service.load_faq_data") as mock_data_loader:
-        df = pd.DataFrame(MOCK_FAQ_DATA["faq"])
-        mock_data_loader.return_value = df
+        mock_data_loader.return_value = FAQStore.from_dicts(MOCK_FAQ_DATA["faq"])
         yield mock_data_loader
 
 @pytest.fixture
 def mock_faq_data_for_rag_service():
     """Provides a consistent mock for load_faq_data for RAGService functional tests."""
     with patch("src.services.rag_service.load_faq_data") as mock_load_faq:
-        mock_load_faq.return_value = pd.DataFrame(MOCK_FAQ_DATA_RAG_SERVICE_FUNCTIONAL)
+        mock_load_faq.return_value = FAQStore.from_dicts(MOCK_FAQ_DATA_RAG_SERVICE_FUNCTIONAL)
         yield mock_load_faq
 
 @pytest.fixture
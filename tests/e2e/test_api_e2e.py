@@ -1,7 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
-import pandas as pd
 import json
 
 from src.main import app
@@ -9,6 +8,7 @@ from src.models import AnswerResponse, FAQ
 from src.routes.api_router import get_rag_service, get_faq_df
 from src.services.rag_service import RAGService
 from src.services.data_loader import load_faq_data
+from src.services.faq_store import FAQStore
 
 from tests.conftest import MOCK_FAQ_DATA_RAG_SERVICE_FUNCTIONAL 
 
@@ -18,7 +18,7 @@ def setup_e2e_mocks(mock_functional_sentence_transformer, mock_faq_data_for_rag_
     Sets up common mocks required for E2E tests, ensuring RAGService uses mocked LLM/embeddings
     and FAQ data while allowing the API routes to be tested end-to-end.
     """
-    app.dependency_overrides[get_faq_df] = lambda: pd.DataFrame(MOCK_FAQ_DATA_RAG_SERVICE_FUNCTIONAL)
+    app.dependency_overrides[get_faq_df] = lambda: FAQStore.from_dicts(MOCK_FAQ_DATA_RAG_SERVICE_FUNCTIONAL)
     yield
     app.dependency_overrides = {}
 
@@ -1,5 +1,6 @@
 import pytest
 import os
+import numpy as np
 import pandas as pd
 from unittest.mock import MagicMock, patch
 import torch
@@ -46,10 +47,11 @@ class TestRAGServiceFunctional:
        
         question = "Question completement hors sujet."
 
-        with patch("src.services.rag_service.util.cos_sim", return_value=torch.tensor([[0.0, 0.0, 0.0]])) as mock_cos_sim:
+        low_scores = (np.array([[0.0, 0.0, 0.0]], dtype=np.float32), np.array([[0, 1, 2]]))
+        with patch.object(service._index, "search", return_value=low_scores) as mock_search:
             context, sources, confidence = service._find_context(question)
             assert confidence < 0.1
-            mock_cos_sim.assert_called_once()
+            mock_search.assert_called_once()
         call_args_list = service._embed_model.encode.call_args_list
        
         user_question_encoded = False
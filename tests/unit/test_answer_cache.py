@@ -0,0 +1,65 @@
+import numpy as np
+from unittest.mock import patch
+
+from src.services.answer_cache import AnswerCache
+from src.services.text_utils import normalize_question
+
+RESULT = {"answer": "Bonjour", "confidence": 0.9, "sources": ["EC001"], "latency_ms": 10.0}
+
+
+def test_normalize_question():
+    assert normalize_question("  Où  jeter mes DÉCHETS ?! ") == "ou jeter mes dechets"
+
+def test_exact_hit_on_normalized_question():
+    cache = AnswerCache()
+    cache.put("Où jeter mes déchets ?", np.array([1.0, 0.0]), RESULT)
+    assert cache.get("ou jeter mes dechets") == RESULT
+
+def test_semantic_hit_above_threshold():
+    cache = AnswerCache(similarity_threshold=0.9)
+    cache.put("Comment obtenir un acte de naissance ?", np.array([1.0, 0.0]), RESULT)
+    assert cache.get("Je veux un acte de naissance", np.array([0.99, 0.05])) == RESULT
+    assert cache.get("Horaires de la déchetterie", np.array([0.0, 1.0])) is None
+
+def test_lru_eviction():
+    cache = AnswerCache(max_entries=2)
+    cache.put("q1", np.array([1.0, 0.0]), RESULT)
+    cache.put("q2", np.array([0.0, 1.0]), RESULT)
+    cache.get("q1")
+    cache.put("q3", np.array([-1.0, 0.0]), RESULT)
+    assert len(cache) == 2
+    assert cache.get("q2") is None
+    assert cache.get("q1") == RESULT
+
+def test_ttl_expiration():
+    cache = AnswerCache(ttl_seconds=10)
+    with patch("src.services.answer_cache.time.monotonic", return_value=100.0):
+        cache.put("q1", np.array([1.0, 0.0]), RESULT)
+    with patch("src.services.answer_cache.time.monotonic", return_value=111.0):
+        assert cache.get("q1") is None
+
+def test_bind_clears_cache_when_faq_changes():
+    cache = AnswerCache()
+    cache.bind("v1")
+    cache.put("q1", np.array([1.0, 0.0]), RESULT)
+    cache.bind("v1")
+    assert len(cache) == 1
+    cache.bind("v2")
+    assert len(cache) == 0
+
+def test_put_drops_answers_built_from_another_faq():
+    cache = AnswerCache()
+    cache.bind("v2")
+    cache.put("q1", np.array([1.0, 0.0]), RESULT, fingerprint="v1")
+    assert len(cache) == 0
+    cache.put("q1", np.array([1.0, 0.0]), RESULT, fingerprint="v2")
+    assert cache.get("q1") == RESULT
+
+def test_cache_entries_are_scoped_by_category():
+    cache = AnswerCache(max_entries=4, similarity_threshold=0.9)
+    q_emb = np.array([1.0, 0.0, 0.0])
+    cache.put("Comment obtenir un acte ?", q_emb, {"answer": "A", "confidence": 0.9, "sources": []}, scope="etat_civil")
+
+    assert cache.get("Comment obtenir un acte ?", q_emb, scope="etat_civil")["answer"] == "A"
+    assert cache.get("Comment obtenir un acte ?", q_emb) is None
+    assert cache.get("Comment obtenir un acte ?", q_emb, scope="urbanisme") is None
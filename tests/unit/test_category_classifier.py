@@ -0,0 +1,26 @@
+import numpy as np
+
+from src.services.category_classifier import CategoryClassifier
+
+EMBEDDINGS = np.array([
+    [1.0, 0.0, 0.0],
+    [0.9, 0.1, 0.0],
+    [0.0, 1.0, 0.0],
+    [0.0, 0.9, 0.1],
+], dtype=np.float32)
+CATEGORIES = ["etat_civil", "etat_civil", "urbanisme", "urbanisme"]
+
+
+def test_predicts_nearest_category():
+    classifier = CategoryClassifier(min_margin=0.05).fit(EMBEDDINGS, CATEGORIES)
+    assert classifier.labels == ["etat_civil", "urbanisme"]
+    assert classifier.predict(np.array([[0.95, 0.05, 0.0], [0.1, 1.0, 0.0]])) == ["etat_civil", "urbanisme"]
+
+def test_ambiguous_query_is_not_routed():
+    classifier = CategoryClassifier(min_margin=0.05).fit(EMBEDDINGS, CATEGORIES)
+    assert classifier.predict(np.array([0.5, 0.5, 0.0])) == [None]
+
+def test_entries_without_category_are_ignored():
+    classifier = CategoryClassifier().fit(EMBEDDINGS, ["etat_civil", "", "", ""])
+    assert classifier.labels == ["etat_civil"]
+    assert classifier.predict(np.array([[0.0, 1.0, 0.0]])) == ["etat_civil"]
@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+from src.services.context_builder import ApproximateTokenCounter, ContextBuilder, get_token_counter
+
+ENTRIES = [
+    (0.90, "EC001", "Comment obtenir un acte de naissance ?", "Faites la demande en ligne sur service-public.fr ou à la mairie.", "etat_civil", "naissance, acte"),
+    (0.85, "EC009", "Où demander un extrait de naissance ?", "Faites la demande en ligne sur service-public.fr ou à la mairie !", "etat_civil", "extrait"),
+    (0.80, "EC002", "Quels documents pour se marier ?", "Une pièce d'identité et un justificatif de domicile.", "etat_civil", "mariage"),
+    (0.30, "URB001", "Comment déposer un permis de construire ?", "Le permis se dépose à la mairie.", "urbanisme", "permis"),
+]
+
+
+def test_approximate_counter_truncates_on_word_boundary():
+    counter = ApproximateTokenCounter()
+    assert counter.count("abcdefgh") == 2
+    truncated = counter.truncate("un deux trois quatre cinq six sept", max_tokens=4)
+    assert truncated == "un deux trois…"
+    assert counter.truncate("court", max_tokens=4) == "court"
+
+def test_build_deduplicates_overlapping_answers():
+    builder = ContextBuilder(ApproximateTokenCounter(), max_tokens=0)
+    context, sources = builder.build(ENTRIES)
+    assert sources == ["EC001", "EC002", "URB001"]
+    assert "Q: Comment obtenir un acte de naissance ?" in context
+
+def test_build_drops_entries_below_relative_score():
+    builder = ContextBuilder(ApproximateTokenCounter(), max_tokens=0, min_relative_score=0.5)
+    _, sources = builder.build(ENTRIES)
+    assert "URB001" not in sources
+
+def test_build_enforces_token_budget_and_keeps_best_entry():
+    counter = ApproximateTokenCounter()
+    builder = ContextBuilder(counter, max_tokens=40, max_answer_tokens=8)
+    context, sources = builder.build(ENTRIES)
+    assert sources[0] == "EC001"
+    assert counter.count(context) <= 40
+    assert "…" in context
+
+    _, sources = ContextBuilder(counter, max_tokens=1).build(ENTRIES)
+    assert sources == ["EC001"]
+
+def test_get_token_counter_falls_back_to_approximation():
+    get_token_counter.cache_clear()
+    with patch("transformers.AutoTokenizer.from_pretrained", side_effect=OSError("offline")):
+        assert isinstance(get_token_counter("some/model"), ApproximateTokenCounter)
+    get_token_counter.cache_clear()
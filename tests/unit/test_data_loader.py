@@ -1,32 +1,98 @@
-import pandas as pd
+import json
 import pytest
-from src.services.data_loader import load_faq_data
+from unittest.mock import patch
+
+from src.services import data_loader
+from src.services.data_loader import get_faq_catalog, load_faq_data
+from src.services.faq_store import FAQRecord, FAQStore
 
 def test_load_faq_data_success(mock_load_faq_data_success):
     mock_file, mock_exists = mock_load_faq_data_success
     load_faq_data.cache_clear()
-    df = load_faq_data("dummy_path.json")
-    assert not df.empty
-    assert len(df) == 3
-    assert df.loc[0, "question"] == "Q1"
-    assert "id" in df.columns
+    faq = load_faq_data("dummy_path.json")
+    assert not faq.empty
+    assert len(faq) == 3
+    assert faq[0].question == "Q1"
+    assert faq.get("2").keywords == ("kw2",)
     mock_file.assert_called_once_with("dummy_path.json", "r", encoding="utf-8")
 
 def test_load_faq_data_file_not_found(): 
     load_faq_data.cache_clear()
-    df = load_faq_data("non_existent_file.json")
-    assert df.empty
+    faq = load_faq_data("non_existent_file.json")
+    assert faq.empty
 
 def test_load_faq_data_invalid_json(mock_load_faq_data_invalid_json):
     mock_file = mock_load_faq_data_invalid_json
     load_faq_data.cache_clear()
-    df = load_faq_data("invalid.json")
-    assert df.empty
+    faq = load_faq_data("invalid.json")
+    assert faq.empty
     mock_file.assert_called_once_with("invalid.json", "r", encoding="utf-8")
 
 def test_load_faq_data_missing_id_column(mock_load_faq_data_no_id):
     mock_file = mock_load_faq_data_no_id
     load_faq_data.cache_clear()
-    df = load_faq_data("no_id.json")
-    assert df.empty
-    mock_file.assert_called_once_with("no_id.json", "r", encoding="utf-8")
\ No newline at end of file
+    faq = load_faq_data("no_id.json")
+    assert faq.empty
+    mock_file.assert_called_once_with("no_id.json", "r", encoding="utf-8")
+
+def test_load_faq_data_streams_large_files(tmp_path):
+    path = tmp_path / "faq.json"
+    path.write_text(json.dumps({"faq": [{"id": "1", "question": "Q1", "answer": "A1"}]}), encoding="utf-8")
+    streamed = iter([{"id": "1", "question": "Q1", "answer": "A1"}])
+    load_faq_data.cache_clear()
+    with patch.object(data_loader, "FAQ_STREAMING_MIN_MB", 1e-6), \
+            patch.object(data_loader, "_iter_entries_streaming", return_value=streamed) as mock_stream:
+        faq = load_faq_data(str(path))
+    load_faq_data.cache_clear()
+
+    mock_stream.assert_called_once_with(str(path))
+    assert faq.column("question") == ["Q1"]
+
+def test_failed_reload_keeps_the_cached_faq(tmp_path):
+    path = tmp_path / "faq.json"
+    path.write_text(json.dumps({"faq": [{"id": "1", "question": "Q1", "answer": "A1"}]}), encoding="utf-8")
+    load_faq_data.cache_clear()
+    try:
+        faq = load_faq_data(str(path))
+        path.write_text("{not json", encoding="utf-8")
+
+        with pytest.raises(ValueError):
+            load_faq_data(str(path), reload=True)
+        assert load_faq_data(str(path)) is faq
+
+        path.write_text(json.dumps({"faq": [{"id": "2", "question": "Q2", "answer": "A2"}]}), encoding="utf-8")
+        assert load_faq_data(str(path), reload=True).column("id") == ["2"]
+        assert load_faq_data(str(path)).column("id") == ["2"]
+    finally:
+        load_faq_data.cache_clear()
+
+def test_faq_store_keeps_extra_fields_and_builds_dataframe_once():
+    faq = FAQStore.from_dicts([
+        {"id": "1", "question": "Q1", "answer": "A1", "theme": "T1", "tags": ["a"]},
+        {"id": "2", "question": None, "answer": "A2", "keywords": "kw"},
+    ])
+
+    assert faq.get("1").to_dict() == {
+        "id": "1", "question": "Q1", "answer": "A1", "category": "", "keywords": [], "theme": "T1", "tags": ["a"],
+    }
+    assert faq[1] == FAQRecord(id="2", question="", answer="A2", keywords=("kw",))
+    assert faq.to_dataframe() is faq.to_dataframe()
+    assert faq.to_dataframe().loc[0, "theme"] == "T1"
+    with pytest.raises(KeyError):
+        faq.column("theme")
+
+def test_get_faq_catalog_is_rebuilt_only_when_data_changes():
+    entries = [
+        {"id": "1", "question": "Q1", "answer": "A1", "category": "Cat1"},
+        {"id": "2", "question": "Q2", "answer": "A2", "category": "Cat2"},
+    ]
+    faq = FAQStore.from_dicts(entries)
+    catalog = get_faq_catalog(faq)
+
+    assert get_faq_catalog(faq) is catalog
+    assert catalog.by_id["2"].question == "Q2"
+    assert catalog.list_body.startswith(b'[{"id":"1"')
+
+    updated = get_faq_catalog(FAQStore.from_dicts([entries[0], {**entries[1], "answer": "A2 bis"}]))
+    assert updated is not catalog
+    assert updated.etag != catalog.etag
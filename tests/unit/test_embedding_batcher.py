@@ -0,0 +1,69 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.services.embedding_batcher import QueryEmbeddingBatcher
+
+
+def test_concurrent_queries_are_encoded_together():
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return [f"emb:{t}" for t in texts]
+
+    batcher = QueryEmbeddingBatcher(encode, max_batch_size=8, window_ms=200)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(batcher.embed, ["q1", "q2", "q3", "q4"]))
+    finally:
+        batcher.close()
+
+    assert results == ["emb:q1", "emb:q2", "emb:q3", "emb:q4"]
+    assert sum(len(c) for c in calls) == 4
+    assert len(calls) < 4
+
+def test_batch_size_is_capped():
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return list(texts)
+
+    batcher = QueryEmbeddingBatcher(encode, max_batch_size=2, window_ms=100)
+    try:
+        futures = [batcher.submit(f"q{i}") for i in range(5)]
+        assert [f.result(timeout=5) for f in futures] == [f"q{i}" for i in range(5)]
+    finally:
+        batcher.close()
+
+    assert max(len(c) for c in calls) <= 2
+
+def test_encoding_error_is_propagated_to_callers():
+    def encode(texts):
+        raise RuntimeError("model failure")
+
+    batcher = QueryEmbeddingBatcher(encode, window_ms=1)
+    try:
+        with pytest.raises(RuntimeError, match="model failure"):
+            batcher.embed("q1")
+    finally:
+        batcher.close()
+
+def test_cancelled_caller_does_not_stop_the_batcher():
+    import asyncio
+
+    batcher = QueryEmbeddingBatcher(lambda texts: list(texts), window_ms=200)
+
+    async def scenario():
+        waiting = asyncio.ensure_future(asyncio.wrap_future(batcher.submit("q1")))
+        await asyncio.sleep(0)
+        waiting.cancel()  # e.g. the client disconnected while its batch was forming
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        return await asyncio.wait_for(asyncio.wrap_future(batcher.submit("q2")), timeout=5)
+
+    try:
+        assert asyncio.run(scenario()) == "q2"
+        assert batcher._thread.is_alive()
+    finally:
+        batcher.close()
@@ -0,0 +1,79 @@
+import json
+import os
+
+import numpy as np
+from unittest.mock import MagicMock
+
+from src.services.embedding_store import EmbeddingStore, content_hash
+
+
+def make_encoder():
+    encoder = MagicMock(side_effect=lambda texts: np.array([[float(len(t)), 1.0] for t in texts]))
+    return encoder
+
+
+def test_get_or_encode_populates_cache(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "org/model")
+    encoder = make_encoder()
+
+    vectors = store.get_or_encode(["a", "bb"], encoder)
+
+    encoder.assert_called_once_with(["a", "bb"])
+    assert vectors.shape == (2, 2)
+    assert vectors.dtype == np.float32
+    manifest = json.loads((tmp_path / "org_model.manifest.json").read_text())
+    assert manifest["hashes"] == [content_hash("a"), content_hash("bb")]
+    assert (tmp_path / manifest["vectors"]).exists()
+
+def test_get_or_encode_reuses_cache_without_encoding(tmp_path):
+    EmbeddingStore(str(tmp_path), "org/model").get_or_encode(["a", "bb"], make_encoder())
+    encoder = make_encoder()
+
+    vectors = EmbeddingStore(str(tmp_path), "org/model").get_or_encode(["a", "bb"], encoder)
+
+    encoder.assert_not_called()
+    assert isinstance(vectors, np.memmap)
+    assert vectors[1, 0] == 2.0
+
+def test_get_or_encode_only_encodes_changed_entries(tmp_path):
+    EmbeddingStore(str(tmp_path), "org/model").get_or_encode(["a", "bb", "ccc"], make_encoder())
+    encoder = make_encoder()
+
+    vectors = EmbeddingStore(str(tmp_path), "org/model").get_or_encode(["ccc", "dddd", "a"], encoder)
+
+    encoder.assert_called_once_with(["dddd"])
+    assert vectors[:, 0].tolist() == [3.0, 4.0, 1.0]
+
+def test_cache_is_keyed_by_model_name(tmp_path):
+    EmbeddingStore(str(tmp_path), "org/model-a").get_or_encode(["a"], make_encoder())
+    encoder = make_encoder()
+
+    EmbeddingStore(str(tmp_path), "org/model-b").get_or_encode(["a"], encoder)
+
+    encoder.assert_called_once_with(["a"])
+
+def test_save_replaces_the_previous_vectors_file(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "org/model")
+    store.get_or_encode(["a"], make_encoder())
+    store.get_or_encode(["a", "bb"], make_encoder())
+
+    assert sorted(name.endswith(".npy") for name in os.listdir(tmp_path)) == [False, True]
+    hashes, vectors = store.load()
+    assert len(hashes) == vectors.shape[0] == 2
+
+def test_manifest_that_does_not_match_its_vectors_is_ignored(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "org/model")
+    store.get_or_encode(["a", "bb"], make_encoder())
+    manifest_path = tmp_path / "org_model.manifest.json"
+    manifest = json.loads(manifest_path.read_text())
+    manifest_path.write_text(json.dumps({**manifest, "hashes": manifest["hashes"][:1]}))
+
+    assert store.load() == (None, None)
+
+def test_get_or_encode_returns_the_vectors_when_the_saved_cache_cannot_be_read(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "org/model")
+    store.load = MagicMock(return_value=(None, None))
+
+    vectors = store.get_or_encode(["a", "bb"], make_encoder())
+
+    assert vectors[:, 0].tolist() == [1.0, 2.0]
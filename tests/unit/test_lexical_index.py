@@ -0,0 +1,44 @@
+import numpy as np
+
+from src.services.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize_fr
+
+DOCUMENTS = [
+    "Comment obtenir un acte de naissance ? Demande en ligne sur service-public.fr",
+    "Quels sont les horaires de la déchetterie ? Lundi au samedi",
+    "Comment déposer un permis de construire ? À la mairie",
+]
+
+
+def test_tokenize_fr():
+    tokens = tokenize_fr("Où déposer l'acte sur service-public.fr ? Les déchets")
+    assert "acte" in tokens
+    assert "deposer" in tokens
+    assert "service-public.fr" in tokens
+    assert "public" in tokens
+    assert "dechet" in tokens
+    assert "les" not in tokens
+
+def test_bm25_ranks_matching_document_first():
+    index = BM25Index().build(DOCUMENTS)
+    scores, indices = index.search("horaires déchetterie", k=3)
+    assert indices[0] == 1
+    assert len(indices) == 1
+    assert scores[0] > 0
+
+def test_bm25_matches_proper_nouns():
+    index = BM25Index().build(DOCUMENTS)
+    _, indices = index.search("site service-public.fr", k=3)
+    assert indices[0] == 0
+
+def test_bm25_no_match():
+    index = BM25Index().build(DOCUMENTS)
+    scores, indices = index.search("météo", k=3)
+    assert len(indices) == 0
+
+def test_reciprocal_rank_fusion():
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 1]]) == [1, 3, 2]
+
+def test_bm25_search_restricted_to_positions():
+    index = BM25Index().build(DOCUMENTS)
+    _, indices = index.search("comment obtenir ou déposer", k=3, positions=np.array([1, 2]))
+    assert list(indices) == [2]
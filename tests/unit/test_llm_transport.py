@@ -0,0 +1,121 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from src.services.llm_transport import CircuitBreaker, LLMUnavailable, ResilientTransport, retry_reason
+
+
+def _http_error(status_code, headers=None):
+    request = httpx.Request("POST", "https://example.org")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def test_retry_reason():
+    assert retry_reason(httpx.ReadTimeout("slow")) == "timeout"
+    assert retry_reason(httpx.ConnectError("down")) == "network"
+    assert retry_reason(_http_error(429)) == "429"
+    assert retry_reason(_http_error(400)) is None
+    assert retry_reason(ValueError("bug")) is None
+
+@patch("src.services.llm_transport.time.sleep")
+def test_call_retries_transient_errors(mock_sleep):
+    transport = ResilientTransport(max_retries=2, base_delay=0.1, breaker=CircuitBreaker(failure_threshold=10))
+    fn = MagicMock(side_effect=[_http_error(503), httpx.ReadTimeout("slow"), "ok"])
+
+    assert transport.call(fn) == "ok"
+    assert fn.call_count == 3
+    assert mock_sleep.call_count == 2
+    assert transport.breaker.state == CircuitBreaker.CLOSED
+
+@patch("src.services.llm_transport.time.sleep")
+def test_call_honours_retry_after_and_gives_up(mock_sleep):
+    transport = ResilientTransport(max_retries=1, max_delay=5, breaker=CircuitBreaker(failure_threshold=10))
+    fn = MagicMock(side_effect=_http_error(429, headers={"Retry-After": "2"}))
+
+    with pytest.raises(LLMUnavailable):
+        transport.call(fn)
+    assert fn.call_count == 2
+    mock_sleep.assert_called_once_with(2.0)
+
+def test_call_does_not_retry_other_errors():
+    transport = ResilientTransport(max_retries=3)
+    fn = MagicMock(side_effect=_http_error(400))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        transport.call(fn)
+    assert fn.call_count == 1
+
+def test_circuit_opens_then_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+    transport = ResilientTransport(max_retries=0, breaker=breaker)
+    fn = MagicMock(side_effect=httpx.ConnectError("down"))
+
+    for _ in range(2):
+        with pytest.raises(LLMUnavailable):
+            transport.call(fn)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(LLMUnavailable, match="circuit breaker is open"):
+        transport.call(fn)
+    assert fn.call_count == 2
+
+    breaker._opened_at -= 30
+    fn.side_effect = None
+    fn.return_value = "ok"
+    assert transport.call(fn) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+@pytest.mark.asyncio
+async def test_acall_enforces_deadline():
+    transport = ResilientTransport(max_retries=0, deadline_seconds=0.05, breaker=CircuitBreaker(failure_threshold=10))
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(LLMUnavailable):
+        await transport.acall(slow)
+
+@pytest.mark.asyncio
+async def test_cancelled_half_open_trial_releases_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    transport = ResilientTransport(max_retries=0, breaker=breaker)
+    breaker.record_failure()
+    breaker._opened_at -= 30
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    trial = asyncio.ensure_future(transport.acall(hang))
+    await asyncio.sleep(0.01)
+    trial.cancel()  # e.g. the client disconnected during the trial call
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    async def ok():
+        return "ok"
+
+    assert await transport.acall(ok) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_configure_http_pool_runs_once_and_keeps_library_defaults(monkeypatch):
+    from huggingface_hub import get_async_session, get_session
+
+    from src.config.settings import LLM_POOL_MAX_CONNECTIONS
+    from src.services import llm_transport
+
+    monkeypatch.setattr(llm_transport, "_http_pool_configured", False)
+    default_timeout = get_session().timeout
+
+    llm_transport.configure_http_pool()
+    session = get_session()
+    llm_transport.configure_http_pool()
+
+    assert get_session() is session and not session.is_closed
+    assert session.timeout == default_timeout
+    assert session._transport._pool._max_connections == LLM_POOL_MAX_CONNECTIONS
+    async_session = get_async_session()
+    assert async_session.timeout == default_timeout and async_session.event_hooks["response"]
+    asyncio.run(async_session.aclose())
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import torch
+from transformers import Qwen2Config, Qwen2ForCausalLM
+
+from src.services.local_generator import GenerationScheduler, LocalGenerator, _GenerationJob
+from src.services.errors import GenerationOverloaded
+
+EOS_ID = 63
+PROMPTS = {"a": [5, 6, 7, 8], "b": [9, 10], "c": [11, 12, 13, 14, 15, 16, 17], "d": [3]}
+
+
+@pytest.fixture
+def tiny_model():
+    torch.manual_seed(0)
+    config = Qwen2Config(
+        vocab_size=64, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=256, eos_token_id=EOS_ID,
+    )
+    return Qwen2ForCausalLM(config).eval()
+
+@pytest.fixture
+def tokenizer():
+    """Maps a message content to its prompt ids and decodes ids as 'id,id,...'."""
+    tokenizer = MagicMock()
+    tokenizer.eos_token_id = EOS_ID
+    tokenizer.apply_chat_template.side_effect = (
+        lambda messages, **kwargs: {"input_ids": torch.tensor([PROMPTS[messages[-1]["content"]]])}
+    )
+    tokenizer.decode.side_effect = lambda ids, skip_special_tokens=True: ",".join(map(str, ids))
+    return tokenizer
+
+@pytest.fixture
+def local_generator(tiny_model, tokenizer):
+    with patch("transformers.AutoTokenizer.from_pretrained", return_value=tokenizer), \
+            patch("transformers.AutoModelForCausalLM.from_pretrained", return_value=tiny_model):
+        generator = LocalGenerator(model_id="tiny", quantization="", max_batch_size=3)
+    yield generator
+    generator.close()
+
+
+def _reference(model, prompt, max_tokens):
+    output = model.generate(torch.tensor([prompt]), max_new_tokens=max_tokens, do_sample=False, pad_token_id=0)
+    return ",".join(str(t) for t in output[0, len(prompt):].tolist() if t != EOS_ID)
+
+def test_continuous_batching_matches_sequential_generation(local_generator, tiny_model):
+    # More requests than batch slots, with different prompt lengths and max_tokens:
+    # sequences join the batch as others finish.
+    futures = {
+        key: local_generator.submit([{"role": "user", "content": key}], max_tokens=12 + 3 * i, temperature=0)
+        for i, key in enumerate(PROMPTS)
+    }
+    for i, (key, prompt) in enumerate(PROMPTS.items()):
+        assert futures[key].result(30) == _reference(tiny_model, prompt, 12 + 3 * i)
+
+@pytest.mark.asyncio
+async def test_astream_yields_text_deltas(local_generator, tiny_model):
+    messages = [{"role": "user", "content": "a"}]
+    chunks = [text async for text in local_generator.astream(messages, max_tokens=8, temperature=0)]
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == _reference(tiny_model, PROMPTS["a"], 8)
+
+@pytest.mark.asyncio
+async def test_closed_stream_leaves_the_batch(local_generator, tiny_model):
+    scheduler = local_generator._get_scheduler()
+    stream = local_generator.astream([{"role": "user", "content": "a"}], max_tokens=200, temperature=0)
+    await stream.__anext__()
+    sequence = scheduler._active[0]
+    await stream.aclose()
+
+    deadline = time.monotonic() + 10
+    while scheduler._active and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    assert not scheduler._active
+    assert sequence.job.cancelled and not sequence.done
+    assert local_generator.generate([{"role": "user", "content": "b"}], max_tokens=6, temperature=0) == (
+        _reference(tiny_model, PROMPTS["b"], 6)
+    )
+
+@pytest.mark.asyncio
+async def test_cancelled_agenerate_leaves_the_batch(local_generator):
+    scheduler = local_generator._get_scheduler()
+    task = asyncio.create_task(
+        local_generator.agenerate([{"role": "user", "content": "c"}], max_tokens=200, temperature=0)
+    )
+    while not scheduler._active:
+        await asyncio.sleep(0.001)
+    sequence = scheduler._active[0]
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    deadline = time.monotonic() + 10
+    while scheduler._active and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    assert not scheduler._active
+    assert sequence.job.cancelled and not sequence.done
+
+def test_scheduler_starts_with_the_first_request(local_generator):
+    assert local_generator._scheduler is None
+    local_generator.generate([{"role": "user", "content": "d"}], max_tokens=2, temperature=0)
+    assert local_generator._scheduler._thread.is_alive()
+
+def test_sampling_respects_max_tokens(local_generator):
+    answer = local_generator.generate([{"role": "user", "content": "c"}], max_tokens=5, temperature=0.8, top_p=0.9)
+    assert 0 < len(answer.split(",")) <= 5
+
+def test_submit_raises_when_queue_is_full(tiny_model, tokenizer):
+    started, release = threading.Event(), threading.Event()
+    template = tokenizer.apply_chat_template.side_effect
+
+    def blocking_template(messages, **kwargs):
+        started.set()
+        release.wait(5)
+        return template(messages, **kwargs)
+
+    tokenizer.apply_chat_template.side_effect = blocking_template
+    scheduler = GenerationScheduler(tiny_model, tokenizer, max_batch_size=2, max_queue_size=1)
+    job = lambda: _GenerationJob([{"role": "user", "content": "b"}], max_tokens=3, temperature=0, top_p=1.0)
+
+    first = scheduler.submit(job())
+    started.wait(5)
+    second = scheduler.submit(job())
+    with pytest.raises(GenerationOverloaded):
+        scheduler.submit(job())
+
+    release.set()
+    assert first.result(30) == second.result(30)
+    scheduler.close()
@@ -1,5 +1,6 @@
 from fastapi.testclient import TestClient
 import pytest
+from unittest.mock import MagicMock, patch
 
 from src.main import app
 
@@ -11,3 +12,63 @@ def test_health_check(client):
     assert "timestamp" in json_response
     assert "version" in json_response
     assert "faq_count" in json_response
+
+@pytest.fixture
+def readiness():
+    from src.routes import api_router
+    saved = dict(api_router._readiness)
+    api_router._readiness.update(ready=False, error=None, timings_ms={})
+    yield api_router._readiness
+    api_router._readiness.clear()
+    api_router._readiness.update(saved)
+
+def test_ready_returns_503_before_warm_up(client, readiness):
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+
+def test_ready_returns_200_after_warm_up(client, readiness):
+    mock_rag_service = MagicMock(startup_timings={"faq": 1.0, "embedding_model": 2.0, "index": 3.0})
+    with patch("src.routes.api_router.build_rag_service", return_value=mock_rag_service):
+        from src.routes.api_router import warm_up
+        warm_up()
+
+    mock_rag_service._find_context.assert_called_once()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert set(response.json()["timings_ms"]) == {"faq", "embedding_model", "index", "warm_up_query", "total"}
+
+def test_ready_reports_warm_up_failure(client, readiness):
+    with patch("src.routes.api_router.build_rag_service", side_effect=ValueError("FAQ data is empty")):
+        from src.routes.api_router import warm_up
+        warm_up()
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["error"] == "FAQ data is empty"
+
+@pytest.fixture
+def no_rag_service():
+    from src.routes import api_router
+    with patch.object(api_router, "_rag_service_instance", None):
+        yield api_router
+
+def test_answer_returns_503_while_the_service_is_starting(client, no_rag_service):
+    with no_rag_service._rag_service_lock, patch("src.services.rag_service.RAGService") as mock_rag_service:
+        response = client.post("/api/v1/answer", json={"question": "Test question?"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    mock_rag_service.assert_not_called()
+
+def test_service_built_after_failed_warm_up_is_ready(client, readiness, no_rag_service):
+    with patch("src.routes.api_router.build_rag_service", side_effect=ValueError("FAQ data is empty")):
+        no_rag_service.warm_up()
+    assert client.get("/ready").status_code == 503
+
+    with patch("src.services.rag_service.RAGService") as mock_rag_service:
+        assert no_rag_service.get_rag_service() is mock_rag_service.return_value
+
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["error"] is None
@@ -0,0 +1,47 @@
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.services.onnx_embedding import load_onnx_embedding_model, onnx_file_name
+from src.services.rag_service import create_embedding_model
+
+
+@pytest.fixture
+def onnx_mocks():
+    def save_pretrained(path):
+        os.makedirs(os.path.join(path, "onnx"))
+        open(os.path.join(path, onnx_file_name()), "w").close()
+
+    def quantize(model, config, path):
+        open(os.path.join(path, onnx_file_name(config)), "w").close()
+
+    exported = MagicMock()
+    exported.save_pretrained.side_effect = save_pretrained
+    with patch("src.services.onnx_embedding._model_kwargs", return_value={"provider": "CPUExecutionProvider"}), \
+            patch("src.services.onnx_embedding.SentenceTransformer", return_value=exported) as mock_st, \
+            patch("src.services.onnx_embedding.export_dynamic_quantized_onnx_model", side_effect=quantize) as mock_quantize:
+        yield mock_st, mock_quantize
+
+
+def test_exports_and_quantizes_once(onnx_mocks, tmp_path):
+    mock_st, mock_quantize = onnx_mocks
+
+    load_onnx_embedding_model("org/model", quantization="avx2", export_dir=str(tmp_path))
+    load_onnx_embedding_model("org/model", quantization="avx2", export_dir=str(tmp_path))
+
+    mock_quantize.assert_called_once()
+    local_dir = str(tmp_path / "org__model")
+    assert mock_st.call_args_list[0].args == ("org/model",)
+    for call in mock_st.call_args_list[1:]:
+        assert call.args == (local_dir,)
+        assert call.kwargs["backend"] == "onnx"
+        assert call.kwargs["model_kwargs"]["file_name"] == "onnx/model_qint8_avx2.onnx"
+
+def test_rejects_unknown_quantization(tmp_path):
+    with pytest.raises(ValueError):
+        load_onnx_embedding_model("org/model", quantization="int4", export_dir=str(tmp_path))
+
+def test_create_embedding_model_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        create_embedding_model("org/model", backend="tensorrt")
@@ -0,0 +1,69 @@
+import numpy as np
+from unittest.mock import MagicMock
+
+from src.services.query_embedding_cache import QueryEmbeddingCache, _dumps, _loads
+
+
+class DictBackend:
+    """In-memory stand-in for the Redis backend."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get_many(self, keys):
+        return [self.store.get(k) for k in keys]
+
+    def set_many(self, items):
+        self.store.update(items)
+
+
+def _vector(value, dim=4):
+    return np.full(dim, value, dtype=np.float32)
+
+
+def test_hit_on_normalized_question():
+    cache = QueryEmbeddingCache(max_bytes=1024)
+    cache.put("Où jeter mes déchets ?", _vector(1.0))
+    np.testing.assert_array_equal(cache.get("ou jeter  mes DECHETS"), _vector(1.0))
+    assert cache.get("Horaires de la mairie") is None
+    assert cache.hit_ratio == 0.5
+
+def test_evicts_least_recently_used_over_memory_cap():
+    cache = QueryEmbeddingCache(max_bytes=2 * _vector(0.0).nbytes)
+    cache.put("q1", _vector(1.0))
+    cache.put("q2", _vector(2.0))
+    cache.get("q1")
+    cache.put("q3", _vector(3.0))
+    assert len(cache) == 2
+    assert cache.nbytes == 2 * _vector(0.0).nbytes
+    assert cache.get("q2") is None
+    assert cache.get("q1") is not None
+
+def test_get_or_encode_encodes_each_missing_question_once():
+    cache = QueryEmbeddingCache(max_bytes=1024)
+    cache.put("q1", _vector(1.0))
+    encode = MagicMock(side_effect=lambda texts: np.stack([_vector(float(len(t))) for t in texts]))
+
+    embeddings = cache.get_or_encode(["q1", "Q 22", "q 22 ?", "q333"], encode)
+
+    encode.assert_called_once_with(["Q 22", "q333"])
+    assert [float(e[0]) for e in embeddings] == [1.0, 4.0, 4.0, 4.0]
+
+def test_shared_backend_fills_local_tier():
+    backend = DictBackend()
+    QueryEmbeddingCache(max_bytes=1024, backend=backend).put("q1", _vector(1.0))
+
+    other_worker = QueryEmbeddingCache(max_bytes=1024, backend=backend)
+    assert other_worker.get("q1", shared=False) is None
+    np.testing.assert_array_equal(other_worker.get("q1"), _vector(1.0))
+    assert len(other_worker) == 1
+
+def test_disabled_cache_always_encodes():
+    cache = QueryEmbeddingCache(max_bytes=0)
+    cache.put("q1", _vector(1.0))
+    assert cache.get("q1") is None
+    assert len(cache.get_or_encode(["q1"], lambda texts: np.stack([_vector(1.0)]))) == 1
+
+def test_serialization_round_trip():
+    embedding = np.arange(6, dtype=np.float32).reshape(2, 3)
+    np.testing.assert_array_equal(_loads(_dumps(embedding)), embedding)
@@ -1,9 +1,13 @@
+import asyncio
 import os
 import pytest
-from unittest.mock import MagicMock, patch
-import pandas as pd
+from unittest.mock import AsyncMock, MagicMock, patch
+import numpy as np
+from src.services.faq_store import FAQStore
 import torch
-from src.services.rag_service import RAGService, get_llm_client
+from src.config.settings import LLM_TIMEOUT_SECONDS
+from src.services.llm_transport import LLMUnavailable
+from src.services.rag_service import RAGService, get_async_llm_client, get_llm_client
 
 def test_rag_service_initialization(mock_load_faq_data_rag, mock_sentence_transformer):
     service = RAGService()
@@ -17,7 +21,7 @@ def test_rag_service_initialization(mock_load_faq_data_rag, mock_sentence_transf
 
 def test_rag_service_initialization_empty_faq_data(mock_sentence_transformer):
     with patch("src.services.rag_service.load_faq_data") as mock_data_loader:
-        mock_data_loader.return_value = pd.DataFrame()
+        mock_data_loader.return_value = FAQStore()
         with pytest.raises(ValueError, match="FAQ data is empty or could not be loaded."):
             RAGService()
 
@@ -67,4 +71,358 @@ def test_get_llm_client_with_token(mock_inference_client):
         get_llm_client.cache_clear()
         client = get_llm_client()
         assert client is not None
-        mock_inference_client.assert_called_once_with(token="test_token")
\ No newline at end of file
+        mock_inference_client.assert_called_once_with(token="test_token", timeout=LLM_TIMEOUT_SECONDS)
+
+def test_async_llm_client_runs_on_httpx():
+    import sys
+
+    import httpx
+    from huggingface_hub import get_async_session
+
+    with patch.dict(os.environ, {"HF_TOKEN": "test_token"}):
+        get_async_llm_client.cache_clear()
+        try:
+            assert get_async_llm_client() is not None
+            assert isinstance(get_async_session(), httpx.AsyncClient)
+        finally:
+            get_async_llm_client.cache_clear()
+    assert "aiohttp" not in sys.modules
+
+def test_rag_service_initialization_with_embedding_cache(mock_load_faq_data_rag, mock_sentence_transformer, tmp_path):
+    mock_sentence_transformer.return_value.encode.return_value = torch.tensor([
+        [0.1, 0.2, 0.3],
+        [0.4, 0.5, 0.6],
+        [0.7, 0.8, 0.9],
+    ]).numpy()
+    RAGService(embedding_cache_dir=str(tmp_path))
+    mock_sentence_transformer.return_value.encode.reset_mock()
+
+    service = RAGService(embedding_cache_dir=str(tmp_path))
+
+    service._embed_model.encode.assert_not_called()
+    assert tuple(service._faq_embeddings.shape) == (3, 3)
+
+@pytest.fixture
+def mock_async_llm_client():
+    with patch("src.services.rag_service.get_async_llm_client") as mock_get_client:
+        mock_client = MagicMock()
+        mock_completion = MagicMock()
+        mock_completion.choices = [MagicMock(message=MagicMock(content="Mocked async LLM Answer"))]
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_completion)
+        mock_get_client.return_value = mock_client
+        yield mock_client
+
+@pytest.mark.asyncio
+async def test_answer_question_async_with_context(mock_load_faq_data_rag, mock_sentence_transformer, mock_async_llm_client):
+    service = RAGService()
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+
+    response = await service.answer_question_async("User question with context")
+
+    assert response["answer"] == "Mocked async LLM Answer"
+    assert "3" in response["sources"]
+    mock_async_llm_client.chat.completions.create.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_answer_question_async_limits_llm_concurrency(mock_load_faq_data_rag, mock_sentence_transformer, mock_async_llm_client):
+    service = RAGService(llm_max_concurrency=2, answer_cache_size=0)
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+    in_flight = 0
+    max_in_flight = 0
+
+    async def slow_completion(**kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return MagicMock(choices=[MagicMock(message=MagicMock(content="ok"))])
+
+    mock_async_llm_client.chat.completions.create = AsyncMock(side_effect=slow_completion)
+
+    await asyncio.gather(*(service.answer_question_async(f"Question {i}") for i in range(6)))
+
+    assert max_in_flight == 2
+
+def test_answer_question_served_from_cache(mock_load_faq_data_rag, mock_sentence_transformer, mock_inference_client):
+    service = RAGService()
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+    llm_client = mock_inference_client.return_value
+
+    with patch("src.services.rag_service.get_llm_client", return_value=llm_client):
+        first = service.answer_question("Comment obtenir un acte de naissance ?")
+        second = service.answer_question("comment obtenir un acte de naissance")
+
+    assert llm_client.chat.completions.create.call_count == 1
+    assert second["cached"] is True
+    assert second["answer"] == first["answer"]
+    assert second["sources"] == first["sources"]
+
+@pytest.mark.asyncio
+async def test_stream_answer(mock_load_faq_data_rag, mock_sentence_transformer, mock_async_llm_client):
+    service = RAGService()
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+
+    async def fake_stream():
+        for text in ["Bonjour", ", voici", None, " la réponse."]:
+            yield MagicMock(choices=[MagicMock(delta=MagicMock(content=text))])
+
+    mock_async_llm_client.chat.completions.create = AsyncMock(return_value=fake_stream())
+
+    events = [event async for event in service.stream_answer("User question")]
+
+    assert events[0][0] == "context"
+    assert "3" in events[0][1]["sources"]
+    assert [data["text"] for event, data in events if event == "token"] == ["Bonjour", ", voici", " la réponse."]
+    assert events[-1][0] == "done"
+    assert service._answer_cache.get("User question")["answer"] == "Bonjour, voici la réponse."
+
+@pytest.mark.asyncio
+async def test_answer_batch_async_single_encode_and_per_item_errors(mock_load_faq_data_rag, mock_sentence_transformer, mock_async_llm_client):
+    service = RAGService(answer_cache_size=0)
+    service._embed_model.encode.reset_mock()
+    service._embed_model.encode.return_value = torch.tensor([
+        [0.7, 0.8, 0.9],
+        [0.1, 0.2, 0.3],
+        [0.4, 0.5, 0.6],
+    ])
+    ok_completion = MagicMock(choices=[MagicMock(message=MagicMock(content="ok"))])
+    mock_async_llm_client.chat.completions.create = AsyncMock(
+        side_effect=[ok_completion, RuntimeError("LLM unavailable"), ok_completion]
+    )
+
+    results = await service.answer_batch_async(["Q a", "Q b", "Q c"], max_concurrency=1)
+
+    service._embed_model.encode.assert_called_once()
+    assert service._embed_model.encode.call_args[0][0] == ["Q a", "Q b", "Q c"]
+    assert [r["question"] for r in results] == ["Q a", "Q b", "Q c"]
+    assert results[0]["answer"] == "ok"
+    assert results[0]["sources"][0] == "3"
+    assert results[1]["error"] == "LLM unavailable"
+    assert results[2]["answer"] == "ok"
+
+@pytest.mark.asyncio
+async def test_answer_question_async_with_micro_batching(mock_load_faq_data_rag, mock_sentence_transformer, mock_async_llm_client):
+    service = RAGService(answer_cache_size=0, embed_batch_window_ms=50)
+    service._embed_model.encode.reset_mock()
+    service._embed_model.encode.side_effect = lambda texts, **kwargs: torch.tensor([[0.7, 0.8, 0.9]] * len(texts))
+
+    responses = await asyncio.gather(*(service.answer_question_async(f"Question {i}") for i in range(4)))
+
+    assert all(r["sources"][0] == "3" for r in responses)
+    assert sum(len(call[0][0]) for call in service._embed_model.encode.call_args_list) == 4
+    assert service._embed_model.encode.call_count < 4
+
+def test_reload_only_reencodes_changed_entries(mock_load_faq_data_rag, mock_sentence_transformer):
+    service = RAGService()
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+    service._answer_cache.put("Q1", torch.tensor([0.1, 0.2, 0.3]), {"answer": "A", "confidence": 0.9, "sources": [], "latency_ms": 1.0})
+    old_index = service._index
+    mock_load_faq_data_rag.return_value = FAQStore.from_dicts([
+        {"id": "1", "question": "Q1", "answer": "A1", "category": "Cat A", "keywords": ["kw1"]},
+        {"id": "2", "question": "Q2", "answer": "A2 modifiée", "category": "Specific", "keywords": ["kw2"]},
+        {"id": "4", "question": "Q4", "answer": "A4", "category": "Another", "keywords": ["kw4"]},
+    ])
+    service._embed_model.encode.reset_mock()
+    service._embed_model.encode.return_value = torch.tensor([[0.2, 0.1, 0.0], [0.0, 0.1, 0.2]])
+
+    summary = service.reload()
+
+    encoded_texts = service._embed_model.encode.call_args[0][0]
+    assert len(encoded_texts) == 2
+    assert "A2 modifiée" in encoded_texts[0]
+    assert summary["added"] == ["4"]
+    assert summary["removed"] == ["3"]
+    assert summary["updated"] == ["2"]
+    assert service._faq_ids == ["1", "2", "4"]
+    assert service._index is not old_index
+    assert np.allclose(service._faq_embeddings[0], [0.1, 0.2, 0.3])
+    assert len(service._answer_cache) == 0
+
+@pytest.mark.asyncio
+async def test_answer_generated_across_a_reload_is_not_cached(mock_load_faq_data_rag, mock_sentence_transformer, mock_async_llm_client):
+    service = RAGService()
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+    mock_load_faq_data_rag.return_value = FAQStore.from_dicts([
+        {"id": "1", "question": "Q1", "answer": "A1", "category": "Cat A", "keywords": ["kw1"]},
+        {"id": "2", "question": "Q2", "answer": "A2", "category": "Specific", "keywords": ["kw2"]},
+        {"id": "3", "question": "Q3", "answer": "A3 modifiée", "category": "Cat A", "keywords": ["kw3"]},
+    ])
+
+    async def completion_during_reload(**kwargs):
+        # The FAQ changes while the answer is being generated from the old context.
+        service.reload()
+        return MagicMock(choices=[MagicMock(message=MagicMock(content="Réponse obsolète"))])
+
+    mock_async_llm_client.chat.completions.create = AsyncMock(side_effect=completion_during_reload)
+    response = await service.answer_question_async("User question with context")
+
+    assert response["answer"] == "Réponse obsolète"
+    assert len(service._answer_cache) == 0
+
+def test_reload_keeps_snapshot_when_faq_data_is_empty(mock_load_faq_data_rag, mock_sentence_transformer):
+    service = RAGService()
+    snapshot = service._snapshot
+    mock_load_faq_data_rag.return_value = FAQStore()
+
+    with pytest.raises(ValueError):
+        service.reload()
+
+    assert service._snapshot is snapshot
+    mock_load_faq_data_rag.assert_called_with(reload=True)
+
+def test_find_context_hybrid_retrieval(mock_load_faq_data_rag, mock_sentence_transformer):
+    service = RAGService(retrieval_mode="hybrid", top_k=2)
+    service._embed_model.encode.return_value = torch.tensor([[0.1, 0.2, 0.3]])
+
+    context, sources, confidence = service._find_context("kw3")
+
+    assert service._snapshot.lexical_index is not None
+    assert sources[0] == "3"
+    assert confidence > 0.0
+
+def test_rag_service_unknown_retrieval_mode(mock_load_faq_data_rag, mock_sentence_transformer):
+    with pytest.raises(ValueError, match="Unknown retrieval mode"):
+        RAGService(retrieval_mode="sparse")
+
+def test_answer_question_direct_answer_above_threshold(mock_load_faq_data_rag, mock_sentence_transformer, mock_inference_client):
+    service = RAGService(direct_answer_threshold=0.9)
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+    llm_client = mock_inference_client.return_value
+
+    with patch("src.services.rag_service.get_llm_client", return_value=llm_client):
+        response = service.answer_question("User question 3")
+
+    llm_client.chat.completions.create.assert_not_called()
+    assert response["path"] == "direct"
+    assert response["sources"] == ["3"]
+    assert response["answer"].endswith("A3")
+
+def test_answer_question_refusal_below_threshold(mock_load_faq_data_rag, mock_sentence_transformer, mock_inference_client):
+    service = RAGService(refusal_threshold=0.5)
+    llm_client = mock_inference_client.return_value
+
+    with patch.object(service, "_find_context", return_value=("Q: Q1\nR: A1", ["1"], 0.2)), \
+            patch("src.services.rag_service.get_llm_client", return_value=llm_client):
+        response = service.answer_question("Question hors sujet")
+
+    llm_client.chat.completions.create.assert_not_called()
+    assert response["path"] == "refusal"
+    assert "pas en mesure de répondre" in response["answer"]
+    assert response["sources"] == []
+
+@pytest.mark.asyncio
+async def test_stream_answer_direct_answer(mock_load_faq_data_rag, mock_sentence_transformer, mock_async_llm_client):
+    service = RAGService(direct_answer_threshold=0.9)
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+
+    events = [event async for event in service.stream_answer("User question 3")]
+
+    mock_async_llm_client.chat.completions.create.assert_not_called()
+    assert [event for event, _ in events] == ["context", "token", "done"]
+    assert events[-1][1]["path"] == "direct"
+
+def test_find_context_with_category_searches_its_rows(mock_load_faq_data_rag, mock_sentence_transformer):
+    service = RAGService()
+    assert service.categories == ["Another", "Cat A", "Specific"]
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+
+    context, sources, _ = service._find_context("User question", category="Specific")
+
+    assert sources == ["2"]
+    assert "Q: Q2" in context
+
+def test_answer_question_unknown_category(mock_load_faq_data_rag, mock_sentence_transformer):
+    service = RAGService()
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+    with pytest.raises(ValueError, match="Unknown category"):
+        service.answer_question("User question", category="Inconnue")
+
+def test_prepare_routes_with_classifier(mock_load_faq_data_rag, mock_sentence_transformer):
+    with patch("src.services.rag_service.CATEGORY_CLASSIFIER_MIN_MARGIN", 0.01):
+        service = RAGService(category_routing="auto")
+    prepared = service._prepare("User question", q_emb=torch.tensor([0.1, 0.2, 0.3]))
+
+    assert prepared.category == "Cat A"
+    assert prepared.retrieval[1] == ["1"]
+
+def test_answer_question_with_local_backend(mock_load_faq_data_rag, mock_sentence_transformer):
+    local_generator = MagicMock()
+    local_generator.generate.return_value = "Bonjour, réponse locale."
+    with patch("src.services.local_generator.get_local_generator", return_value=local_generator):
+        service = RAGService(llm_backend="local")
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+
+    response = service.answer_question("User question")
+
+    assert response["answer"] == "Bonjour, réponse locale."
+    messages = local_generator.generate.call_args.args[0]
+    assert messages[1] == {"role": "user", "content": "User question"}
+
+def test_rag_service_unknown_llm_backend(mock_load_faq_data_rag, mock_sentence_transformer):
+    with pytest.raises(ValueError, match="Unknown LLM backend"):
+        RAGService(llm_backend="gpu-cluster")
+
+def test_answer_question_degrades_when_llm_unavailable(mock_load_faq_data_rag, mock_sentence_transformer):
+    service = RAGService()
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+
+    with patch.object(service._generator, "generate", side_effect=LLMUnavailable("LLM circuit breaker is open.")):
+        response = service.answer_question("User question 3")
+
+    assert response["path"] == "degraded"
+    assert response["sources"] == ["3"]
+    assert response["answer"].endswith("A3")
+
+@pytest.mark.asyncio
+async def test_identical_in_flight_questions_share_one_llm_call(mock_load_faq_data_rag, mock_sentence_transformer, mock_async_llm_client):
+    service = RAGService(answer_cache_size=0)
+    service._embed_model.encode.return_value = torch.tensor([[0.7, 0.8, 0.9]])
+
+    async def slow_completion(**kwargs):
+        await asyncio.sleep(0.05)
+        return MagicMock(choices=[MagicMock(message=MagicMock(content="Collecte demain matin."))])
+
+    mock_async_llm_client.chat.completions.create = AsyncMock(side_effect=slow_completion)
+
+    questions = ["Collecte des déchets demain ?", "collecte des dechets demain", "Collecte des déchets demain ?", "Horaires piscine ?"]
+    responses = await asyncio.gather(*(service.answer_question_async(q) for q in questions))
+
+    assert mock_async_llm_client.chat.completions.create.await_count == 2
+    assert all(r["answer"] == "Collecte demain matin." for r in responses)
+    assert sorted(r["path"] for r in responses) == ["coalesced", "coalesced", "llm", "llm"]
+    assert len(service._in_flight) == 0
+
+def test_after_fork_starts_background_threads(mock_load_faq_data_rag, mock_sentence_transformer):
+    service = RAGService(embed_batch_window_ms=50, reload_interval_seconds=60, background_threads=False)
+    service._generator = MagicMock()
+    assert service._query_batcher is None and service._watcher is None
+
+    service.after_fork()
+
+    assert service._query_batcher is not None
+    assert service._watcher.is_alive()
+    service._generator.after_fork.assert_called_once()
+
+def test_repeated_question_reuses_query_embedding(mock_load_faq_data_rag, mock_sentence_transformer):
+    service = RAGService(answer_cache_size=0)
+    service._embed_model.encode.reset_mock()
+
+    service._find_context("Où jeter mes déchets ?")
+    service._find_context("ou jeter mes dechets")
+
+    service._embed_model.encode.assert_called_once()
+
+def test_reranker_reorders_retrieved_entries(mock_load_faq_data_rag, mock_sentence_transformer):
+    from src.services.reranker import CrossEncoderReranker
+
+    # Relevance favours Q1, which the bi-encoder ranks last.
+    model = MagicMock()
+    model.predict.side_effect = lambda pairs, **kwargs: np.array([1.0 if p.startswith("Q1") else 0.0 for _, p in pairs])
+    with patch("src.services.rag_service.create_reranker", return_value=CrossEncoderReranker(model, top_k=2)):
+        service = RAGService(answer_cache_size=0)
+    service._embed_model.encode.return_value = torch.tensor([0.7, 0.8, 0.9])
+
+    _, sources, _ = service._find_context("Q?")
+
+    assert sources == ["1", "3"]
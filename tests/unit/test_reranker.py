@@ -0,0 +1,55 @@
+import numpy as np
+from unittest.mock import MagicMock, patch
+
+from src.services.reranker import CrossEncoderReranker, create_reranker
+
+PASSAGES = {0: "horaires mairie", 1: "déchets verts", 2: "carte d'identité", 3: "déchetterie"}
+
+
+def _model(relevance):
+    """Fake cross-encoder: the relevance of a pair is looked up by passage."""
+    model = MagicMock()
+    model.predict.side_effect = lambda pairs, **kwargs: np.array([relevance[passage] for _, passage in pairs])
+    return model
+
+
+def test_rerank_reorders_and_keeps_top_k_in_one_forward_pass():
+    model = _model({"horaires mairie": 0.1, "déchets verts": 0.9, "carte d'identité": 0.2, "déchetterie": 0.7})
+    reranker = CrossEncoderReranker(model, top_k=2, budget_ms=0)
+    ranked = [
+        (np.array([0.8, 0.7, 0.6]), np.array([0, 1, 3])),
+        (np.array([0.9, 0.5]), np.array([2, 0])),
+    ]
+
+    (scores_a, indices_a), (scores_b, indices_b) = reranker.rerank(["q a", "q b"], PASSAGES.get, ranked)
+
+    model.predict.assert_called_once()
+    assert len(model.predict.call_args[0][0]) == 5
+    assert indices_a.tolist() == [1, 3] and scores_a.tolist() == [0.7, 0.6]
+    assert indices_b.tolist() == [2, 0]
+
+def test_rerank_skipped_when_estimate_exceeds_budget():
+    model = _model({passage: 0.5 for passage in PASSAGES.values()})
+    reranker = CrossEncoderReranker(model, top_k=2, budget_ms=10, decay=0.5)
+    reranker._ms_per_pair = 4.0
+    ranked = [(np.array([0.8, 0.7, 0.6]), np.array([0, 1, 3]))]
+
+    (scores, indices), = reranker.rerank(["q"], PASSAGES.get, ranked)
+
+    model.predict.assert_not_called()
+    assert indices.tolist() == [0, 1]
+    # The estimate decays while skipped: 3 pairs * 2ms now fit in the budget.
+    reranker.rerank(["q"], PASSAGES.get, ranked)
+    model.predict.assert_called_once()
+
+def test_rerank_keeps_retrieval_order_on_model_error():
+    model = MagicMock()
+    model.predict.side_effect = RuntimeError("boom")
+    reranker = CrossEncoderReranker(model, top_k=1)
+
+    (scores, indices), = reranker.rerank(["q"], PASSAGES.get, [(np.array([0.8, 0.7]), np.array([3, 1]))])
+
+    assert indices.tolist() == [3]
+
+def test_create_reranker_disabled_without_model_name():
+    assert create_reranker("") is None
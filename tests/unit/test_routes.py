@@ -1,15 +1,15 @@
 from fastapi.testclient import TestClient
 import pytest
-from unittest.mock import MagicMock, patch
-import pandas as pd
+from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi import HTTPException
 
 from src.main import app
 from src.models import AnswerResponse, FAQ
 from src.routes.api_router import get_rag_service, get_faq_df
 from src.services.rag_service import RAGService
+from src.services.faq_store import FAQStore
 
-MOCK_FAQ_DATA_FOR_TESTS_DF = pd.DataFrame([
+MOCK_FAQ_DATA_FOR_TESTS_DF = FAQStore.from_dicts([
     {"id": "1", "question": "Q1", "answer": "A1", "category": "Cat1", "theme": "Theme1", "tags": ["tag1", "tag2"]},
     {"id": "2", "question": "Q2", "answer": "A2", "category": "Cat2", "theme": "Theme2", "tags": ["tag3"]},
 ])
@@ -22,12 +22,12 @@ def mock_get_faq_df_dependency():
 
 def test_get_answer(client, mock_data_loader_df, mock_get_faq_df_dependency):
     mock_rag_service = MagicMock(spec=RAGService)
-    mock_rag_service.answer_question.return_value = {
+    mock_rag_service.answer_question_async = AsyncMock(return_value={
         "answer": "Mocked LLM Answer",
         "confidence": 0.95,
         "sources": ["doc_mock"],
         "latency_ms": 100.0,
-    }
+    })
     app.dependency_overrides[get_rag_service] = lambda: mock_rag_service
     try:
         response = client.post(
@@ -38,15 +38,15 @@ def test_get_answer(client, mock_data_loader_df, mock_get_faq_df_dependency):
         assert answer_response.answer == "Mocked LLM Answer"
         assert answer_response.confidence == 0.95
         assert "doc_mock" in answer_response.sources
-        mock_rag_service.answer_question.assert_called_once_with( 
-            "Test question?"
+        mock_rag_service.answer_question_async.assert_awaited_once_with(
+            "Test question?", category=None
         )
     finally:
         app.dependency_overrides = {} 
 
 def test_get_answer_internal_error(client, mock_data_loader_df, mock_get_faq_df_dependency):
     mock_rag_service_instance = MagicMock()
-    mock_rag_service_instance.answer_question.side_effect = HTTPException(status_code=500, detail="Internal error")
+    mock_rag_service_instance.answer_question_async = AsyncMock(side_effect=HTTPException(status_code=500, detail="Internal error"))
 
     app.dependency_overrides[get_rag_service] = lambda: mock_rag_service_instance
     try:
@@ -68,7 +68,7 @@ def test_list_faqs(client, mock_data_loader_df, mock_get_faq_df_dependency):
     assert faqs[1].question == "Q2"
 
 def test_list_faqs_empty(client, mock_data_loader_df):
-    app.dependency_overrides[get_faq_df] = lambda: pd.DataFrame() 
+    app.dependency_overrides[get_faq_df] = lambda: FAQStore() 
     try:
         response = client.get("/api/v1/faq")
         assert response.status_code == 200
@@ -90,10 +90,118 @@ def test_get_faq_by_id_not_found(client, mock_data_loader_df, mock_get_faq_df_de
     assert response.json() == {"detail": "FAQ with id '999' not found."}
 
 def test_get_faq_by_id_data_not_available(client, mock_data_loader_df):
-    app.dependency_overrides[get_faq_df] = lambda: pd.DataFrame() 
+    app.dependency_overrides[get_faq_df] = lambda: FAQStore() 
     try:
         response = client.get("/api/v1/faq/1")
         assert response.status_code == 404
         assert response.json() == {"detail": "FAQ data not available."}
     finally:
         app.dependency_overrides = {}
+
+def test_stream_answer(client, mock_data_loader_df):
+    async def fake_stream(question, category=None):
+        yield "context", {"sources": ["doc_mock"], "confidence": 0.9}
+        yield "token", {"text": "Bonjour"}
+        yield "done", {"latency_ms": 12.0, "cached": False}
+
+    mock_rag_service = MagicMock(spec=RAGService)
+    mock_rag_service.stream_answer = fake_stream
+    app.dependency_overrides[get_rag_service] = lambda: mock_rag_service
+    try:
+        response = client.post("/api/v1/answer/stream", json={"question": "Test question?"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+        assert [lines[0] for lines in events] == ["event: context", "event: token", "event: done"]
+        assert events[0][1] == 'data: {"sources": ["doc_mock"], "confidence": 0.9}'
+    finally:
+        app.dependency_overrides = {}
+
+def test_get_batch_answers(client, mock_data_loader_df):
+    mock_rag_service = MagicMock(spec=RAGService)
+    mock_rag_service.answer_batch_async = AsyncMock(return_value=[
+        {"question": "Q1?", "answer": "A1", "confidence": 0.9, "sources": ["1"], "latency_ms": 10.0},
+        {"question": "Q2?", "error": "LLM unavailable"},
+    ])
+    app.dependency_overrides[get_rag_service] = lambda: mock_rag_service
+    try:
+        response = client.post("/api/v1/answer/batch", json={"questions": ["Q1?", "Q2?"]})
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results[0]["answer"] == "A1"
+        assert results[1]["error"] == "LLM unavailable"
+        assert results[1]["answer"] is None
+        mock_rag_service.answer_batch_async.assert_awaited_once_with(["Q1?", "Q2?"], category=None)
+    finally:
+        app.dependency_overrides = {}
+
+def test_get_answer_with_category(client, mock_data_loader_df):
+    mock_rag_service = MagicMock(spec=RAGService)
+    mock_rag_service.categories = ["etat_civil", "urbanisme"]
+    mock_rag_service.answer_question_async = AsyncMock(return_value={
+        "answer": "Mocked LLM Answer",
+        "confidence": 0.95,
+        "sources": ["EC001"],
+        "latency_ms": 100.0,
+    })
+    app.dependency_overrides[get_rag_service] = lambda: mock_rag_service
+    try:
+        response = client.post("/api/v1/answer", json={"question": "Test question?", "category": "etat_civil"})
+        assert response.status_code == 200
+        mock_rag_service.answer_question_async.assert_awaited_once_with("Test question?", category="etat_civil")
+
+        response = client.post("/api/v1/answer", json={"question": "Test question?", "category": "inconnue"})
+        assert response.status_code == 400
+    finally:
+        app.dependency_overrides = {}
+
+def test_get_batch_answers_rejects_empty_batch(client):
+    mock_rag_service = MagicMock(spec=RAGService)
+    app.dependency_overrides[get_rag_service] = lambda: mock_rag_service
+    try:
+        response = client.post("/api/v1/answer/batch", json={"questions": []})
+        assert response.status_code == 422
+        mock_rag_service.answer_batch_async.assert_not_called()
+    finally:
+        app.dependency_overrides = {}
+
+def test_admin_reload(client):
+    mock_rag_service = MagicMock(spec=RAGService)
+    mock_rag_service.reload.return_value = {"added": ["4"], "removed": [], "updated": [], "faq_count": 4, "fingerprint": "abc"}
+    app.dependency_overrides[get_rag_service] = lambda: mock_rag_service
+    try:
+        with patch("src.routes.api_router.ADMIN_TOKEN", "secret"):
+            assert client.post("/api/v1/admin/reload").status_code == 403
+            response = client.post("/api/v1/admin/reload", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert response.json()["added"] == ["4"]
+        mock_rag_service.reload.assert_called_once()
+    finally:
+        app.dependency_overrides = {}
+
+def test_admin_reload_is_disabled_without_token(client):
+    mock_rag_service = MagicMock(spec=RAGService)
+    app.dependency_overrides[get_rag_service] = lambda: mock_rag_service
+    try:
+        with patch("src.routes.api_router.ADMIN_TOKEN", ""):
+            response = client.post("/api/v1/admin/reload", headers={"X-Admin-Token": ""})
+        assert response.status_code == 404
+        mock_rag_service.reload.assert_not_called()
+    finally:
+        app.dependency_overrides = {}
+
+def test_list_faqs_etag(client, mock_data_loader_df, mock_get_faq_df_dependency):
+    response = client.get("/api/v1/faq")
+    etag = response.headers["etag"]
+
+    not_modified = client.get("/api/v1/faq", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+    # A weak tag, as sent back through a proxy that compressed the response.
+    weak = client.get("/api/v1/faq", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert weak.status_code == 304
+
+    modified = client.get("/api/v1/faq", headers={"If-None-Match": '"stale"'})
+    assert modified.status_code == 200
+    assert len(modified.json()) == 2
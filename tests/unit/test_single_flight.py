@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from src.services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_computation():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    results = await asyncio.gather(*(single_flight.run("key", compute) for _ in range(5)))
+
+    assert calls == 1
+    assert [result for result, _ in results] == ["answer"] * 5
+    assert [shared for _, shared in results].count(False) == 1
+    assert len(single_flight) == 0
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_kept():
+    single_flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("LLM down")
+
+    results = await asyncio.gather(*(single_flight.run("key", fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(single_flight) == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_computation():
+    single_flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    first = asyncio.ensure_future(single_flight.run("key", compute))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(single_flight.run("key", compute))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == ("answer", True)
@@ -0,0 +1,10 @@
+import subprocess
+import sys
+
+HEAVY_MODULES = ("torch", "transformers", "sentence_transformers", "huggingface_hub", "pandas")
+
+
+def test_app_import_does_not_load_the_ml_stack():
+    code = f"import sys, src.main; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == ""
@@ -0,0 +1,154 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.services.vector_index import BruteForceIndex, HNSWIndex, IVFIndex, create_index, load_index
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(42)
+    return rng.normal(size=(500, 16)).astype(np.float32)
+
+def _unit(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def exact_top_k(corpus, queries, k):
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+
+def test_brute_force_index_is_exact(corpus):
+    index = BruteForceIndex().build(corpus)
+    scores, indices = index.search(corpus[:5], k=3)
+    assert indices.shape == (5, 3)
+    assert indices[:, 0].tolist() == [0, 1, 2, 3, 4]
+    assert np.allclose(scores[:, 0], 1.0, atol=1e-5)
+    assert (indices == exact_top_k(corpus, corpus[:5], 3)).all()
+
+def test_ivf_index_probing_all_lists_is_exact(corpus):
+    index = IVFIndex(nlist=10, nprobe=10).build(corpus)
+    _, indices = index.search(corpus[:20], k=5)
+    assert (indices == exact_top_k(corpus, corpus[:20], 5)).all()
+
+def test_ivf_index_probes_more_lists_when_they_hold_fewer_than_k(corpus):
+    index = IVFIndex(nlist=50, nprobe=1).build(corpus)
+    k = int(index._list_sizes.max()) + 5
+    scores, indices = index.search(corpus[:10], k=k)
+
+    assert indices.shape == (10, k)
+    assert np.isfinite(scores).all()
+    assert all(len(set(row)) == k for row in indices.tolist())
+    assert indices[:, 0].tolist() == list(range(10))
+
+def test_hnsw_index_finds_nearest_neighbours(corpus):
+    pytest.importorskip("hnswlib")
+    index = HNSWIndex().build(corpus)
+    scores, indices = index.search(corpus[:5], k=1)
+    assert indices[:, 0].tolist() == [0, 1, 2, 3, 4]
+    assert np.allclose(scores[:, 0], 1.0, atol=1e-5)
+
+@pytest.mark.parametrize("backend", ["brute_force", "ivf"])
+def test_save_and_load_index(corpus, tmp_path, backend):
+    index = create_index(backend).build(corpus)
+    index.save(str(tmp_path), fingerprint="v1")
+
+    loaded = load_index(str(tmp_path), fingerprint="v1")
+
+    assert loaded.backend == backend
+    assert len(loaded) == 500
+    assert (loaded.search(corpus[:3], k=4)[1] == index.search(corpus[:3], k=4)[1]).all()
+
+def test_load_index_with_stale_fingerprint(corpus, tmp_path):
+    BruteForceIndex().build(corpus).save(str(tmp_path), fingerprint="v1")
+    assert load_index(str(tmp_path), fingerprint="v2") is None
+    assert load_index(str(tmp_path / "missing")) is None
+
+def test_load_index_built_with_other_settings(corpus, tmp_path):
+    IVFIndex(nlist=10, nprobe=4).build(corpus).save(str(tmp_path), fingerprint="v1")
+    assert load_index(str(tmp_path), fingerprint="v1", backend="ivf", params={"nprobe": 4}) is not None
+    assert load_index(str(tmp_path), fingerprint="v1", backend="ivf", params={"nprobe": 8}) is None
+    assert load_index(str(tmp_path), fingerprint="v1", backend="brute_force") is None
+
+def test_save_replaces_the_metadata_last(corpus, tmp_path):
+    BruteForceIndex().build(corpus).save(str(tmp_path), fingerprint="v1")
+    first_files = set(os.listdir(tmp_path))
+
+    # A save interrupted before its metadata is written leaves the previous index usable.
+    IVFIndex(nlist=10).build(corpus)._save_data(str(tmp_path), "interrupted")
+    assert load_index(str(tmp_path), fingerprint="v1").backend == "brute_force"
+
+    IVFIndex(nlist=10).build(corpus).save(str(tmp_path), fingerprint="v2")
+    assert load_index(str(tmp_path), fingerprint="v2").backend == "ivf"
+    assert not first_files - {"index.json"} & set(os.listdir(tmp_path))
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+def test_load_index_with_missing_data_file(corpus, tmp_path):
+    BruteForceIndex().build(corpus).save(str(tmp_path))
+    for name in os.listdir(tmp_path):
+        if name.endswith(".npy"):
+            os.remove(tmp_path / name)
+    assert load_index(str(tmp_path)) is None
+
+@pytest.mark.parametrize("backend, params, min_recall", [
+    ("brute_force", {}, 1.0),
+    ("brute_force", {"quantization": "int8", "rescore_factor": 8}, 0.9),
+    ("ivf", {"nlist": 20, "nprobe": 20}, 1.0),
+    # One probed list holds about 2 of the rows: more lists are probed to return k of them.
+    ("ivf", {"nlist": 20, "nprobe": 1}, 0.0),
+    ("hnsw", {}, 0.9),
+])
+def test_search_restricted_to_rows(corpus, backend, params, min_recall):
+    if backend == "hnsw":
+        pytest.importorskip("hnswlib")
+    index = create_index(backend, **params).build(corpus)
+    rows = np.arange(3, 500, 7)
+    queries = corpus[:10] + 0.05
+
+    scores, indices = index.search(queries, k=5, rows=rows)
+
+    expected = rows[exact_top_k(corpus[rows], queries, 5)]
+    assert indices.shape == (10, 5) and np.isfinite(scores).all()
+    assert np.isin(indices, rows).all()
+    assert all(len(set(row)) == 5 for row in indices.tolist())
+    assert np.mean([len(set(f) & set(e)) / 5 for f, e in zip(indices, expected)]) >= min_recall
+
+def test_create_index_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown vector index backend"):
+        create_index("annoy")
+
+def test_brute_force_int8_quantization_recall(corpus):
+    index = BruteForceIndex(quantization="int8", rescore_factor=4).build(corpus)
+    queries = corpus[:20] + 0.1
+    scores, indices = index.search(queries, k=5)
+
+    exact = exact_top_k(corpus, queries, 5)
+    recall = np.mean([len(set(found) & set(expected)) / 5 for found, expected in zip(indices, exact)])
+    assert recall >= 0.95
+    assert (np.diff(scores, axis=1) <= 0).all()
+
+def test_brute_force_int8_chunked_search_matches_single_chunk(corpus):
+    index = BruteForceIndex(quantization="int8").build(corpus)
+    queries = corpus[:8] + 0.1
+    expected = index._search_int8(_unit(queries), 5)
+    chunked = index._search_int8(_unit(queries), 5, chunk_size=64)
+    assert (chunked[1] == expected[1]).all()
+
+def test_brute_force_int8_memory_counts_in_memory_rescoring_vectors(corpus, tmp_path):
+    float32_bytes = BruteForceIndex().build(corpus).nbytes
+    index = BruteForceIndex(quantization="int8").build(corpus)
+    assert index._raw is corpus  # referenced, not copied
+    assert index.nbytes > float32_bytes
+
+    index.save(str(tmp_path))
+    assert load_index(str(tmp_path)).nbytes < float32_bytes / 3
+
+def test_brute_force_int8_save_and_load(corpus, tmp_path):
+    index = BruteForceIndex(quantization="int8").build(corpus)
+    index.save(str(tmp_path))
+
+    loaded = load_index(str(tmp_path))
+
+    assert loaded.quantization == "int8"
+    assert (loaded.search(corpus[:3], k=4)[1] == index.search(corpus[:3], k=4)[1]).all()